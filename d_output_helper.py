@@ -12,7 +12,16 @@ def main():
     parser.add_argument('--entities', help='Entities for which the data will be deleted.')
     parser.add_argument('--dirs', help='Directories to be deleted in the entities list.'
                                        'Allowed values: [raw, transformed, database_formatted, database]')
+    parser.add_argument('--invalidate', help='Transformed entities to invalidate (separated by commas). Their outputs '
+                                             'and the outputs of all the tasks that depend on them (transformed, '
+                                             'database_formatted and database markers) are deleted. Uses the '
+                                             'data_dir_out of the luigi configuration.')
+    parser.add_argument('--dry-run', help='With --invalidate, only lists the outputs that would be deleted.',
+                        action="store_true")
     args = parser.parse_args()
+    if args.invalidate:
+        invalidate_entities(get_entities_delete_option(args.invalidate), args.dry_run)
+        return
     output_dir = args.output_dir
     rm_all_option = args.rm_all
     entities_delete = get_entities_delete_option(args.entities)
@@ -62,6 +71,79 @@ def delete_files_for_entities(entities_delete, dirs_delete, output_dir):
                 delete_all_files_in_directory(path)
 
 
+def get_task_dependencies(task):
+    from luigi.task import flatten
+    from etl.workflow.transformer import TransformEntity
+
+    # The dependencies between transformations are always the ones in requiredTasks, even if they run in process
+    if isinstance(task, TransformEntity):
+        return list(task.requiredTasks)
+    return flatten(task.requires())
+
+
+def get_downstream_tasks(root_task, entity_names):
+    """
+    Returns the transformations of the given entities and all the tasks required by root_task that depend on them,
+    directly or not.
+    """
+    from etl.workflow.transformer import TransformEntity
+
+    dependents = {}
+    tasks = {}
+    pending = [root_task]
+    while pending:
+        task = pending.pop()
+        if task.task_id in tasks:
+            continue
+        tasks[task.task_id] = task
+        for dependency in get_task_dependencies(task):
+            dependents.setdefault(dependency.task_id, []).append(task)
+            pending.append(dependency)
+
+    invalidated = [
+        task for task in tasks.values() if isinstance(task, TransformEntity) and task.entity_name in entity_names]
+    unknown_entities = set(entity_names) - set(task.entity_name for task in invalidated)
+    if unknown_entities:
+        raise Exception("Unknown entities: {0}".format(sorted(unknown_entities)))
+
+    downstream_tasks = {}
+    while invalidated:
+        task = invalidated.pop()
+        if task.task_id in downstream_tasks:
+            continue
+        downstream_tasks[task.task_id] = task
+        invalidated.extend(dependents.get(task.task_id, []))
+    return list(downstream_tasks.values())
+
+
+def get_output_paths(tasks):
+    from luigi.task import flatten
+
+    return sorted(set(target.path for task in tasks for target in flatten(task.output())))
+
+
+def invalidate_entities(entity_names, dry_run):
+    """
+    Deletes the outputs of the transformations of the entities and of every task downstream of them, so the next run
+    of the ETL computes again exactly those tasks.
+    """
+    from etl.jobs.util.file_manager import remove_path
+    from etl.workflow.main import PdcmEtl
+
+    downstream_tasks = get_downstream_tasks(PdcmEtl(), entity_names)
+    print("Invalidated tasks:")
+    for task in sorted(downstream_tasks, key=lambda t: t.task_id):
+        print("  ", task.task_id)
+    for path in get_output_paths(downstream_tasks):
+        if not os.path.lexists(path):
+            continue
+        if dry_run:
+            print("Would delete", path)
+        else:
+            remove_path(path)
+            print("Deleted", path)
+
+
 def get_entities_delete_option(entities):
     print("entities", entities)
     entities_delete = []
@@ -36,6 +36,9 @@ class Constants:
 
     DATA_SOURCE_COLUMN = "data_source_tmp"
 
+    # Spark configuration property with the providers a transformation has to process
+    PROVIDERS_SPARK_CONF = "spark.pdcm.providers"
+
     # Entities names
     ETHNICITY_ENTITY = "ethnicity"
     MODEL_INFORMATION_ENTITY = "model_information"
@@ -101,6 +104,7 @@ class Constants:
     TREATMENT_NAME_HARMONISATION_HELPER_ENTITY = "treatment_name_harmonisation_helper"
     TREATMENT_TYPE_HELPER_ENTITY = "treatment_type_helper"
     GENE_HELPER_ENTITY = "gene_helper"
+    ONTOLOGY_CLOSURE_HELPER_ENTITY = "ontology_closure_helper"
 
     # Search index related transformations
     MODEL_METADATA = "model_metadata"
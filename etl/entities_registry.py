@@ -46,6 +46,7 @@ import etl.jobs.transformation.gene_marker_transformer_job
 import etl.jobs.transformation.image_study_transformer_job
 import etl.jobs.transformation.model_image_transformer_job
 import etl.jobs.transformation.xenograft_model_specimen_transformer_job
+import etl.jobs.transformation.ontology_closure_helper_transformer_job
 import etl.jobs.transformation.ontology_term_diagnosis_transformer_job
 import etl.jobs.transformation.ontology_term_treatment_transformer_job
 import etl.jobs.transformation.ontology_term_regimen_transformer_job
@@ -536,6 +537,10 @@ entities = {
             "staining"
         ]
     },
+    Constants.ONTOLOGY_CLOSURE_HELPER_ENTITY: {
+        "spark_job": etl.jobs.transformation.ontology_closure_helper_transformer_job.main,
+        "expected_database_columns": []
+    },
     Constants.ONTOLOGY_TERM_DIAGNOSIS_ENTITY: {
         "spark_job": etl.jobs.transformation.ontology_term_diagnosis_transformer_job.main,
         "expected_database_columns": ["id", "term_id", "term_name", "term_url", "is_a", "ancestors"]
@@ -0,0 +1,433 @@
+import datetime
+import io
+import json
+import os
+import struct
+from decimal import Decimal
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+# Encoding of rows in the binary format of COPY:
+# https://www.postgresql.org/docs/current/sql-copy.html#id-1.9.3.55.9.4
+COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+COPY_TRAILER = struct.pack("!h", -1)
+
+BATCH_SIZE = 10000
+
+POSTGRES_EPOCH_DATE = datetime.date(2000, 1, 1)
+POSTGRES_EPOCH_DATETIME = datetime.datetime(2000, 1, 1)
+
+NUMERIC_NEGATIVE = 0x4000
+NUMERIC_NAN = 0xC000
+# Infinite numeric values are supported since Postgres 14
+NUMERIC_POSITIVE_INFINITY = 0xD000
+NUMERIC_NEGATIVE_INFINITY = 0xF000
+
+# Oids of the element types of the array columns
+ARRAY_ELEMENT_TYPES = {"_text": ("text", 25), "_varchar": ("varchar", 1043), "_int8": ("int8", 20),
+                       "_int4": ("int4", 23)}
+
+
+def to_text(value):
+    if isinstance(value, bool):
+        return str(value).lower()
+    if isinstance(value, (list, tuple)):
+        return "{" + ",".join('"{0}"'.format(element) for element in value) + "}"
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return str(value)
+
+
+def parse_array_text(value):
+    """ Parses an array written as text ({"a","b"} or {a,b}), as the csv files for the text COPY have them """
+    content = value.strip()[1:-1]
+    if not content:
+        return []
+    return [element.strip().strip('"') for element in content.split(",")]
+
+
+def encode_text(value):
+    text = to_text(value)
+    # The csv files of the text COPY write nulls as empty strings and load them as null
+    if text == "":
+        return None
+    return text.encode("utf-8")
+
+
+def encode_integer(value, struct_format):
+    if isinstance(value, str):
+        if value.strip() == "":
+            return None
+        value = Decimal(value)
+    # The text COPY fails with values like 1.5 instead of truncating them
+    if isinstance(value, (Decimal, float)) and (not Decimal(value).is_finite() or value != int(value)):
+        raise ValueError("{0} is not an integer".format(value))
+    return struct.pack(struct_format, int(value))
+
+
+def encode_boolean(value):
+    # Null booleans were loaded as false by the text COPY
+    if isinstance(value, str):
+        value = value.strip().lower() in ["true", "t", "1", "yes"]
+    return b"\x01" if value else b"\x00"
+
+
+def encode_float(value, struct_format):
+    if isinstance(value, str) and value.strip() == "":
+        return None
+    return struct.pack(struct_format, float(value))
+
+
+def encode_numeric(value):
+    """
+    Numeric values are sent as base 10000 digits, with the weight of the first digit, the sign and the number of
+    decimal digits (display scale).
+    """
+    if isinstance(value, str) and value.strip() == "":
+        return None
+    number = value if isinstance(value, Decimal) else Decimal(str(value))
+    if number.is_nan():
+        return struct.pack("!hhHh", 0, 0, NUMERIC_NAN, 0)
+    if number.is_infinite():
+        return struct.pack("!hhHh", 0, 0, NUMERIC_NEGATIVE_INFINITY if number < 0 else NUMERIC_POSITIVE_INFINITY, 0)
+    integer_part, _, fraction_part = format(number.copy_abs(), "f").partition(".")
+    integer_part = integer_part.lstrip("0")
+    integer_part = "0" * (-len(integer_part) % 4) + integer_part
+    display_scale = len(fraction_part)
+    fraction_part = fraction_part + "0" * (-len(fraction_part) % 4)
+    integer_digits = [int(integer_part[i:i + 4]) for i in range(0, len(integer_part), 4)]
+    fraction_digits = [int(fraction_part[i:i + 4]) for i in range(0, len(fraction_part), 4)]
+
+    digits = integer_digits + fraction_digits
+    weight = len(integer_digits) - 1
+    while digits and digits[0] == 0:
+        digits.pop(0)
+        weight -= 1
+    while digits and digits[-1] == 0:
+        digits.pop()
+    if not digits:
+        weight = 0
+    sign = NUMERIC_NEGATIVE if number < 0 and digits else 0
+    return struct.pack("!hhHh", len(digits), weight, sign, display_scale) + \
+        struct.pack("!{0}H".format(len(digits)), *digits)
+
+
+def encode_json(value):
+    return encode_text(value)
+
+
+def encode_jsonb(value):
+    text = encode_text(value)
+    # jsonb has a version byte before the text
+    return None if text is None else b"\x01" + text
+
+
+def encode_timestamp(value):
+    """
+    Timestamps are sent as microseconds since 2000-01-01. Values with a time zone are converted to UTC, which is how
+    timestamptz values are sent. Timestamps without time zone (and timestamptz values without it) are taken as UTC.
+    """
+    if isinstance(value, str):
+        if value.strip() == "":
+            return None
+        value = datetime.datetime.fromisoformat(value)
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    else:
+        value = datetime.datetime.combine(value, datetime.time())
+    delta = value - POSTGRES_EPOCH_DATETIME
+    return struct.pack("!q", (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds)
+
+
+def encode_date(value):
+    if isinstance(value, str):
+        if value.strip() == "":
+            return None
+        value = datetime.date.fromisoformat(value[:10])
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    return struct.pack("!i", (value - POSTGRES_EPOCH_DATE).days)
+
+
+ENCODERS = {
+    "text": encode_text,
+    "varchar": encode_text,
+    "bpchar": encode_text,
+    "int8": lambda value: encode_integer(value, "!q"),
+    "int4": lambda value: encode_integer(value, "!i"),
+    "int2": lambda value: encode_integer(value, "!h"),
+    "bool": encode_boolean,
+    "float8": lambda value: encode_float(value, "!d"),
+    "float4": lambda value: encode_float(value, "!f"),
+    "numeric": encode_numeric,
+    "json": encode_json,
+    "jsonb": encode_jsonb,
+    "timestamp": encode_timestamp,
+    "timestamptz": encode_timestamp,
+    "date": encode_date,
+}
+
+
+def encode_array(value, element_type):
+    if isinstance(value, str):
+        value = parse_array_text(value)
+    # Empty arrays were loaded as null by the text COPY
+    if not value:
+        return None
+    element_type_name, element_oid = ARRAY_ELEMENT_TYPES[element_type]
+    encode_element = ENCODERS[element_type_name]
+    elements = [None if element is None else encode_element(element) for element in value]
+    has_nulls = any(element is None for element in elements)
+    parts = [struct.pack("!iiiii", 1, 1 if has_nulls else 0, element_oid, len(elements), 1)]
+    for element in elements:
+        parts.append(struct.pack("!i", -1) if element is None else struct.pack("!i", len(element)) + element)
+    return b"".join(parts)
+
+
+def get_encoder(column_type):
+    """ Returns the function that encodes a value for a column with the given type (udt_name in the catalog) """
+    if column_type in ARRAY_ELEMENT_TYPES:
+        return lambda value: encode_array(value, column_type)
+    if column_type not in ENCODERS:
+        raise ValueError("Binary COPY does not support columns of type {0}".format(column_type))
+    return ENCODERS[column_type]
+
+
+# Arrow types whose values are encoded from their buffers, by column type, with the numpy type of the binary value
+TEXT_COLUMN_TYPES = ["text", "varchar", "bpchar"]
+FIXED_WIDTH_COLUMN_TYPES = {
+    "int8": (pa.types.is_integer, ">i8"),
+    "int4": (pa.types.is_integer, ">i4"),
+    "int2": (pa.types.is_integer, ">i2"),
+    "float8": (pa.types.is_floating, ">f8"),
+    "float4": (pa.types.is_floating, ">f4"),
+    "bool": (pa.types.is_boolean, ">u1")
+}
+
+
+def get_gather_indexes(starts, lengths):
+    """ Indexes of the bytes of the slices with the given starts and lengths, one slice after the other """
+    slice_offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - slice_offsets, lengths) + np.arange(lengths.sum(), dtype=np.int64)
+
+
+def get_string_slices(array):
+    """ Returns the offsets and the bytes of a string array """
+    array = array.cast(pa.large_string())
+    offsets = np.frombuffer(array.buffers()[1], dtype=np.int64)[array.offset:array.offset + len(array) + 1]
+    data = np.frombuffer(array.buffers()[2], dtype=np.uint8) if array.buffers()[2] else np.empty(0, np.uint8)
+    return offsets, data
+
+
+def encode_text_column(array):
+    offsets, data = get_string_slices(array)
+    lengths = np.diff(offsets)
+    # The csv files of the text COPY write nulls as empty strings and load them as null
+    lengths[(lengths == 0) | ~array.is_valid().to_numpy(zero_copy_only=False)] = -1
+    has_data = lengths > 0
+    return lengths.astype(np.int32), data[get_gather_indexes(offsets[:-1][has_data], lengths[has_data])]
+
+
+def encode_fixed_width_column(array, column_type):
+    _, binary_type = FIXED_WIDTH_COLUMN_TYPES[column_type]
+    if column_type == "bool":
+        # Null booleans were loaded as false by the text COPY
+        values = pc.fill_null(array, False).to_numpy(zero_copy_only=False)
+        return np.ones(len(values), dtype=np.int32), values.astype(binary_type).view(np.uint8)
+    is_valid = array.is_valid().to_numpy(zero_copy_only=False)
+    values = pc.fill_null(array, 0).to_numpy(zero_copy_only=False)
+    binary_values = values.astype(binary_type)
+    if np.issubdtype(values.dtype, np.integer) and not np.array_equal(binary_values, values):
+        raise ValueError("Values out of the range of {0}".format(column_type))
+    lengths = np.where(is_valid, np.dtype(binary_type).itemsize, -1).astype(np.int32)
+    return lengths, binary_values[is_valid].view(np.uint8)
+
+
+# Decimal values without exponent, which are encoded from the arrow buffers (the rest are encoded one by one)
+PLAIN_DECIMAL_PATTERN = r"^(?P<sign>[+-]?)(?P<integer>[0-9]*)\.?(?P<fraction>[0-9]*)$"
+
+
+def place_digits(grid, row_starts, array):
+    """ Writes the digits of every string of the array in the flat grid, from the given position of each row """
+    offsets, data = get_string_slices(array)
+    lengths = np.diff(offsets)
+    grid[get_gather_indexes(row_starts, lengths)] = data[get_gather_indexes(offsets[:-1], lengths)] - ord("0")
+
+
+def encode_plain_decimals(signs, integers, fractions):
+    """
+    Encodes decimal values given by their sign, integer digits and fraction digits (as string arrays). The digits of
+    all the values are written in a grid where the decimal point is in the same column, so they are grouped in base
+    10000 digits at once. Each value keeps the groups between its first and its last non zero groups.
+
+    :return: Tuple with the length of every encoded value and all the encoded values
+    """
+    integers = pc.utf8_ltrim(integers, "0")
+    integer_lengths = pc.utf8_length(integers).to_numpy(zero_copy_only=False).astype(np.int64)
+    fraction_lengths = pc.utf8_length(fractions).to_numpy(zero_copy_only=False).astype(np.int64)
+    integer_width = max(4, -(-int(integer_lengths.max(initial=0)) // 4) * 4)
+    width = integer_width + -(-int(fraction_lengths.max(initial=0)) // 4) * 4
+    row_count = len(integer_lengths)
+    grid = np.zeros(row_count * width, dtype=np.uint8)
+    place_digits(grid, np.arange(row_count) * width + integer_width - integer_lengths, integers)
+    place_digits(grid, np.arange(row_count) * width + integer_width, fractions)
+    groups = grid.reshape(row_count, width // 4, 4).astype(np.uint16) @ np.array([1000, 100, 10, 1], np.uint16)
+
+    non_zero = groups != 0
+    has_digits = non_zero.any(axis=1)
+    first = np.argmax(non_zero, axis=1)
+    last = groups.shape[1] - 1 - np.argmax(non_zero[:, ::-1], axis=1)
+    digit_counts = np.where(has_digits, last - first + 1, 0)
+    weights = np.where(has_digits, integer_width // 4 - 1 - first, 0)
+    is_negative = pc.equal(signs, "-").to_numpy(zero_copy_only=False)
+    sign_values = np.where(is_negative & has_digits, NUMERIC_NEGATIVE, 0)
+    headers = np.stack([digit_counts, weights, sign_values, fraction_lengths], axis=1).astype(">i2")
+
+    lengths = 8 + 2 * digit_counts
+    value_starts = np.cumsum(lengths) - lengths
+    output = np.empty(int(lengths.sum()), dtype=np.uint8)
+    output[value_starts[:, None] + np.arange(8)] = headers.view(np.uint8).reshape(row_count, 8)
+    digit_bytes = groups.astype(">u2").view(np.uint8).reshape(-1)
+    output[get_gather_indexes(value_starts + 8, 2 * digit_counts)] = \
+        digit_bytes[get_gather_indexes(np.arange(row_count) * width // 2 + 2 * first, 2 * digit_counts)]
+    return lengths.astype(np.int32), output
+
+
+def encode_numeric_text_column(array):
+    values = pc.utf8_trim_whitespace(array)
+    parts = pc.extract_regex(values, PLAIN_DECIMAL_PATTERN)
+    has_digits = pc.greater(pc.add(pc.utf8_length(pc.struct_field(parts, "integer")),
+                                   pc.utf8_length(pc.struct_field(parts, "fraction"))), 0)
+    is_plain = pc.fill_null(pc.and_(parts.is_valid(), has_digits), False).to_numpy(zero_copy_only=False)
+    # The csv files of the text COPY write nulls as empty strings and load them as null
+    is_null = pc.fill_null(pc.equal(values, ""), True).to_numpy(zero_copy_only=False)
+    is_other = ~is_plain & ~is_null
+
+    lengths = np.full(len(array), -1, dtype=np.int32)
+    plain_parts = parts.filter(pa.array(is_plain))
+    lengths[is_plain], plain_data = encode_plain_decimals(
+        pc.struct_field(plain_parts, "sign"), pc.struct_field(plain_parts, "integer"),
+        pc.struct_field(plain_parts, "fraction"))
+    lengths[is_other], other_data = encode_column_values(values.filter(pa.array(is_other)), encode_numeric)
+
+    # The values are put back in the order of the rows
+    value_starts = np.zeros(len(array), dtype=np.int64)
+    plain_lengths = lengths[is_plain].astype(np.int64)
+    value_starts[is_plain] = np.cumsum(plain_lengths) - plain_lengths
+    other_lengths = lengths[is_other].astype(np.int64)
+    value_starts[is_other] = len(plain_data) + np.cumsum(other_lengths) - other_lengths
+    has_data = lengths > 0
+    data = np.concatenate([plain_data, other_data])
+    return lengths, data[get_gather_indexes(value_starts[has_data], lengths[has_data].astype(np.int64))]
+
+
+def encode_column_values(array, encode):
+    """ Encodes the values of a column one by one, for the types that can not be encoded from the arrow buffers """
+    encoded_values = []
+    for value in array.to_pylist():
+        encoded = None
+        if value is not None:
+            encoded = encode(value)
+        elif encode is encode_boolean:
+            encoded = encode_boolean(False)
+        encoded_values.append(encoded)
+    lengths = np.array([-1 if encoded is None else len(encoded) for encoded in encoded_values], dtype=np.int32)
+    data = b"".join(encoded for encoded in encoded_values if encoded is not None)
+    return lengths, np.frombuffer(data, dtype=np.uint8)
+
+
+def encode_column(array, column_type):
+    """
+    Encodes the values of a column with the given type (udt_name in the catalog).
+
+    :return: Tuple with the length of the encoded value of every row (-1 for nulls) and all the encoded values
+    """
+    is_string = pa.types.is_string(array.type) or pa.types.is_large_string(array.type)
+    if column_type in TEXT_COLUMN_TYPES and is_string:
+        return encode_text_column(array)
+    # Integers have the same text in arrow and in python, so they are written from their text too
+    if column_type in TEXT_COLUMN_TYPES and pa.types.is_integer(array.type):
+        return encode_text_column(pc.cast(array, pa.string()))
+    if column_type in FIXED_WIDTH_COLUMN_TYPES and FIXED_WIDTH_COLUMN_TYPES[column_type][0](array.type):
+        return encode_fixed_width_column(array, column_type)
+    if column_type == "numeric" and is_string:
+        return encode_numeric_text_column(array)
+    # Arrow writes the shortest text that reads back as the same double, which can have fewer decimal digits than
+    # python (3 instead of 3.0). The values are the same, only the display scale may change
+    if column_type == "numeric" and (pa.types.is_integer(array.type) or pa.types.is_floating(array.type)):
+        return encode_numeric_text_column(pc.cast(array, pa.string()))
+    return encode_column_values(array, get_encoder(column_type))
+
+
+def encode_batch(batch, column_types):
+    """
+    Encodes the rows of a record batch. The columns are encoded one at a time (from the arrow buffers when possible)
+    and then the rows are assembled with numpy: each row has the number of fields and, for every field, the length of
+    its value (-1 for null) followed by the value.
+    """
+    row_count = batch.num_rows
+    encoded_columns = [encode_column(column, column_type) for column, column_type in zip(batch.columns, column_types)]
+    row_sizes = np.full(row_count, 2, dtype=np.int64)
+    for lengths, _ in encoded_columns:
+        row_sizes += 4 + np.maximum(lengths, 0)
+    row_starts = np.cumsum(row_sizes) - row_sizes
+    output = np.empty(int(row_sizes.sum()), dtype=np.uint8)
+
+    output[row_starts[:, None] + np.arange(2)] = np.frombuffer(struct.pack("!h", len(encoded_columns)), np.uint8)
+    positions = row_starts + 2
+    for lengths, data in encoded_columns:
+        output[positions[:, None] + np.arange(4)] = lengths.astype(">i4").view(np.uint8).reshape(row_count, 4)
+        has_data = lengths > 0
+        output[get_gather_indexes(positions[has_data] + 4, lengths[has_data].astype(np.int64))] = data
+        positions += 4 + np.maximum(lengths, 0)
+    return output.tobytes()
+
+
+def read_parquet_batches(parquet_path, columns, batch_size=BATCH_SIZE, files=None):
+    """ Reads the parquet folder or, if given, only some of its files (by their path relative to the folder) """
+    if files is None:
+        # Files starting with "_" or "." (like _SUCCESS) are ignored
+        dataset = ds.dataset(parquet_path, format="parquet", partitioning="hive")
+    else:
+        dataset = ds.dataset(
+            [os.path.join(parquet_path, file) for file in files], format="parquet", partitioning="hive",
+            partition_base_dir=parquet_path)
+    return dataset.to_batches(columns=columns, batch_size=batch_size)
+
+
+def generate_copy_data(batches, column_types):
+    """ Yields the binary COPY data (header, rows and trailer) of the record batches, one chunk per batch """
+    for column_type in column_types:
+        get_encoder(column_type)
+    yield COPY_HEADER
+    for batch in batches:
+        yield encode_batch(batch, column_types)
+    yield COPY_TRAILER
+
+
+class CopyDataStream(io.RawIOBase):
+    """ File-like object over the chunks of COPY data, so they are streamed to the database while they are encoded """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.buffer = memoryview(b"")
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while self.position >= len(self.buffer):
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                return 0
+            self.buffer = memoryview(chunk)
+            self.position = 0
+        size = min(len(target), len(self.buffer) - self.position)
+        target[:size] = self.buffer[self.position:self.position + size]
+        self.position += size
+        return size
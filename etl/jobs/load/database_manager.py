@@ -1,34 +1,128 @@
-import glob
+import os
 import time
 
 import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
 from etl import logger
+from etl.entities_registry import get_columns_by_entity_name
+from etl.jobs.load.binary_copy import CopyDataStream, generate_copy_data, read_parquet_batches
+from etl.jobs.load.parallel_copy import copy_chunks, get_chunks_to_copy, get_copy_chunks
+from etl.jobs.load.parallel_statements import build_indexes_and_fks_plan, build_views_plan, run_steps
+from etl.jobs.load.shadow_schema import API_SCHEMA, adapt_script
+
+# Size of the blocks in which the binary COPY data is sent to the database
+COPY_READ_SIZE = 1024 * 1024
+# Files of each table already copied by the current load
+COPY_PROGRESS_TABLE = "etl_copy_progress"
+# Times a statement is executed again if it is chosen as the victim of a deadlock with a statement running in parallel
+DEADLOCK_RETRIES = 3
+
+
+def get_database_dsn(db_host, db_port, db_name, db_user, db_password):
+    return "host='{0}' port='{1}' dbname='{2}' user='{3}' password='{4}'".format(
+        db_host, db_port, db_name, db_user, db_password
+    )
+
 
+def get_connection_options(search_path=None):
+    """ Connection options that set the schemas where the objects without schema are looked up and created """
+    if not search_path:
+        return {}
+    return {"options": "-c search_path={0}".format(",".join(search_path))}
 
-def get_database_connection(db_host, db_port, db_name, db_user, db_password):
+
+def get_database_connection(db_host, db_port, db_name, db_user, db_password, search_path=None):
     return psycopg2.connect(
-        "host='{0}' port='{1}' dbname='{2}' user='{3}' password='{4}'".format(
-            db_host, db_port, db_name, db_user, db_password
-        )
-    )
+        get_database_dsn(db_host, db_port, db_name, db_user, db_password), **get_connection_options(search_path))
 
 
 def copy_entity_to_database(
-    entity_name, data_dir_out, db_host, db_port, db_name, db_user, db_password
+    entity_name, data_dir_out, db_host, db_port, db_name, db_user, db_password, binary_copy=False, max_connections=1,
+    search_path=None
 ):
+    """
+    Loads an entity in its table. data_dir_out is the folder with the csv files of the entity or, with binary_copy,
+    the folder with its transformed parquet files. Each file is copied in its own transaction, up to max_connections
+    at the same time, and recorded in the copy progress table, so an interrupted load resumes with the files that were
+    not copied.
+    """
     logger.info("Copying data for {0}".format(entity_name))
     connection = get_database_connection(
-        db_host, db_port, db_name, db_user, db_password
+        db_host, db_port, db_name, db_user, db_password, search_path
     )
-    # The table should not have data because the task that recreates all tables should have been executed at this
-    # point, but this is an extra measure in case the task has not been executed.
+    chunks = get_copy_chunks(data_dir_out, binary_copy)
+    chunks_to_copy, restart = get_chunks_to_copy(chunks, get_copied_chunks(connection, entity_name))
     cur = connection.cursor()
-    cur.execute("TRUNCATE {0} CASCADE".format(entity_name))
-    print("Truncated " + entity_name)
-    copy_to_database(connection, entity_name, data_dir_out)
+    if restart:
+        # The table should not have data because the task that recreates all tables should have been executed at this
+        # point, but this is an extra measure in case the task has not been executed.
+        cur.execute("TRUNCATE {0} CASCADE".format(entity_name))
+        cur.execute("DELETE FROM {0} WHERE table_name = %(table_name)s".format(COPY_PROGRESS_TABLE),
+                    {"table_name": entity_name})
+        print("Truncated " + entity_name)
+    else:
+        logger.info("Resuming copy of {0}: {1} of {2} files already copied".format(
+            entity_name, len(chunks) - len(chunks_to_copy), len(chunks)))
+    columns = get_columns_by_entity_name(entity_name)
+    column_types = get_table_column_types(connection, entity_name) if binary_copy else None
     connection.commit()
     connection.close()
 
+    connection_pool = ThreadedConnectionPool(
+        1, max(1, max_connections), get_database_dsn(db_host, db_port, db_name, db_user, db_password),
+        **get_connection_options(search_path))
+
+    def copy_chunk(chunk):
+        chunk_connection = connection_pool.getconn()
+        try:
+            start = time.time()
+            with chunk_connection.cursor() as cursor:
+                if binary_copy:
+                    rows = copy_parquet_to_database(cursor, entity_name, data_dir_out, columns, column_types, [chunk])
+                else:
+                    rows = copy_to_database(cursor, entity_name, os.path.join(data_dir_out, chunk))
+                record_copied_chunk(cursor, entity_name, chunk, chunks[chunk], rows, time.time() - start)
+            chunk_connection.commit()
+            return rows
+        except Exception:
+            chunk_connection.rollback()
+            raise
+        finally:
+            connection_pool.putconn(chunk_connection)
+
+    start = time.time()
+    try:
+        rows = copy_chunks(chunks_to_copy, copy_chunk, max_connections)
+    finally:
+        connection_pool.closeall()
+    seconds = time.time() - start
+    logger.info("Copied {0}: {1} rows from {2} files in {3} seconds ({4} rows/s)".format(
+        entity_name, rows, len(chunks_to_copy), round(seconds, 4), round(rows / seconds) if seconds else rows))
+
+
+def create_copy_progress_table(cursor):
+    # Created once with the tables. The copy tasks, which run at the same time, only read and write it
+    cursor.execute("DROP TABLE IF EXISTS {0}".format(COPY_PROGRESS_TABLE))
+    cursor.execute(
+        "CREATE TABLE {0} (table_name TEXT NOT NULL, chunk TEXT NOT NULL, size BIGINT NOT NULL, "
+        "row_count BIGINT, seconds DOUBLE PRECISION, PRIMARY KEY (table_name, chunk))".format(COPY_PROGRESS_TABLE))
+
+
+def get_copied_chunks(connection, table_name):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT chunk, size FROM {0} WHERE table_name = %(table_name)s".format(COPY_PROGRESS_TABLE),
+            {"table_name": table_name})
+        return dict(cursor.fetchall())
+
+
+def record_copied_chunk(cursor, table_name, chunk, size, rows, seconds):
+    # Recorded in the transaction of the copy, so a chunk is only recorded if its rows are in the table
+    cursor.execute(
+        "INSERT INTO {0} (table_name, chunk, size, row_count, seconds) "
+        "VALUES (%(table_name)s, %(chunk)s, %(size)s, %(row_count)s, %(seconds)s)".format(COPY_PROGRESS_TABLE),
+        {"table_name": table_name, "chunk": chunk, "size": size, "row_count": rows, "seconds": seconds})
+
 
 def delete_indexes(connection):
     print("deleting indexes")
@@ -61,7 +155,94 @@ def create_fks(connection):
     print("Fkd created in {0} seconds".format(round(end - start, 4)))
 
 
-def run_updates(connection):
+def create_indexes_and_fks(
+    db_host, db_port, db_name, db_user, db_password, max_connections=1, search_path=None, tables=None
+):
+    """
+    Creates the indexes and foreign keys of cr_indexes.sql and cr_fks.sql and analyzes the tables, running the
+    statements of different tables at the same time with up to max_connections connections (see
+    build_indexes_and_fks_plan). Returns the time each statement took.
+    """
+    start = time.time()
+    print("creating indexes and fks")
+    plan = build_indexes_and_fks_plan(
+        open("scripts/cr_indexes.sql", "r").read(), open("scripts/cr_fks.sql", "r").read(), tables)
+    timings = run_plan_on_connection_pool(
+        plan, get_database_dsn(db_host, db_port, db_name, db_user, db_password), max_connections, search_path)
+    end = time.time()
+    print("Indexes and fks created in {0} seconds".format(round(end - start, 4)))
+    return timings
+
+
+def create_views_in_parallel(
+    db_host, db_port, db_name, db_user, db_password, api_schema=API_SCHEMA, max_connections=1, search_path=None
+):
+    """
+    Creates the views of views.sql, each one as soon as the views it reads from exist and with up to max_connections
+    views (like the materialized ones) being created at the same time (see build_views_plan). The statements of each
+    view run in a single transaction. Returns the time each view took.
+    """
+    start = time.time()
+    print("creating views")
+    plan = build_views_plan(adapt_script(open("scripts/views.sql", "r").read(), api_schema))
+    timings = run_plan_on_connection_pool(
+        plan, get_database_dsn(db_host, db_port, db_name, db_user, db_password), max_connections, search_path,
+        step_transactions=True)
+    end = time.time()
+    print("Views created in {0} seconds".format(round(end - start, 4)))
+    return timings
+
+
+def run_plan_on_connection_pool(plan, dsn, max_connections=1, search_path=None, step_transactions=False):
+    """
+    Runs the statements of the steps of a plan (see run_steps) with a pool of up to max_connections connections.
+    Each statement runs in its own transaction or, with step_transactions, all the statements of a step run in a
+    single transaction. Returns the time each statement (or step) took, in the order of the plan.
+    """
+    connection_pool = ThreadedConnectionPool(1, max(1, max_connections), dsn, **get_connection_options(search_path))
+
+    def run_step(step):
+        connection = connection_pool.getconn()
+        try:
+            if step_transactions:
+                seconds = execute_statements(connection, step["statements"], step["name"])
+                return [{"step": step["name"], "seconds": seconds}]
+            return [
+                {"step": step["name"], "statement": statement, "seconds": execute_statements(connection, [statement])}
+                for statement in step["statements"]]
+        finally:
+            connection_pool.putconn(connection)
+
+    try:
+        timings_by_step = run_steps(plan, run_step, max_connections)
+    finally:
+        connection_pool.closeall()
+    return [timing for step in plan for timing in timings_by_step[step["name"]]]
+
+
+def execute_statements(connection, statements, description=None):
+    """ Executes the statements in a single transaction and returns the seconds it took """
+    start = time.time()
+    for attempt in range(DEADLOCK_RETRIES + 1):
+        try:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+            connection.commit()
+            break
+        except psycopg2.errors.DeadlockDetected:
+            connection.rollback()
+            if attempt == DEADLOCK_RETRIES:
+                raise
+        except Exception:
+            connection.rollback()
+            raise
+    seconds = time.time() - start
+    print("{0} seconds: {1}".format(round(seconds, 4), description or " ".join(" ".join(statements).split())))
+    return seconds
+
+
+def run_updates(connection, api_schema=API_SCHEMA):
     start = time.time()
     print("Post-insert updates")
 
@@ -70,11 +251,11 @@ def run_updates(connection):
             # Enable autocommit to allow the function to handle its own commits
             connection.autocommit = True
 
-            cursor.execute(open("scripts/updates.sql", "r").read())
+            cursor.execute(adapt_script(open("scripts/updates.sql", "r").read(), api_schema))
 
             # Call the procedure that calculates the knowledge graphs directly. Otherwhise there are some conflicts with the transaction managments
             # and the commits in the procedure that help with the memory issues.
-            cursor.execute("call pdcm_api.update_knowledge_graphs();")
+            cursor.execute("call {0}.update_knowledge_graphs();".format(api_schema))
             
     except psycopg2.errors.InvalidTransactionTermination as e:
         print(f"Invalid transaction termination error: {e}")
@@ -86,29 +267,32 @@ def run_updates(connection):
         print("Updates applied in {0} seconds".format(round(end - start, 4)))
 
 
-def create_views(connection):
+def create_views(connection, api_schema=API_SCHEMA):
     start = time.time()
     print("creating  views")
     with connection.cursor() as cursor:
-        cursor.execute(open("scripts/views.sql", "r").read())
+        cursor.execute(adapt_script(open("scripts/views.sql", "r").read(), api_schema))
     end = time.time()
     print("Views created in {0} seconds".format(round(end - start, 4)))
 
 
-def create_data_visualization_views(connection):
+def create_data_visualization_views(connection, api_schema=API_SCHEMA):
     start = time.time()
     print("creating data visualization views")
     with connection.cursor() as cursor:
-        cursor.execute(open("scripts/data_visualization_views.sql", "r").read())
+        cursor.execute(adapt_script(open("scripts/data_visualization_views.sql", "r").read(), api_schema))
     end = time.time()
     print("Data visualization views created in {0} seconds".format(round(end - start, 4)))
 
 
-def recreate_tables(connection):
+def recreate_tables(connection, api_schema=API_SCHEMA):
+    """ Creates the tables and the api functions """
     start = time.time()
     print("Recreating tables")
     with connection.cursor() as cursor:
-        cursor.execute(open("scripts/init.sql", "r").read())
+        cursor.execute(adapt_script(open("scripts/init.sql", "r").read(), api_schema))
+        # The tables are empty again, so no file counts as copied
+        create_copy_progress_table(cursor)
     end = time.time()
     print("Tables recreated in {0} seconds".format(round(end - start, 4)))
 
@@ -119,21 +303,46 @@ def truncate_tables(connection, tables):
         cur.execute("TRUNCATE {0} CASCADE".format(table))
 
 
-def copy_to_database(connection, table_name: str, csv_path):
-    path_with_csv_files = csv_path
-    if not csv_path.endswith("/"):
-        path_with_csv_files = path_with_csv_files + "/"
-    tsv_files = glob.glob(path_with_csv_files + "*.csv")
-    cur = connection.cursor()
+def copy_to_database(cursor, table_name: str, csv_file):
+    start = time.time()
+    print("open file", csv_file)
+    with open(csv_file, "r") as f:
+        next(f)  # Skip the header row.
+        cursor.copy_from(f, table_name, sep="\t", columns=None, null='""')
+    end = time.time()
+    print("Copied {0} in {1} seconds".format(table_name, round(end - start, 4)))
+    return cursor.rowcount
 
-    for file in tsv_files:
-        start = time.time()
-        print("open file", file)
-        with open(file, "r") as f:
-            next(f)  # Skip the header row.
-            cur.copy_from(f, table_name, sep="\t", columns=None, null='""')
-        end = time.time()
-        print("Copied {0} in {1} seconds".format(table_name, round(end - start, 4)))
+
+def get_table_column_types(connection, table_name):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT column_name, udt_name FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = %(table_name)s",
+            {"table_name": table_name},
+        )
+        return dict(cursor.fetchall())
+
+
+def copy_parquet_to_database(cursor, table_name: str, parquet_path, columns, column_types, files=None):
+    """
+    Loads the columns of a parquet folder (or of some of its files) in a table with a binary COPY. The parquet files
+    are read in record batches that are encoded and streamed to the database, without intermediate files.
+
+    :param dict column_types: Type of each column of the table, as returned by get_table_column_types
+    """
+    start = time.time()
+    missing_columns = [column for column in columns if column.lower() not in column_types]
+    if missing_columns:
+        raise Exception("Columns {0} do not exist in table {1}".format(missing_columns, table_name))
+    copy_data = generate_copy_data(
+        read_parquet_batches(parquet_path, columns, files=files), [column_types[column.lower()] for column in columns])
+    cursor.copy_expert(
+        "COPY {0} ({1}) FROM STDIN WITH (FORMAT binary)".format(table_name, ", ".join(columns)),
+        CopyDataStream(copy_data), size=COPY_READ_SIZE)
+    end = time.time()
+    print("Copied {0} ({1} rows) in {2} seconds".format(table_name, cursor.rowcount, round(end - start, 4)))
+    return cursor.rowcount
 
 
 def get_all_report_types(connection):
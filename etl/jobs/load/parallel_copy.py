@@ -0,0 +1,51 @@
+import glob
+import os
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+import pyarrow.dataset as ds
+
+
+def get_copy_chunks(data_path, binary_copy=False):
+    """
+    Returns the files of an entity that are copied independently (the csv part files or, with binary_copy, the
+    parquet files) by their path relative to data_path, with their size.
+    """
+    if binary_copy:
+        files = ds.dataset(data_path, format="parquet", partitioning="hive").files
+    else:
+        files = glob.glob(os.path.join(data_path, "*.csv"))
+    return {os.path.relpath(file, data_path): os.path.getsize(file) for file in sorted(files)}
+
+
+def get_chunks_to_copy(chunks, copied_chunks):
+    """
+    Decides which chunks still need to be copied, given the ones recorded as copied by a previous (interrupted) load.
+    If nothing was copied or the copied chunks are not part of the current data (another transformation of the
+    entity), the table is loaded again from scratch.
+
+    :param dict chunks: Size of each chunk of the data to load
+    :param dict copied_chunks: Size of each chunk already copied in the table
+    :return: The chunks to copy and whether the table has to be emptied first
+    """
+    if not copied_chunks or any(chunks.get(chunk) != size for chunk, size in copied_chunks.items()):
+        return sorted(chunks), True
+    return [chunk for chunk in sorted(chunks) if chunk not in copied_chunks], False
+
+
+def copy_chunks(chunks, copy_chunk, max_connections=1):
+    """
+    Calls copy_chunk for every chunk, with up to max_connections chunks being copied at the same time (each one from
+    its own thread). If a chunk fails, the running ones are finished, the pending ones are not started and the error is
+    raised.
+
+    :return: The total of rows copied, as returned by copy_chunk
+    """
+    with ThreadPoolExecutor(max_workers=max(1, max_connections)) as executor:
+        futures = [executor.submit(copy_chunk, chunk) for chunk in chunks]
+        finished, pending = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in pending:
+            future.cancel()
+    for future in finished:
+        if future.exception() is not None:
+            raise future.exception()
+    return sum(future.result() for future in futures)
@@ -0,0 +1,224 @@
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+STATEMENT_TABLE_PATTERN = re.compile(
+    r"^\s*(?:ALTER\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:ONLY\s+)?"
+    r"|CREATE\s+(?:UNIQUE\s+)?INDEX\s+.*?\bON\s+(?:ONLY\s+)?)(\w+)",
+    re.IGNORECASE | re.DOTALL)
+REFERENCES_PATTERN = re.compile(r"\bREFERENCES\s+(\w+)", re.IGNORECASE)
+DOLLAR_QUOTE_PATTERN = re.compile(r"\$\w*\$")
+VIEW_STATEMENT_PATTERN = re.compile(
+    r"^\s*(?:DROP\s+(?:MATERIALIZED\s+)?VIEW\s+(?:IF\s+EXISTS\s+)?"
+    r"|CREATE\s+(?:OR\s+REPLACE\s+)?(?:MATERIALIZED\s+)?VIEW\s+(?:IF\s+NOT\s+EXISTS\s+)?"
+    r"|COMMENT\s+ON\s+(?:MATERIALIZED\s+)?VIEW\s+"
+    r"|REFRESH\s+MATERIALIZED\s+VIEW\s+"
+    r"|CREATE\s+(?:UNIQUE\s+)?INDEX\s+.*?\bON\s+)([\w.]+)",
+    re.IGNORECASE | re.DOTALL)
+COLUMN_COMMENT_PATTERN = re.compile(r"^\s*COMMENT\s+ON\s+COLUMN\s+([\w.]+)\.\w+", re.IGNORECASE)
+CREATE_VIEW_PATTERN = re.compile(r"^\s*CREATE\s+(?:OR\s+REPLACE\s+)?(MATERIALIZED\s+)?VIEW\b", re.IGNORECASE)
+
+INDEXES_STEP = "indexes"
+FKS_STEP = "fks"
+VIEW_STEP = "view"
+
+
+def split_statements(script):
+    """
+    Splits a script in its statements, leaving out the comments. The ";" inside strings, quoted identifiers and dollar
+    quoted bodies do not end a statement.
+    """
+    statements = []
+    current = []
+    position = 0
+    while position < len(script):
+        if script.startswith("--", position):
+            end = script.find("\n", position)
+            position = len(script) if end == -1 else end
+        elif script.startswith("/*", position):
+            end = script.find("*/", position + 2)
+            position = len(script) if end == -1 else end + 2
+        elif script[position] in "'\"":
+            end = get_quoted_end(script, position, script[position])
+            current.append(script[position:end])
+            position = end
+        elif DOLLAR_QUOTE_PATTERN.match(script, position):
+            tag = DOLLAR_QUOTE_PATTERN.match(script, position).group(0)
+            end = script.find(tag, position + len(tag))
+            end = len(script) if end == -1 else end + len(tag)
+            current.append(script[position:end])
+            position = end
+        elif script[position] == ";":
+            statements.append("".join(current).strip())
+            current = []
+            position += 1
+        else:
+            current.append(script[position])
+            position += 1
+    statements.append("".join(current).strip())
+    return [statement for statement in statements if statement]
+
+
+def get_quoted_end(script, start, quote):
+    """ Position after the quote that closes the one at start (a doubled quote is an escaped quote) """
+    position = start + 1
+    while position < len(script):
+        if script[position] == quote:
+            if script.startswith(quote * 2, position):
+                position += 2
+                continue
+            return position + 1
+        position += 1
+    return len(script)
+
+
+def get_statement_table(statement):
+    match = STATEMENT_TABLE_PATTERN.match(statement)
+    if not match:
+        raise ValueError("Can not find the table of the statement: {0}".format(statement))
+    return match.group(1).lower()
+
+
+def group_statements_by_table(statements):
+    """ Returns the statements of each table, keeping their order """
+    statements_by_table = {}
+    for statement in statements:
+        statements_by_table.setdefault(get_statement_table(statement), []).append(statement)
+    return statements_by_table
+
+
+def get_step_name(step_type, table):
+    return "{0}:{1}".format(step_type, table)
+
+
+def build_indexes_and_fks_plan(indexes_script, fks_script, tables=None):
+    """
+    Builds the steps to create the indexes and foreign keys of the scripts. Each table has a step that creates its
+    indexes (in the order of the script) and analyzes it, and a step that creates its foreign keys once the indexes of
+    the table and of the tables it references exist. The steps of different tables can run at the same time.
+
+    :param str indexes_script: Script with the primary keys and indexes
+    :param str fks_script: Script with the foreign keys
+    :param list tables: Other tables to analyze, even if they have no indexes
+    :return: List of steps with their name, table, statements and the names of the steps they depend on
+    """
+    indexes_by_table = group_statements_by_table(split_statements(indexes_script))
+    fks_by_table = group_statements_by_table(split_statements(fks_script))
+    referenced_tables_by_table = {
+        table: get_referenced_tables(statements) for table, statements in fks_by_table.items()}
+    all_tables = []
+    for table in list(indexes_by_table) + list(fks_by_table) + [table.lower() for table in tables or []] + \
+            [table for referenced_tables in referenced_tables_by_table.values() for table in referenced_tables]:
+        if table not in all_tables:
+            all_tables.append(table)
+
+    plan = []
+    for table in all_tables:
+        plan.append({
+            "name": get_step_name(INDEXES_STEP, table),
+            "table": table,
+            "statements": indexes_by_table.get(table, []) + ["ANALYZE {0}".format(table)],
+            "dependencies": []
+        })
+    for table, statements in fks_by_table.items():
+        index_tables = [table] + [name for name in referenced_tables_by_table[table] if name != table]
+        plan.append({
+            "name": get_step_name(FKS_STEP, table),
+            "table": table,
+            "statements": statements,
+            "dependencies": [get_step_name(INDEXES_STEP, name) for name in index_tables]
+        })
+    return plan
+
+
+def get_referenced_tables(statements):
+    referenced_tables = []
+    for statement in statements:
+        for referenced_table in REFERENCES_PATTERN.findall(statement):
+            if referenced_table.lower() not in referenced_tables:
+                referenced_tables.append(referenced_table.lower())
+    return referenced_tables
+
+
+def get_view_statement_object(statement):
+    match = VIEW_STATEMENT_PATTERN.match(statement) or COLUMN_COMMENT_PATTERN.match(statement)
+    if not match:
+        raise ValueError("Can not find the view of the statement: {0}".format(statement))
+    return match.group(1).lower()
+
+
+def references_object(statement, object_name):
+    # Schema qualified names are only referenced with their schema, and the rest without any
+    return re.search(r"(?<![\w.\"]){0}\b(?!\.\w)".format(re.escape(object_name)), statement, re.IGNORECASE) is not None
+
+
+def build_views_plan(script):
+    """
+    Builds the steps to create the views of the script. Each view (or materialized view) has a step with all its
+    statements (drop, create, comments and indexes), which depends on the steps of the views its definition reads
+    from. The rest of the views can be created at the same time.
+
+    :return: List of steps with their name, view, statements, whether the view is materialized and the names of the
+    steps they depend on
+    """
+    steps_by_view = {}
+    for statement in split_statements(script):
+        view = get_view_statement_object(statement)
+        step = steps_by_view.setdefault(view, {
+            "name": get_step_name(VIEW_STEP, view),
+            "view": view,
+            "statements": [],
+            "materialized": False,
+            "dependencies": []
+        })
+        step["statements"].append(statement)
+        create_match = CREATE_VIEW_PATTERN.match(statement)
+        if create_match:
+            step["materialized"] = create_match.group(1) is not None
+
+    for view, step in steps_by_view.items():
+        definitions = [statement for statement in step["statements"] if CREATE_VIEW_PATTERN.match(statement)]
+        for other_view, other_step in steps_by_view.items():
+            if other_view != view and any(references_object(definition, other_view) for definition in definitions):
+                step["dependencies"].append(other_step["name"])
+    return list(steps_by_view.values())
+
+
+def run_steps(steps, run_step, max_concurrent_steps=1):
+    """
+    Calls run_step for every step as soon as all the steps it depends on are finished, with up to
+    max_concurrent_steps steps running at the same time (each one from its own thread). If a step fails, the running
+    ones are finished, no more are started and the error is raised.
+
+    :param list steps: Steps with a name and the names of the steps they depend on
+    :return: The results of run_step by step name
+    """
+    max_concurrent_steps = max(1, max_concurrent_steps)
+    pending = list(steps)
+    names = {step["name"] for step in steps}
+    unknown = [dependency for step in steps for dependency in step["dependencies"] if dependency not in names]
+    if unknown:
+        raise ValueError("Steps depend on unknown steps: {0}".format(unknown))
+    finished = {}
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_concurrent_steps) as executor:
+        while pending or running:
+            for step in list(pending):
+                if len(running) >= max_concurrent_steps:
+                    break
+                if all(dependency in finished for dependency in step["dependencies"]):
+                    pending.remove(step)
+                    running[executor.submit(run_step, step)] = step
+            if not running:
+                raise RuntimeError("Steps with circular dependencies: {0}".format([step["name"] for step in pending]))
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            errors = []
+            for future in done:
+                step = running.pop(future)
+                if future.exception() is not None:
+                    errors.append(future.exception())
+                else:
+                    finished[step["name"]] = future.result()
+            if errors:
+                wait(running)
+                raise errors[0]
+    return finished
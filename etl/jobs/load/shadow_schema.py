@@ -0,0 +1,175 @@
+import re
+
+# Schema with the tables of the release and schema with the objects exposed to the api (views and functions). The
+# scripts refer to the api schema by name and to the tables without schema
+DATA_SCHEMA = "public"
+API_SCHEMA = "pdcm_api"
+SHADOW_SUFFIX = "_shadow"
+PREVIOUS_SUFFIX = "_previous"
+
+
+def get_shadow_schema(schema):
+    return schema + SHADOW_SUFFIX
+
+
+def get_previous_schema(schema):
+    return schema + PREVIOUS_SUFFIX
+
+
+def get_load_schemas(shadow_schema_load=False):
+    """ Returns the data and api schemas the release is loaded in """
+    if shadow_schema_load:
+        return get_shadow_schema(DATA_SCHEMA), get_shadow_schema(API_SCHEMA)
+    return DATA_SCHEMA, API_SCHEMA
+
+
+def rename_schema_in_script(script, schema, new_schema):
+    # The word boundaries leave alone longer names (pdcm_api_shadow is not renamed when renaming pdcm_api)
+    return re.sub(r"\b{0}\b".format(re.escape(schema)), new_schema, script)
+
+
+def adapt_script(script, api_schema=API_SCHEMA):
+    """ Adapts a script written for the api schema to create its objects in api_schema """
+    if api_schema != API_SCHEMA:
+        script = rename_schema_in_script(script, API_SCHEMA, api_schema)
+    return script
+
+
+def quote_role(role):
+    # Grants without a grantee role are granted to PUBLIC
+    if role is None:
+        return "PUBLIC"
+    return '"{0}"'.format(role.replace('"', '""'))
+
+
+def build_grant_statements(object_type, object_name, privileges):
+    """
+    Builds the GRANT statements that give to the grantees the privileges they have on an object.
+
+    :param str object_type: Type of object in the GRANT statement (SCHEMA, TABLE or SEQUENCE)
+    :param str object_name: Name of the object
+    :param list privileges: Tuples (grantee role or None for PUBLIC, privilege, whether it can be granted to others)
+    """
+    return ["GRANT {0} ON {1} {2} TO {3}{4}".format(
+        privilege, object_type, object_name, quote_role(grantee), " WITH GRANT OPTION" if is_grantable else "")
+        for grantee, privilege, is_grantable in privileges]
+
+
+DEFAULT_PRIVILEGES_OBJECT_TYPES = {"r": "TABLES", "S": "SEQUENCES", "f": "FUNCTIONS", "T": "TYPES"}
+
+
+def build_default_privileges_statements(schema, default_privileges):
+    """
+    Builds the statements that give the default privileges to the objects created later in the schema.
+
+    :param list default_privileges: Tuples (role creating the objects, pg_default_acl object type, grantee role or
+    None for PUBLIC, privilege, whether it can be granted to others)
+    """
+    return ["ALTER DEFAULT PRIVILEGES FOR ROLE {0} IN SCHEMA {1} GRANT {2} ON {3} TO {4}{5}".format(
+        quote_role(role), schema, privilege, DEFAULT_PRIVILEGES_OBJECT_TYPES[object_type], quote_role(grantee),
+        " WITH GRANT OPTION" if is_grantable else "")
+        for role, object_type, grantee, privilege, is_grantable in default_privileges
+        if object_type in DEFAULT_PRIVILEGES_OBJECT_TYPES]
+
+
+def get_privilege_statements(connection, schema, target_schema):
+    """
+    Builds the statements that give on target_schema (and on the relations it has with the same names) the privileges
+    granted on schema, including its default privileges. The privileges the owners have are not included.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT r.rolname, a.privilege_type, a.is_grantable FROM pg_namespace n "
+            "CROSS JOIN LATERAL aclexplode(n.nspacl) a LEFT JOIN pg_roles r ON r.oid = a.grantee "
+            "WHERE n.nspname = %(schema)s AND a.grantee <> n.nspowner",
+            {"schema": schema})
+        statements = build_grant_statements("SCHEMA", target_schema, cursor.fetchall())
+
+        cursor.execute(
+            "SELECT pg_get_userbyid(d.defaclrole), d.defaclobjtype, r.rolname, a.privilege_type, a.is_grantable "
+            "FROM pg_default_acl d JOIN pg_namespace n ON n.oid = d.defaclnamespace "
+            "CROSS JOIN LATERAL aclexplode(d.defaclacl) a LEFT JOIN pg_roles r ON r.oid = a.grantee "
+            "WHERE n.nspname = %(schema)s",
+            {"schema": schema})
+        statements += build_default_privileges_statements(target_schema, cursor.fetchall())
+
+        cursor.execute(
+            "SELECT c.relname, c.relkind, r.rolname, a.privilege_type, a.is_grantable FROM pg_class c "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "JOIN pg_class t ON t.relname = c.relname AND t.relnamespace = %(target_schema)s::regnamespace "
+            "CROSS JOIN LATERAL aclexplode(c.relacl) a LEFT JOIN pg_roles r ON r.oid = a.grantee "
+            "WHERE n.nspname = %(schema)s AND a.grantee <> c.relowner ORDER BY c.relname",
+            {"schema": schema, "target_schema": target_schema})
+        for relation, relation_kind, grantee, privilege, is_grantable in cursor.fetchall():
+            statements += build_grant_statements(
+                "SEQUENCE" if relation_kind == "S" else "TABLE", "{0}.{1}".format(target_schema, relation),
+                [(grantee, privilege, is_grantable)])
+    return statements
+
+
+def copy_privileges(connection, schema, target_schema):
+    """ Gives on target_schema the privileges granted on schema (see get_privilege_statements) """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_namespace WHERE nspname = %(schema)s", {"schema": schema})
+        if not cursor.fetchone():
+            return
+        for statement in get_privilege_statements(connection, schema, target_schema):
+            cursor.execute(statement)
+
+
+def create_shadow_schemas(connection):
+    """
+    Creates empty shadow schemas, dropping the ones left by a previous load. They get the privileges of the live
+    schemas, so the objects created in them get the same default privileges.
+    """
+    with connection.cursor() as cursor:
+        for schema in [DATA_SCHEMA, API_SCHEMA]:
+            cursor.execute("DROP SCHEMA IF EXISTS {0} CASCADE".format(get_shadow_schema(schema)))
+            cursor.execute("CREATE SCHEMA {0}".format(get_shadow_schema(schema)))
+            copy_privileges(connection, schema, get_shadow_schema(schema))
+    print("Created shadow schemas")
+
+
+def validate_schema(connection, schema, copy_progress_table):
+    """
+    Checks that every table of the schema has the rows that were copied to it. Returns the errors found.
+    """
+    errors = []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT table_name, sum(row_count) FROM {0}.{1} GROUP BY table_name".format(schema, copy_progress_table))
+        for table_name, copied_rows in cursor.fetchall():
+            cursor.execute("SELECT count(*) FROM {0}.{1}".format(schema, table_name))
+            rows = cursor.fetchone()[0]
+            if rows != copied_rows:
+                errors.append("Table {0} has {1} rows but {2} were copied".format(table_name, rows, copied_rows))
+    return errors
+
+
+def swap_schemas(connection):
+    """
+    Publishes the shadow schemas in a single transaction: the current schemas are renamed to *_previous (replacing
+    the ones of the release before, which are dropped) and the shadow ones take their names. The shadow schemas and
+    their relations first get the privileges granted on the current ones, so the roles using the api keep their
+    access. Views keep referencing the same tables, but the functions refer to other functions by name, so the ones
+    that use the shadow names are created again with the published names.
+    """
+    with connection.cursor() as cursor:
+        for schema in [DATA_SCHEMA, API_SCHEMA]:
+            copy_privileges(connection, schema, get_shadow_schema(schema))
+            cursor.execute("DROP SCHEMA IF EXISTS {0} CASCADE".format(get_previous_schema(schema)))
+            cursor.execute("SELECT 1 FROM pg_namespace WHERE nspname = %(schema)s", {"schema": schema})
+            if cursor.fetchone():
+                cursor.execute("ALTER SCHEMA {0} RENAME TO {1}".format(schema, get_previous_schema(schema)))
+            cursor.execute("ALTER SCHEMA {0} RENAME TO {1}".format(get_shadow_schema(schema), schema))
+
+        cursor.execute(
+            "SELECT pg_get_functiondef(p.oid) FROM pg_proc p JOIN pg_namespace n ON n.oid = p.pronamespace "
+            "WHERE n.nspname IN (%(data_schema)s, %(api_schema)s) AND p.prosrc LIKE %(pattern)s",
+            {"data_schema": DATA_SCHEMA, "api_schema": API_SCHEMA, "pattern": "%" + SHADOW_SUFFIX + "%"})
+        for (definition,) in cursor.fetchall():
+            for schema in [DATA_SCHEMA, API_SCHEMA]:
+                definition = rename_schema_in_script(definition, get_shadow_schema(schema), schema)
+            cursor.execute(definition)
+    connection.commit()
+    print("Published shadow schemas")
@@ -5,6 +5,7 @@ from pyspark.sql.functions import col, trim
 
 from etl.constants import Constants
 from etl.jobs.util.cleaner import trim_all
+from etl.jobs.util.dataframe_functions import read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 
@@ -20,7 +21,7 @@ def main(argv):
     output_path = argv[3]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_sharing_df = spark.read.parquet(raw_sharing_parquet_path)
+    raw_sharing_df = read_raw_parquet(spark, raw_sharing_parquet_path)
 
     accessibility_group_df = transform_accessibility_group(raw_sharing_df)
     accessibility_group_df.write.mode("overwrite").parquet(output_path)
@@ -4,6 +4,7 @@ from pyspark.sql import DataFrame, SparkSession
 
 from etl.jobs.transformation.links_generation.molecular_data_links_builder import \
     add_links_in_molecular_data_table
+from etl.jobs.util.transformation_outputs import read_transformation_output
 
 
 def main(argv):
@@ -24,7 +25,7 @@ def main(argv):
     output_path = argv[5]
 
     spark = SparkSession.builder.getOrCreate()
-    initial_biomarkers_df = spark.read.parquet(initial_biomarkers_parquet_path)
+    initial_biomarkers_df = read_transformation_output(spark, initial_biomarkers_parquet_path)
     raw_resources_df = spark.read.parquet(raw_external_resources_parquet_path)
     raw_resources_data_df = spark.read.parquet(raw_external_resources_data_parquet_path)
     gene_helper_df = spark.read.parquet(gene_helper_parquet_path)
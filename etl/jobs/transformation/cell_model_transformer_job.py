@@ -3,6 +3,7 @@ import sys
 from pyspark.sql import DataFrame, SparkSession
 
 from etl.constants import Constants
+from etl.jobs.util.dataframe_functions import read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 
@@ -19,7 +20,7 @@ def main(argv):
     output_path = argv[3]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_cell_model_df = spark.read.parquet(raw_cell_model_parquet_path)
+    raw_cell_model_df = read_raw_parquet(spark, raw_cell_model_parquet_path)
     model_df = spark.read.parquet(model_parquet_path)
     cell_model_df = transform_cell_model(raw_cell_model_df, model_df)
     cell_model_df.write.mode("overwrite").parquet(output_path)
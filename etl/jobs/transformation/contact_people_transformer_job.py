@@ -4,6 +4,7 @@ from pyspark.sql import DataFrame, SparkSession
 
 from etl.constants import Constants
 from etl.jobs.util.cleaner import trim_all
+from etl.jobs.util.dataframe_functions import read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 
@@ -18,7 +19,7 @@ def main(argv):
     output_path = argv[2]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_sharing_df = spark.read.parquet(raw_sharing_parquet_path)
+    raw_sharing_df = read_raw_parquet(spark, raw_sharing_parquet_path)
     contact_people_df = transform_contact_people(raw_sharing_df)
     contact_people_df.write.mode("overwrite").parquet(output_path)
 
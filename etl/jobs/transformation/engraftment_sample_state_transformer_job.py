@@ -2,6 +2,7 @@ import sys
 
 from pyspark.sql import DataFrame, SparkSession
 from etl.jobs.util.cleaner import init_cap_and_trim_all
+from etl.jobs.util.dataframe_functions import read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 
@@ -16,7 +17,7 @@ def main(argv):
     output_path = argv[2]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_model_df = spark.read.parquet(raw_model_parquet_path)
+    raw_model_df = read_raw_parquet(spark, raw_model_parquet_path)
     engraftment_sample_state_df = transform_engraftment_sample_state(raw_model_df)
     engraftment_sample_state_df.write.mode("overwrite").parquet(output_path)
 
@@ -4,6 +4,7 @@ from pyspark.sql import DataFrame, SparkSession, Column
 from pyspark.sql.functions import trim, initcap
 
 from etl.jobs.util.cleaner import init_cap_and_trim_all
+from etl.jobs.util.dataframe_functions import read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 def main(argv):
@@ -17,7 +18,7 @@ def main(argv):
     output_path = argv[2]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_model_df = spark.read.parquet(raw_model_parquet_path)
+    raw_model_df = read_raw_parquet(spark, raw_model_parquet_path)
     engraftment_site_df = transform_engraftment_site(raw_model_df)
     engraftment_site_df.write.mode("overwrite").parquet(output_path)
 
@@ -4,6 +4,7 @@ from pyspark.sql import DataFrame, SparkSession, Column
 from pyspark.sql.functions import trim, initcap
 
 from etl.jobs.util.cleaner import init_cap_and_trim_all
+from etl.jobs.util.dataframe_functions import read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 
@@ -18,7 +19,7 @@ def main(argv):
     output_path = argv[2]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_patient_df = spark.read.parquet(raw_patient_parquet_path)
+    raw_patient_df = read_raw_parquet(spark, raw_patient_parquet_path)
     ethnicity_df = transform_ethnicity(raw_patient_df)
     ethnicity_df.write.mode("overwrite").parquet(output_path)
 
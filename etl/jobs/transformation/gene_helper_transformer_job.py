@@ -4,6 +4,7 @@ from pyspark.sql import DataFrame, SparkSession
 from pyspark.sql.functions import lit
 
 from etl.jobs.transformation.harmonisation.markers_harmonisation import harmonise_mutation_marker_symbols
+from etl.jobs.util.dataframe_functions import read_raw_parquet
 
 
 def main(argv):
@@ -27,10 +28,10 @@ def main(argv):
     output_path = argv[6]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_cna_df = spark.read.parquet(raw_cna_parquet_path)
-    raw_biomarkers_df = spark.read.parquet(raw_biomarkers_parquet_path)
-    raw_expression_df = spark.read.parquet(raw_expression_parquet_path)
-    raw_mutation_df = spark.read.parquet(raw_mutation_parquet_path)
+    raw_cna_df = read_raw_parquet(spark, raw_cna_parquet_path)
+    raw_biomarkers_df = read_raw_parquet(spark, raw_biomarkers_parquet_path)
+    raw_expression_df = read_raw_parquet(spark, raw_expression_parquet_path)
+    raw_mutation_df = read_raw_parquet(spark, raw_mutation_parquet_path)
 
     gene_helper_df = transform_gene_helper(
         raw_cna_df,
@@ -1,6 +1,6 @@
 from typing import Tuple
 
-from pyspark.sql.functions import col, lit, round
+from pyspark.sql.functions import col, lit
 from pyspark.sql import DataFrame, SparkSession
 
 
@@ -156,8 +156,6 @@ def match_ensembl_gene_id(molecular_data_df: DataFrame, gene_markers_df: DataFra
 
 def match_ncbi_gene_id(molecular_data_df: DataFrame, gene_markers_df: DataFrame) -> Tuple[DataFrame, DataFrame]:
     molecular_data_df = molecular_data_df.drop("gene_marker_id", "harmonisation_result")
-    molecular_data_df = molecular_data_df.withColumn(
-        "ncbi_gene_id", round(molecular_data_df["ncbi_gene_id"]).cast('integer'))
     gene_markers_df = gene_markers_df.select("gene_marker_id", "ncbi_gene_id")
     gene_markers_df = gene_markers_df.withColumn("harmonisation_result", lit("ncbi_gene_id"))
 
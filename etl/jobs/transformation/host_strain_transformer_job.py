@@ -5,6 +5,7 @@ from pyspark.sql.window import Window
 from pyspark.sql.functions import col, row_number
 
 from etl.jobs.util.cleaner import trim_all, lower_and_trim_all
+from etl.jobs.util.dataframe_functions import read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 
@@ -19,7 +20,7 @@ def main(argv):
     output_path = argv[2]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_model_df = spark.read.parquet(raw_model_parquet_path)
+    raw_model_df = read_raw_parquet(spark, raw_model_parquet_path)
     host_strain_df = transform_host_strain(raw_model_df)
     host_strain_df.write.mode("overwrite").parquet(output_path)
 
@@ -2,6 +2,7 @@ import sys
 
 from pyspark.sql import DataFrame, SparkSession
 
+from etl.jobs.util.dataframe_functions import read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 
@@ -16,7 +17,7 @@ def main(argv):
     output_path = argv[2]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_image_study_df = spark.read.parquet(image_study_parquet_path)
+    raw_image_study_df = read_raw_parquet(spark, image_study_parquet_path)
 
     image_study_df = transform_image_study(raw_image_study_df)
     image_study_df.write.mode("overwrite").parquet(output_path)
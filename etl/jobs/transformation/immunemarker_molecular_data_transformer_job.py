@@ -4,6 +4,7 @@ from pyspark.sql import DataFrame, SparkSession
 from pyspark.sql.functions import lit
 
 from etl.constants import Constants
+from etl.jobs.util.dataframe_functions import read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 from etl.jobs.util.molecular_characterization_fk_assigner import set_fk_molecular_characterization
 
@@ -22,7 +23,7 @@ def main(argv):
     output_path = argv[3]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_immunemarkers_df = spark.read.parquet(raw_immunemarkers_parquet_path)
+    raw_immunemarkers_df = read_raw_parquet(spark, raw_immunemarkers_parquet_path)
     molecular_characterization_df = spark.read.parquet(molecular_characterization_parquet_path)
 
     immunemarkers_molecular_data_df = transform_immunemarkers_molecular_data(
@@ -4,8 +4,10 @@ from pyspark.sql import DataFrame, SparkSession
 from pyspark.sql.functions import lit
 
 from etl.constants import Constants
+from etl.jobs.util.dataframe_functions import read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 from etl.jobs.util.molecular_characterization_fk_assigner import set_fk_molecular_characterization
+from etl.jobs.util.transformation_outputs import write_transformation_output
 
 
 def main(argv):
@@ -25,14 +27,14 @@ def main(argv):
     output_path = argv[3]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_biomarkers_df = spark.read.parquet(raw_biomarkers_parquet_path)
+    raw_biomarkers_df = read_raw_parquet(spark, raw_biomarkers_parquet_path)
     molecular_characterization_df = spark.read.parquet(molecular_characterization_parquet_path)
 
     initial_biomarkers_molecular_data_df = transform_initial_biomarkers_molecular_data(
         raw_biomarkers_df,
         molecular_characterization_df)
 
-    initial_biomarkers_molecular_data_df.write.mode("overwrite").parquet(output_path)
+    write_transformation_output(initial_biomarkers_molecular_data_df, output_path)
 
 
 def transform_initial_biomarkers_molecular_data(
@@ -3,8 +3,10 @@ import sys
 from pyspark.sql import DataFrame, SparkSession
 
 from etl.constants import Constants
+from etl.jobs.util.dataframe_functions import read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 from etl.jobs.util.molecular_characterization_fk_assigner import set_fk_molecular_characterization
+from etl.jobs.util.transformation_outputs import write_transformation_output
 
 
 def main(argv):
@@ -25,12 +27,12 @@ def main(argv):
 
     spark = SparkSession.builder.getOrCreate()
     molecular_characterization_df = spark.read.parquet(molecular_characterization_path)
-    raw_expression_df = spark.read.parquet(raw_expression_parquet_path)
+    raw_expression_df = read_raw_parquet(spark, raw_expression_parquet_path)
 
     initial_expression_molecular_data_df = transform_initial_expression_molecular_data(
         raw_expression_df,
         molecular_characterization_df)
-    initial_expression_molecular_data_df.write.mode("overwrite").parquet(output_path)
+    write_transformation_output(initial_expression_molecular_data_df, output_path)
 
 
 def transform_initial_expression_molecular_data(
@@ -5,6 +5,7 @@ from pyspark.sql.functions import col, lit, when
 
 from etl.constants import Constants
 from etl.jobs.util.cleaner import lower_and_trim_all
+from etl.jobs.util.dataframe_functions import read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 
@@ -26,9 +27,9 @@ def main(argv):
     output_path = argv[4]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_model_df = spark.read.parquet(raw_model_parquet_path)
-    raw_cell_model_df = spark.read.parquet(raw_cell_model_parquet_path)
-    raw_sharing_df = spark.read.parquet(raw_sharing_parquet_path)
+    raw_model_df = read_raw_parquet(spark, raw_model_parquet_path)
+    raw_cell_model_df = read_raw_parquet(spark, raw_cell_model_parquet_path)
+    raw_sharing_df = read_raw_parquet(spark, raw_sharing_parquet_path)
 
     model_df = transform_model(
         raw_model_df,
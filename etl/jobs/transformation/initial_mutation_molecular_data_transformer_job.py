@@ -6,7 +6,9 @@ from etl.constants import Constants
 from etl.jobs.transformation.links_generation.molecular_data_links_builder import  \
     add_links_in_molecular_data_table
 from etl.jobs.util.id_assigner import add_id
+from etl.jobs.util.dataframe_functions import read_raw_parquet
 from etl.jobs.util.molecular_characterization_fk_assigner import set_fk_molecular_characterization
+from etl.jobs.util.transformation_outputs import write_transformation_output
 
 
 def main(argv):
@@ -25,13 +27,13 @@ def main(argv):
     output_path = argv[3]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_mutation_df = spark.read.parquet(raw_mutation_parquet_path)
+    raw_mutation_df = read_raw_parquet(spark, raw_mutation_parquet_path)
     molecular_characterization_df = spark.read.parquet(molecular_characterization_parquet_path)
 
     mutation_measurement_data_df = transform_initial_mutation_measurement_data(
         raw_mutation_df,
         molecular_characterization_df)
-    mutation_measurement_data_df.write.mode("overwrite").parquet(output_path)
+    write_transformation_output(mutation_measurement_data_df, output_path)
 
 
 def transform_initial_mutation_measurement_data(
@@ -154,14 +154,15 @@ def find_open_cravat_links(molecular_data_df: DataFrame, resource_definition):
     # We also need to check for the existence of the columns that are going to be used to create the link:
     # chromosome, seq_start_position, alt_allele, ref_allele
     data_df = data_df.where(
-        "nvl(chromosome, '') != '' AND nvl(seq_start_position, '') != ''  AND "
+        "nvl(chromosome, '') != '' AND seq_start_position IS NOT NULL AND "
         "nvl(alt_allele, '') != '' AND nvl(ref_allele, '') != ''")
 
     data_links_df = data_df.withColumn("link", lit(resource_definition["link_template"]))
 
     data_links_df = data_links_df.withColumn("link", expr("regexp_replace(link, 'ALT_BASE', alt_allele)"))
     data_links_df = data_links_df.withColumn("link", expr("regexp_replace(link, 'CHROM', chromosome)"))
-    data_links_df = data_links_df.withColumn("link", expr("regexp_replace(link, 'POSITION', seq_start_position)"))
+    data_links_df = data_links_df.withColumn(
+        "link", expr("regexp_replace(link, 'POSITION', cast(seq_start_position as string))"))
     data_links_df = data_links_df.withColumn("link", expr("regexp_replace(link, 'REF_BASE', ref_allele)"))
 
     return data_links_df.select("id", "resource", "column", "link")
@@ -4,6 +4,7 @@ from pyspark.sql import DataFrame, SparkSession
 
 from etl.constants import Constants
 from etl.jobs.util.cleaner import null_values_to_empty_string
+from etl.jobs.util.dataframe_functions import read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 
@@ -21,7 +22,7 @@ def main(argv):
     output_path = argv[3]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_model_image_df = spark.read.parquet(raw_model_image_parquet_path)
+    raw_model_image_df = read_raw_parquet(spark, raw_model_image_parquet_path)
     model_df = spark.read.parquet(model_parquet_path)
 
     model_image_df = transform_model_image(raw_model_image_df, model_df)
@@ -7,6 +7,7 @@ from pyspark.sql.functions import lit, col, concat, concat_ws, collect_list, col
 from etl.constants import Constants
 from etl.jobs.transformation.links_generation.resources_per_model_util import add_raw_data_resources
 from etl.jobs.util.cleaner import lower_and_trim_all
+from etl.jobs.util.transformation_outputs import read_transformation_output, write_transformation_output
 
 
 def main(argv):
@@ -34,11 +35,11 @@ def main(argv):
 
     spark = SparkSession.builder.getOrCreate()
     model_df = spark.read.parquet(model_parquet_path)
-    search_index_patient_sample_df = spark.read.parquet(search_index_patient_sample_parquet_path)
+    search_index_patient_sample_df = read_transformation_output(spark, search_index_patient_sample_parquet_path)
     xenograft_model_specimen_df = spark.read.parquet(xenograft_model_specimen_parquet_path)
     quality_assurance_df = spark.read.parquet(quality_assurance_parquet_path)
     model_image_df = spark.read.parquet(model_image_parquet_path)
-    treatment_aggregator_helper_df = spark.read.parquet(treatment_aggregator_helper_parquet_path)
+    treatment_aggregator_helper_df = read_transformation_output(spark, treatment_aggregator_helper_parquet_path)
     search_index_molecular_char_df = spark.read.parquet(search_index_molecular_characterization_parquet_path)
 
     model_metadata = transform_model_metadata(
@@ -51,7 +52,7 @@ def main(argv):
         search_index_molecular_char_df
     )
 
-    model_metadata.write.mode("overwrite").parquet(output_path)
+    write_transformation_output(model_metadata, output_path)
 
 
 def transform_model_metadata(
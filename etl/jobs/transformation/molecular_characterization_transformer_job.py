@@ -8,7 +8,7 @@ from etl.constants import Constants
 from etl.jobs.transformation.links_generation.molecular_characterization_links_builder import \
     add_links_in_molecular_characterization_table
 from etl.jobs.util.cleaner import lower_and_trim_all, trim_all
-from etl.jobs.util.dataframe_functions import transform_to_fk
+from etl.jobs.util.dataframe_functions import transform_to_fk, read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 
@@ -27,7 +27,7 @@ def main(argv):
     output_path = argv[8]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_molchar_metadata_sample_df = spark.read.parquet(raw_molchar_metadata_sample_parquet_path)
+    raw_molchar_metadata_sample_df = read_raw_parquet(spark, raw_molchar_metadata_sample_parquet_path)
     platform_df = spark.read.parquet(platform_parquet_path)
     patient_sample_df = spark.read.parquet(patient_sample_path)
     xenograft_sample_df = spark.read.parquet(xenograft_sample_path)
@@ -0,0 +1,72 @@
+import sys
+
+import pyarrow as pa
+from pyspark.sql import DataFrame, SparkSession
+
+from etl.jobs.util.file_manager import get_output_filesystem, write_rows_to_parquet, write_success_marker
+from etl.jobs.util.graph_builder import (
+    ONTOLOGIES,
+    build_compact_graph,
+    compute_branch_ancestors,
+    get_branch_nodes,
+    get_updated_term_names
+)
+from etl.jobs.util.ontology_closure import NODES_TABLE, TERMS_TABLE, get_table_path
+
+# Number of terms kept in memory before they are written to the terms table as a record batch
+TERMS_BY_BATCH = 10000
+
+TERMS_SCHEMA = pa.schema([
+    ("ontology_id", pa.string()),
+    ("term_id", pa.string()),
+    ("ancestors", pa.string())
+])
+
+
+def main(argv):
+    """
+    Creates the ontology closure artifact used by the ontology_term transformations. It is a folder with these
+    parquet tables:
+        nodes: the raw ontology terms
+        terms: ontology_id, term_id, ancestors (names of the ancestors in the branch separated by "|")
+    :param list argv: the list elements should be:
+                    [1]: Parquet file path with the ontologies read from the NCIt obo file
+                    [2]: Output file
+    """
+    raw_ontology_term_parquet_path = argv[1]
+    output_path = argv[2]
+
+    spark = SparkSession.builder.getOrCreate()
+    raw_ontology_term_df = spark.read.parquet(raw_ontology_term_parquet_path)
+    write_ontology_closure(spark, raw_ontology_term_df, output_path)
+    # Each table has its own marker. The one of the artifact is written once all the tables are there
+    write_success_marker(output_path)
+
+
+def write_ontology_closure(spark, raw_ontology_term_df: DataFrame, output_path):
+    raw_ontology_term_df.write.mode("overwrite").parquet(get_table_path(output_path, NODES_TABLE))
+    write_rows_to_parquet(
+        get_ontology_terms(raw_ontology_term_df), TERMS_SCHEMA, get_output_filesystem(spark),
+        get_table_path(output_path, TERMS_TABLE), TERMS_BY_BATCH)
+
+
+def get_ontology_terms(raw_ontology_term_df: DataFrame):
+    """
+    Yields the terms of each branch of the ontology with the names of their ancestors in the branch. The rows are
+    fetched one partition at a time to build the graph, so only the graph is kept in the driver.
+    """
+    rows = raw_ontology_term_df.select("term_id", "term_name", "is_a").toLocalIterator()
+    graph = build_compact_graph(rows)
+    get_updated_term_name = get_updated_term_names(graph)
+    for ontology in ONTOLOGIES:
+        ontology_id = ontology["id"]
+        branch_nodes = get_branch_nodes(graph, ontology_id)
+        ancestors = compute_branch_ancestors(graph, branch_nodes)
+        for node in branch_nodes:
+            # Ancestors are sorted by node id (the order in which terms first appear in the file) so the output is stable
+            ancestor_names = [get_updated_term_name(ancestor) for ancestor in sorted(ancestors[node])]
+            yield {"ontology_id": ontology_id, "term_id": graph.term_ids[node], "ancestors": "|".join(ancestor_names)}
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -1,17 +1,11 @@
 import sys
 
-import networkx as nx
 from pyspark.sql import DataFrame, SparkSession
 from pyspark.sql.types import StringType
 from pyspark.sql.functions import col, udf
-from etl.jobs.util.graph_builder import (
-    add_node_to_graph,
-    create_term_ancestors,
-    extract_graph_by_ontology_id,
-    get_term_ids_from_graph
-)
 from etl.jobs.util.id_assigner import add_id
 from etl.jobs.util.cleaner import remove_all_trailing_whitespaces
+from etl.jobs.util.ontology_closure import read_ontology_terms
 
 remove_all_trailing_whitespaces_udf = udf(remove_all_trailing_whitespaces, StringType())
 
@@ -20,42 +14,25 @@ def main(argv):
     """
     Creates a parquet file with all the ontology terms from NCIt (obo file) which are descendants of Cancer diagnosis terms.
     :param list argv: the list elements should be:
-                    [1]: Parquet file path with the ontologies read from the NCIt obo file
+                    [1]: Path of the ontology closure artifact built from the NCIt obo file
                     [2]: Output file
     """
-    raw_ontology_term_parquet_path = argv[1]
+    ontology_closure_path = argv[1]
     output_path = argv[2]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_ontology_term_df = spark.read.parquet(raw_ontology_term_parquet_path)
     ontology_term_diagnosis_df = transform_ontology_term_diagnosis(
-        spark, raw_ontology_term_df
+        spark, ontology_closure_path
     )
     ontology_term_diagnosis_df.write.mode("overwrite").parquet(output_path)
 
 
 def transform_ontology_term_diagnosis(
-    spark, raw_ontology_term_df: DataFrame
+    spark, ontology_closure_path
 ) -> DataFrame:
-    graph = nx.DiGraph()
-    df_collect = raw_ontology_term_df.collect()
-    for row in df_collect:
-        add_node_to_graph(graph, row)
-
-    cancer_graph = extract_graph_by_ontology_id(graph, "ncit_diagnosis")
- 
-    cancer_term_id_list = get_term_ids_from_graph(cancer_graph)
-    ontology_term_diagnosis_df = raw_ontology_term_df.where(
-        col("term_id").isin(cancer_term_id_list)
-    )
+    ontology_term_diagnosis_df = read_ontology_terms(spark, ontology_closure_path, "ncit_diagnosis")
     ontology_term_diagnosis_df = update_term_names(ontology_term_diagnosis_df)
     ontology_term_diagnosis_df = add_id(ontology_term_diagnosis_df, "id")
-
-    ancestors_df = create_term_ancestors(spark, cancer_graph)
-
-    ontology_term_diagnosis_df = ontology_term_diagnosis_df.join(
-        ancestors_df, on=["term_id"], how="left"
-    )
     return ontology_term_diagnosis_df
 
 
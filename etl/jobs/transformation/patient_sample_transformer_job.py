@@ -5,7 +5,7 @@ from pyspark.sql.functions import col
 
 from etl.constants import Constants
 from etl.jobs.util.cleaner import init_cap_and_trim_all, lower_and_trim_all
-from etl.jobs.util.dataframe_functions import transform_to_fk
+from etl.jobs.util.dataframe_functions import transform_to_fk, read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 
@@ -27,7 +27,7 @@ def main(argv):
     output_path = argv[6]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_sample_df = spark.read.parquet(raw_sample_parquet_path)
+    raw_sample_df = read_raw_parquet(spark, raw_sample_parquet_path)
     patient_df = spark.read.parquet(patient_parquet_path)
     tissue_df = spark.read.parquet(tissue_parquet_path)
     tumour_type_df = spark.read.parquet(tumour_type_parquet_path)
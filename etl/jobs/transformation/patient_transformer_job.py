@@ -4,6 +4,7 @@ from pyspark.sql import DataFrame, SparkSession
 
 from etl.constants import Constants
 from etl.jobs.util.cleaner import init_cap_and_trim_all
+from etl.jobs.util.dataframe_functions import read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 
@@ -22,7 +23,7 @@ def main(argv):
     output_path = argv[4]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_patient_df = spark.read.parquet(raw_patient_parquet_path)
+    raw_patient_df = read_raw_parquet(spark, raw_patient_parquet_path)
     ethnicity_df = spark.read.parquet(ethnicity_parquet_path)
     provider_group_df = spark.read.parquet(provider_group_parquet_path)
     patient_df = transform_patient(raw_patient_df, ethnicity_df, provider_group_df)
@@ -4,7 +4,7 @@ from pyspark.sql import DataFrame, SparkSession, Column
 from pyspark.sql.functions import col, trim
 
 from etl.constants import Constants
-from etl.jobs.util.dataframe_functions import transform_to_fk
+from etl.jobs.util.dataframe_functions import transform_to_fk, read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 
@@ -20,7 +20,7 @@ def main(argv):
     output_path = argv[3]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_molecular_metadata_platform_df = spark.read.parquet(raw_molecular_metadata_platform_parquet_path)
+    raw_molecular_metadata_platform_df = read_raw_parquet(spark, raw_molecular_metadata_platform_parquet_path)
     provider_group_df = spark.read.parquet(provider_group_parquet_path)
     platform_df = transform_platform(raw_molecular_metadata_platform_df, provider_group_df)
     platform_df.write.mode("overwrite").parquet(output_path)
@@ -4,6 +4,7 @@ from pyspark.sql import DataFrame, SparkSession
 from pyspark.sql.functions import col
 
 from etl.constants import Constants
+from etl.jobs.util.dataframe_functions import read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 
@@ -18,7 +19,7 @@ def main(argv):
     output_path = argv[2]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_source_df = spark.read.parquet(raw_source_parquet_path)
+    raw_source_df = read_raw_parquet(spark, raw_source_parquet_path)
     project_group_df = transform_project_group(raw_source_df)
     project_group_df.write.mode("overwrite").parquet(output_path)
 
@@ -5,7 +5,7 @@ from pyspark.sql.functions import col
 
 from etl.constants import Constants
 from etl.jobs.util.cleaner import trim_all
-from etl.jobs.util.dataframe_functions import transform_to_fk
+from etl.jobs.util.dataframe_functions import transform_to_fk, read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 
@@ -22,7 +22,7 @@ def main(argv):
     output_path = argv[4]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_source_df = spark.read.parquet(raw_source_parquet_path)
+    raw_source_df = read_raw_parquet(spark, raw_source_parquet_path)
     provider_type_df = spark.read.parquet(provider_type_parquet_path)
     project_group_df = spark.read.parquet(project_group_parquet_path)
     provider_group_df = transform_provider_group(raw_source_df, provider_type_df, project_group_df)
@@ -2,6 +2,7 @@ import sys
 
 from pyspark.sql import DataFrame, SparkSession, Column
 from pyspark.sql.functions import col, trim
+from etl.jobs.util.dataframe_functions import read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 
@@ -18,8 +19,8 @@ def main(argv):
     output_path = argv[3]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_model_df = spark.read.parquet(raw_model_parquet_path)
-    raw_cell_model_df = spark.read.parquet(raw_cell_model_parquet_path)
+    raw_model_df = read_raw_parquet(spark, raw_model_parquet_path)
+    raw_cell_model_df = read_raw_parquet(spark, raw_cell_model_parquet_path)
     publication_group_df = transform_publication_group(raw_model_df, raw_cell_model_df)
     publication_group_df.write.mode("overwrite").parquet(output_path)
 
@@ -4,7 +4,7 @@ from pyspark.sql import DataFrame, SparkSession
 from pyspark.sql.functions import lit
 from etl.constants import Constants
 from etl.jobs.util.cleaner import init_cap_and_trim_all
-from etl.jobs.util.dataframe_functions import transform_to_fk
+from etl.jobs.util.dataframe_functions import transform_to_fk, read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 
@@ -22,7 +22,7 @@ def main(argv):
     output_path = argv[3]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_model_validation_df = spark.read.parquet(raw_model_validation_parquet_path)
+    raw_model_validation_df = read_raw_parquet(spark, raw_model_validation_parquet_path)
     model_df = spark.read.parquet(model_parquet_path)
     quality_assurance_df = transform_quality_assurance(raw_model_validation_df, model_df)
     quality_assurance_df.write.mode("overwrite").parquet(output_path)
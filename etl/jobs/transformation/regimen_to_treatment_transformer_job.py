@@ -3,6 +3,8 @@ import sys
 from pyspark.sql import DataFrame, SparkSession
 from pyspark.sql.functions import explode, split, regexp_replace, col
 
+from etl.jobs.util.transformation_outputs import write_transformation_output
+
 
 def main(argv):
     """
@@ -28,7 +30,7 @@ def main(argv):
         raw_ontolia_df, ontology_term_regimen_df, ontology_term_treatment_df
     )
 
-    regimen_to_treatment_df.write.mode("overwrite").parquet(output_path)
+    write_transformation_output(regimen_to_treatment_df, output_path)
 
 
 def transform_regimen_to_treatment(
@@ -5,6 +5,7 @@ from pyspark.sql.functions import col, collect_set, when, concat_ws, lower, udf
 from pyspark.sql.types import StringType
 
 from etl.jobs.transformation.links_generation.resources_per_model_util import add_cancer_annotation_resources
+from etl.jobs.util.transformation_outputs import read_transformation_output, write_transformation_output
 
 
 def main(argv):
@@ -34,7 +35,7 @@ def main(argv):
     output_path = argv[9]
 
     spark = SparkSession.builder.getOrCreate()
-    model_metadata_df = spark.read.parquet(model_metadata_parquet_path)
+    model_metadata_df = read_transformation_output(spark, model_metadata_parquet_path)
     search_index_molecular_char_df = spark.read.parquet(search_index_molecular_characterization_parquet_path)
     mutation_measurement_data_df = spark.read.parquet(mutation_measurement_data_parquet_path)
     cna_data_df = spark.read.parquet(cna_data_parquet_path)
@@ -54,7 +55,7 @@ def main(argv):
         immunemarkers_data_df,
         raw_external_resources_df
     )
-    search_index_molecular_data_df.write.mode("overwrite").parquet(output_path)
+    write_transformation_output(search_index_molecular_data_df, output_path)
 
 
 def transform_search_index_molecular_data(
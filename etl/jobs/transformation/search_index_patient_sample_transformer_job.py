@@ -5,6 +5,7 @@ from pyspark.sql.functions import array_except, concat_ws, split, array, lit, co
 from pyspark.sql.types import StringType
 
 from etl.constants import Constants
+from etl.jobs.util.transformation_outputs import write_transformation_output
 
 cancer_systems = [
     "Breast Cancer",
@@ -63,7 +64,7 @@ def main(argv):
         ontology_term_diagnosis_df
     )
 
-    search_index_patient_sample_df.write.mode("overwrite").parquet(output_path)
+    write_transformation_output(search_index_patient_sample_df, output_path)
 
 
 # extends patient_sample_df with diagnosis, tumour, and patient information
@@ -4,6 +4,7 @@ from pyspark.sql import DataFrame, SparkSession
 from pyspark.sql.functions import col, lit
 
 from etl.jobs.transformation.scoring.model_characterizations_calculator import add_scores_column
+from etl.jobs.util.transformation_outputs import read_transformation_output
 
 
 def main(argv):
@@ -20,7 +21,7 @@ def main(argv):
     output_path = argv[4]
 
     spark = SparkSession.builder.getOrCreate()
-    search_index_molecular_data_df = spark.read.parquet(search_index_molecular_data_parquet_path)
+    search_index_molecular_data_df = read_transformation_output(spark, search_index_molecular_data_parquet_path)
     raw_external_resources_df = spark.read.parquet(raw_external_resources_parquet_path)
     raw_model_characterization_conf_df = spark.read.parquet(raw_model_characterization_conf_parquet_path)
 
@@ -1,6 +1,7 @@
 import sys
 
 from pyspark.sql import DataFrame, SparkSession
+from etl.jobs.util.dataframe_functions import read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 
@@ -15,7 +16,7 @@ def main(argv):
     output_path = argv[2]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_sharing_df = spark.read.parquet(raw_sharing_parquet_path)
+    raw_sharing_df = read_raw_parquet(spark, raw_sharing_parquet_path)
     source_database_df = transform_source_database(raw_sharing_df)
     source_database_df.write.mode("overwrite").parquet(output_path)
 
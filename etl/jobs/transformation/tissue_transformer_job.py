@@ -3,6 +3,7 @@ import sys
 from pyspark.sql import DataFrame, SparkSession
 
 from etl.jobs.util.cleaner import lower_and_trim_all
+from etl.jobs.util.dataframe_functions import read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 
@@ -17,7 +18,7 @@ def main(argv):
     output_path = argv[2]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_sample_df = spark.read.parquet(raw_sample_parquet_path)
+    raw_sample_df = read_raw_parquet(spark, raw_sample_parquet_path)
     tissue_df = transform_tissue(raw_sample_df)
     tissue_df.write.mode("overwrite").parquet(output_path)
 
@@ -7,6 +7,7 @@ from etl.constants import Constants
 from etl.jobs.transformation.harmonisation.treatment_data_aggregator_by_model import (
     aggregate_treatment_data_by_model,
 )
+from etl.jobs.util.transformation_outputs import read_transformation_output, write_transformation_output
 
 
 def main(argv):
@@ -34,7 +35,7 @@ def main(argv):
     treatment_protocol_df = spark.read.parquet(treatment_protocol_parquet_path)
     treatment_component_df = spark.read.parquet(treatment_component_parquet_path)
     treatment_df = spark.read.parquet(treatment_parquet_path)
-    regimen_to_treatment_df = spark.read.parquet(regimen_to_treatment_parquet_path)
+    regimen_to_treatment_df = read_transformation_output(spark, regimen_to_treatment_parquet_path)
 
     response_df = spark.read.parquet(response_parquet_path)
 
@@ -46,7 +47,7 @@ def main(argv):
         regimen_to_treatment_df,
         response_df,
     )
-    treatment_aggregator_helper_df.write.mode("overwrite").parquet(output_path)
+    write_transformation_output(treatment_aggregator_helper_df, output_path)
 
 
 def transform_treatment_aggregator_helper(
@@ -4,6 +4,8 @@ from pyspark.sql import DataFrame, SparkSession
 from pyspark.sql.functions import lit
 
 from etl.jobs.util.cleaner import lower_and_trim_all
+from etl.jobs.util.ontology_closure import read_ontology_terms
+from etl.jobs.util.transformation_outputs import read_transformation_output
 
 
 def main(argv):
@@ -12,23 +14,20 @@ def main(argv):
     :param list argv: the list elements should be:
                     [1]: Parquet file path from where all treatment names will be obtained
                     [2]: Parquet file path with the mapping rules for treaments
-                    [3]: Parquet file path with with the ontology terms for treatments (processed from NCIt obo ontology)
-                    [4]: Parquet file path with with the ontology terms for regimens (processed from NCIt obo ontology)
-                    [5]: Output file
+                    [3]: Path of the ontology closure artifact (processed from NCIt obo ontology), from where the
+                    ontology terms for treatments and regimens are obtained
+                    [4]: Output file
     """
     treatment_name_helper_parquet_path = argv[1]
     raw_treatment_mapping_parquet_path = argv[2]
-    ontology_term_treatment_parquet_path = argv[3]
-    ontology_term_regimen_parquet_path = argv[4]
-    output_path = argv[5]
+    ontology_closure_path = argv[3]
+    output_path = argv[4]
 
     spark = SparkSession.builder.getOrCreate()
-    treatment_name_df = spark.read.parquet(treatment_name_helper_parquet_path)
+    treatment_name_df = read_transformation_output(spark, treatment_name_helper_parquet_path)
     raw_treatment_mapping_df = spark.read.parquet(raw_treatment_mapping_parquet_path)
-    ontology_term_treatment_df = spark.read.parquet(
-        ontology_term_treatment_parquet_path
-    )
-    ontology_term_regimen_df = spark.read.parquet(ontology_term_regimen_parquet_path)
+    ontology_term_treatment_df = read_ontology_terms(spark, ontology_closure_path, "ncit_treatment")
+    ontology_term_regimen_df = read_ontology_terms(spark, ontology_closure_path, "ncit_regimen")
 
     treatment_name_harmonisation_df = transform_treatment_name_harmonisation(
         treatment_name_df,
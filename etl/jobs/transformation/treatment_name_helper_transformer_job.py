@@ -3,6 +3,8 @@ import sys
 from pyspark.sql import DataFrame, SparkSession
 from pyspark.sql.functions import col
 
+from etl.jobs.util.transformation_outputs import write_transformation_output
+
 def main(argv):
     """
     Creates a parquet file with unique names of treatments.
@@ -16,7 +18,7 @@ def main(argv):
     spark = SparkSession.builder.getOrCreate()
     treatment_and_component_helper_df = spark.read.parquet(treatment_and_component_helper_parquet_path)
     treatment_name_df = transform_treatment_name(treatment_and_component_helper_df)
-    treatment_name_df.write.mode("overwrite").parquet(output_path)
+    write_transformation_output(treatment_name_df, output_path)
 
 
 def transform_treatment_name(treatment_and_component_helper_df) -> DataFrame:
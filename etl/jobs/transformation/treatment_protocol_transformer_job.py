@@ -5,7 +5,7 @@ from pyspark.sql.functions import lit
 
 from etl.constants import Constants
 from etl.jobs.util.cleaner import init_cap_and_trim_all
-from etl.jobs.util.dataframe_functions import transform_to_fk
+from etl.jobs.util.dataframe_functions import transform_to_fk, read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 
@@ -30,8 +30,8 @@ def main(argv):
     output_path = argv[7]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_drug_dosing_df = spark.read.parquet(raw_drug_dosing_parquet_path)
-    raw_patient_treatment_df = spark.read.parquet(raw_patient_treatment_parquet_path)
+    raw_drug_dosing_df = read_raw_parquet(spark, raw_drug_dosing_parquet_path)
+    raw_patient_treatment_df = read_raw_parquet(spark, raw_patient_treatment_parquet_path)
     model_df = spark.read.parquet(model_parquet_path)
     patient_df = spark.read.parquet(patient_parquet_path)
     response_df = spark.read.parquet(response_parquet_path)
@@ -7,6 +7,7 @@ from etl.jobs.transformation.links_generation.treatments_links_builder import (
     add_treatment_links,
 )
 from etl.jobs.util.id_assigner import add_id
+from etl.jobs.util.transformation_outputs import read_transformation_output
 
 
 def main(argv):
@@ -21,7 +22,7 @@ def main(argv):
     output_path = argv[3]
 
     spark = SparkSession.builder.getOrCreate()
-    treatment_type_helper_df = spark.read.parquet(treatment_type_helper_parquet_path)
+    treatment_type_helper_df = read_transformation_output(spark, treatment_type_helper_parquet_path)
 
     raw_external_resources_df = spark.read.parquet(raw_external_resources_parquet_path)
 
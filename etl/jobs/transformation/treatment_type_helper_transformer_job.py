@@ -4,6 +4,8 @@ from pyspark.sql import DataFrame, SparkSession
 from pyspark.sql.functions import udf, split, coalesce
 from pyspark.sql.types import StringType, ArrayType
 
+from etl.jobs.util.transformation_outputs import write_transformation_output
+
 KEYWORDS_BY_TYPE = [
     {"type": "Hormone Therapy", "keywords": ["hormone therapy"]},
     {
@@ -104,7 +106,7 @@ def main(argv):
 
     treatment_type_df = transform_treatment_type_helper(treatment_name_harmonisation_df)
 
-    treatment_type_df.write.mode("overwrite").parquet(output_path)
+    write_transformation_output(treatment_type_df, output_path)
 
 
 def transform_treatment_type_helper(
@@ -4,7 +4,7 @@ from pyspark.sql import DataFrame, SparkSession
 
 from etl.constants import Constants
 from etl.jobs.util.cleaner import init_cap_and_trim_all
-from etl.jobs.util.dataframe_functions import transform_to_fk
+from etl.jobs.util.dataframe_functions import transform_to_fk, read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 
 
@@ -32,7 +32,7 @@ def main(argv):
     output_path = argv[8]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_model_df = spark.read.parquet(raw_model_parquet_path)
+    raw_model_df = read_raw_parquet(spark, raw_model_parquet_path)
     engraftment_site_df = spark.read.parquet(engraftment_site_parquet_path)
     engraftment_type_df = spark.read.parquet(engraftment_type_parquet_path)
     engraftment_sample_type_df = spark.read.parquet(engraftment_sample_type_parquet_path)
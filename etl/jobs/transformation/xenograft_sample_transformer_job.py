@@ -3,7 +3,7 @@ import sys
 from pyspark.sql import DataFrame, SparkSession
 
 from etl.constants import Constants
-from etl.jobs.util.dataframe_functions import transform_to_fk
+from etl.jobs.util.dataframe_functions import transform_to_fk, read_raw_parquet
 from etl.jobs.util.id_assigner import add_id
 from pyspark.sql.functions import col
 
@@ -23,7 +23,7 @@ def main(argv):
     output_path = argv[5]
 
     spark = SparkSession.builder.getOrCreate()
-    raw_molecular_metadata_sample_df = spark.read.parquet(raw_molecular_metadata_sample_parquet_path)
+    raw_molecular_metadata_sample_df = read_raw_parquet(spark, raw_molecular_metadata_sample_parquet_path)
     host_strain_df = spark.read.parquet(host_strain_parquet_path)
     model_df = spark.read.parquet(model_parquet_path)
     platform_df = spark.read.parquet(platform_parquet_path)
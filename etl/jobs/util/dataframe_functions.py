@@ -1,5 +1,5 @@
-from pyspark.sql import DataFrame
-from pyspark.sql.functions import transform, concat, lit, array_join, when, size
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql.functions import transform, concat, lit, array_join, when, size, col
 
 from etl.constants import Constants
 
@@ -79,3 +79,27 @@ def flatten_array_columns(df: DataFrame):
                 ).otherwise(lit(None)),
             )
     return df
+
+
+def read_raw_parquet(spark: SparkSession, parquet_path: str, providers=None) -> DataFrame:
+    """
+    Reads a raw parquet, which is partitioned by provider, filtering on the partition column so spark only scans the
+    partitions of the providers being processed.
+
+    Parameters:
+        spark (SparkSession): Spark session
+        parquet_path (str): Path of the raw parquet
+        providers (list): Providers to read. By default, the providers of the transformation, which are set in the
+        spark configuration. All the partitions are read if none is set
+
+    Returns:
+    DataFrame: The raw data for the providers
+
+   """
+    df = spark.read.parquet(parquet_path)
+    if providers is None:
+        providers_conf = spark.conf.get(Constants.PROVIDERS_SPARK_CONF, "")
+        providers = providers_conf.split(",") if providers_conf else []
+    if providers:
+        df = df.where(col(Constants.DATA_SOURCE_COLUMN).isin(list(providers)))
+    return df
@@ -1,11 +1,117 @@
 import os
+import shutil
 from distutils.dir_util import copy_tree
 
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyarrow import fs
 
-def copy_directory(source, destination):
+# Marker written by spark (and by the jobs that write their outputs in other ways) when an output folder is complete
+SUCCESS_MARKER = "_SUCCESS"
+
+# Ways of putting the content of a cache folder in the output folder:
+#   copy: the files are copied
+#   hardlink: the files are hard links to the cached files (copied if the cache is in another file system)
+#   symlink: the complete outputs (folders with the success marker) are symbolic links to the cached folders. The rest
+#   of the files are hard links
+COPY_MODE = "copy"
+HARDLINK_MODE = "hardlink"
+SYMLINK_MODE = "symlink"
+MATERIALISATION_MODES = [COPY_MODE, HARDLINK_MODE, SYMLINK_MODE]
+
+
+def copy_directory(source, destination, mode=COPY_MODE):
     if not os.path.exists(source):
         raise Exception("Source directory for cache [{0}] does not exist".format(source))
-    copy_tree(source, destination)
+    materialise_directory(source, destination, mode)
+
+    print("Copied cache from {0} to {1} ({2})".format(source, destination, mode))
+
+
+def remove_path(path):
+    """ Removes a file or folder. Symbolic links are removed without touching what they point to """
+    if os.path.islink(path) or os.path.isfile(path):
+        os.remove(path)
+    elif os.path.isdir(path):
+        shutil.rmtree(path)
+
+
+def link_file(source, destination):
+    remove_path(destination)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def materialise_directory(source, destination, mode=COPY_MODE):
+    """
+    Puts the content of the source folder in the destination folder, replacing the files that already exist there.
+    With links, the outputs in destination are never modified in place: tasks write their outputs to a staging
+    folder and then replace the link (StagedOutput), and files are written to a temporary file that is then renamed.
+    So the linked data in source is not changed.
+    """
+    if mode not in MATERIALISATION_MODES:
+        raise ValueError("Invalid materialisation mode {0}. Valid values: {1}".format(mode, MATERIALISATION_MODES))
+    if mode == COPY_MODE:
+        copy_tree(source, destination)
+        return
+    if os.path.islink(destination):
+        remove_path(destination)
+    os.makedirs(destination, exist_ok=True)
+    for name in sorted(os.listdir(source)):
+        source_path = os.path.join(source, name)
+        destination_path = os.path.join(destination, name)
+        if not os.path.isdir(source_path):
+            link_file(source_path, destination_path)
+        elif mode == SYMLINK_MODE and is_complete_output(source_path):
+            remove_path(destination_path)
+            os.symlink(os.path.abspath(source_path), destination_path)
+        else:
+            materialise_directory(source_path, destination_path, mode)
+
+
+def get_output_filesystem(session):
+    if session.sparkContext.master != "yarn":
+        return fs.LocalFileSystem()
+    return fs.HadoopFileSystem("default")
+
+
+def batch_rows(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_rows_to_parquet(rows, schema, filesystem, output_path, batch_size):
+    """
+    Writes the rows (dictionaries) to a parquet folder in record batches of batch_size rows, so only one batch is in
+    memory at a time. The folder is replaced if it already exists.
+    """
+    if filesystem.get_file_info(output_path).type != fs.FileType.NotFound:
+        filesystem.delete_dir(output_path)
+    filesystem.create_dir(output_path)
+
+    file_path = os.path.join(output_path, "part-00000.parquet")
+    with pq.ParquetWriter(file_path, schema, filesystem=filesystem) as writer:
+        for batch in batch_rows(rows, batch_size):
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+    with filesystem.open_output_stream(os.path.join(output_path, SUCCESS_MARKER)):
+        pass
+
+
+def write_success_marker(output_path):
+    with open(os.path.join(output_path, SUCCESS_MARKER), "w"):
+        pass
 
-    print("Copied cache from {0} to {1}".format(source, destination))
 
+def is_complete_output(path):
+    """ A folder is a complete output if it has the success marker. Files are complete if they exist """
+    if os.path.isdir(path):
+        return os.path.exists(os.path.join(path, SUCCESS_MARKER))
+    return os.path.exists(path)
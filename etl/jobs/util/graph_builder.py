@@ -1,6 +1,8 @@
 import networkx as nx
 import re
-from pyspark.sql import DataFrame
+from array import array
+from collections import deque
+from typing import NamedTuple
 
 from etl.jobs.util.cleaner import remove_all_trailing_whitespaces
 
@@ -148,16 +150,167 @@ def print_graph(graph: nx.DiGraph):
         print(edge)
 
 
-def create_term_ancestors(spark, graph) -> DataFrame:
-    ancestors = []
-    columns = ["term_id", "ancestors"]
-    cancer_term_id_list = get_term_ids_from_graph(graph)
+class CompactGraph(NamedTuple):
+    """
+    Ontology graph where every term is identified by an integer index. Children and parents of each node are stored in
+    CSR format: the children of node i are child_targets[child_offsets[i]:child_offsets[i + 1]] (same for parents).
+    """
+    term_ids: list
+    term_names: list
+    index_by_term_id: dict
+    child_offsets: array
+    child_targets: array
+    parent_offsets: array
+    parent_targets: array
+
+
+def to_csr(adjacency):
+    offsets = array("i", [0])
+    targets = array("i")
+    for neighbours in adjacency:
+        targets.extend(sorted(neighbours))
+        offsets.append(len(targets))
+    return offsets, targets
+
 
-    for term_id in cancer_term_id_list:
-        ancestor_id_list = get_term_ancestors(graph, term_id)
+def build_compact_graph(rows) -> CompactGraph:
+    """
+    Builds a CompactGraph with the same nodes and edges that `add_node_to_graph` would add to a networkx graph: one edge
+    from each `is_a` term to the term.
+
+    :param rows: Rows (or dictionaries) with term_id, term_name and is_a (comma separated ids of the parent terms)
+    :return: The CompactGraph with all the terms
+    """
+    index_by_term_id = {}
+    term_ids = []
+    term_names = []
+    children = []
+    parents = []
+
+    def get_index(term_id):
+        index = index_by_term_id.get(term_id)
+        if index is None:
+            index = len(term_ids)
+            index_by_term_id[term_id] = index
+            term_ids.append(term_id)
+            term_names.append(None)
+            children.append(set())
+            parents.append(set())
+        return index
+
+    for row in rows:
+        term_index = get_index(row["term_id"])
+        term_names[term_index] = row["term_name"]
+        for is_a_id in row["is_a"].split(","):
+            parent_index = get_index(is_a_id)
+            children[parent_index].add(term_index)
+            parents[term_index].add(parent_index)
+
+    child_offsets, child_targets = to_csr(children)
+    parent_offsets, parent_targets = to_csr(parents)
+    return CompactGraph(
+        term_ids, term_names, index_by_term_id, child_offsets, child_targets, parent_offsets, parent_targets)
+
+
+def get_children(graph: CompactGraph, node):
+    return graph.child_targets[graph.child_offsets[node]:graph.child_offsets[node + 1]]
+
+
+def get_parents(graph: CompactGraph, node):
+    return graph.parent_targets[graph.parent_offsets[node]:graph.parent_offsets[node + 1]]
+
+
+def get_branch_nodes(graph: CompactGraph, ontology_id: str) -> list:
+    """
+    Returns the indexes of the nodes in the branches of the ontology: the descendants of its top level terms (the top
+    level terms themselves are not included, unless they descend from another top level term). This is the same set
+    of nodes that `extract_graph_by_ontology_id` returns.
+    """
+    top_level_terms = []
+    for ont in ONTOLOGIES:
+        if ont["id"] == ontology_id:
+            top_level_terms = ont["top_level_terms"]
+
+    visited = bytearray(len(graph.term_ids))
+    pending = deque()
+    for top_term in top_level_terms:
+        if top_term in graph.index_by_term_id:
+            pending.append(graph.index_by_term_id[top_term])
+    while pending:
+        node = pending.popleft()
+        for child in get_children(graph, node):
+            if not visited[child]:
+                visited[child] = 1
+                pending.append(child)
+    return [node for node in range(len(visited)) if visited[node]]
+
+
+def compute_branch_ancestors(graph: CompactGraph, branch_nodes: list) -> dict:
+    """
+    Calculates the ancestors of every node of a branch, considering only the nodes and edges inside the branch (like
+    `nx.ancestors` does on the subgraph of the branch). The nodes are visited once in topological order, so the
+    ancestors of a node are the union of its parents and their ancestors, which were already calculated.
+
+    :param CompactGraph graph: The whole ontology graph
+    :param list branch_nodes: Indexes of the nodes of the branch
+    :return: Dictionary with the set of ancestor indexes of each node of the branch
+    """
+    in_branch = bytearray(len(graph.term_ids))
+    for node in branch_nodes:
+        in_branch[node] = 1
+
+    pending_parents = {}
+    ready = deque()
+    for node in branch_nodes:
+        pending_parents[node] = sum(1 for parent in get_parents(graph, node) if in_branch[parent])
+        if pending_parents[node] == 0:
+            ready.append(node)
+
+    ancestors = {}
+    while ready:
+        node = ready.popleft()
+        node_ancestors = set()
+        for parent in get_parents(graph, node):
+            if in_branch[parent]:
+                node_ancestors.add(parent)
+                node_ancestors |= ancestors[parent]
+        ancestors[node] = node_ancestors
+        for child in get_children(graph, node):
+            if in_branch[child]:
+                pending_parents[child] -= 1
+                if pending_parents[child] == 0:
+                    ready.append(child)
+
+    # is_a relationships should not have cycles. If they have, the nodes in (or below) a cycle are never ready, so
+    # their ancestors are calculated by traversing their parents
+    for node in branch_nodes:
+        if node not in ancestors:
+            ancestors[node] = get_ancestors_by_traversal(graph, node, in_branch)
+    return ancestors
+
+
+def get_ancestors_by_traversal(graph: CompactGraph, node, in_branch):
+    node_ancestors = set()
+    pending = deque([node])
+    while pending:
+        current = pending.popleft()
+        for parent in get_parents(graph, current):
+            if in_branch[parent] and parent not in node_ancestors:
+                node_ancestors.add(parent)
+                pending.append(parent)
+    node_ancestors.discard(node)
+    return node_ancestors
+
+
+def get_updated_term_names(graph: CompactGraph):
+    """
+    Returns a function that gives the name of a node after `update_term_name`. Each name is only updated once.
+    """
+    updated_names = [None] * len(graph.term_ids)
 
-        ancestor_list = get_term_names_from_term_id_list(graph, ancestor_id_list)
-        ancestors.append((term_id, "|".join(ancestor_list)))
+    def get_updated_term_name(node):
+        if updated_names[node] is None:
+            updated_names[node] = update_term_name(graph.term_names[node])
+        return updated_names[node]
 
-    df = spark.createDataFrame(data=ancestors, schema=columns)
-    return df
+    return get_updated_term_name
@@ -0,0 +1,27 @@
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql.functions import col
+
+# Tables of the ontology closure artifact. Each one is a parquet folder inside the output of the
+# ontology_closure_helper transformation
+NODES_TABLE = "nodes"
+TERMS_TABLE = "terms"
+
+
+def get_table_path(ontology_closure_path, table_name):
+    return "{0}/{1}".format(ontology_closure_path, table_name)
+
+
+def read_ontology_terms(spark: SparkSession, ontology_closure_path, ontology_id) -> DataFrame:
+    """
+    Reads the terms that belong to a branch of the ontology (as defined in `ONTOLOGIES`) from the ontology closure
+    artifact.
+
+    :param spark: Spark session
+    :param str ontology_closure_path: Path of the output of the ontology_closure_helper transformation
+    :param str ontology_id: The ID of the ontology in the `ONTOLOGIES` dictionary
+    :return: A dataframe with the raw columns of the terms of the branch and their ancestors
+    """
+    nodes_df = spark.read.parquet(get_table_path(ontology_closure_path, NODES_TABLE))
+    terms_df = spark.read.parquet(get_table_path(ontology_closure_path, TERMS_TABLE))
+    terms_df = terms_df.where(col("ontology_id") == ontology_id).drop("ontology_id")
+    return nodes_df.join(terms_df, on=["term_id"], how="inner")
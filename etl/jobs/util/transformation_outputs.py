@@ -0,0 +1,29 @@
+from pyspark.sql import DataFrame, SparkSession
+
+# When the transformations run fused in a single spark session (TransformAllEntities), the outputs of some helper
+# transformations are not written to parquet: the dataframe is kept here (by output path) and the transformation
+# that consumes it continues its plan
+_in_memory_paths = set()
+_in_memory_outputs = {}
+
+
+def keep_in_memory(output_path):
+    _in_memory_paths.add(output_path)
+
+
+def release(output_path):
+    _in_memory_paths.discard(output_path)
+    _in_memory_outputs.pop(output_path, None)
+
+
+def write_transformation_output(df: DataFrame, output_path):
+    if output_path in _in_memory_paths:
+        _in_memory_outputs[output_path] = df
+    else:
+        df.write.mode("overwrite").parquet(output_path)
+
+
+def read_transformation_output(spark: SparkSession, path) -> DataFrame:
+    if path in _in_memory_outputs:
+        return _in_memory_outputs[path]
+    return spark.read.parquet(path)
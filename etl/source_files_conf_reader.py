@@ -20,3 +20,11 @@ def read_module(module_name):
                 return module
     return None
 
+
+def read_modules_by_type(module_type):
+    modules = []
+    for group in read_groups():
+        for module in group["modules"]:
+            if module_type == module["type"]:
+                modules.append(module)
+    return modules
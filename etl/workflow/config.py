@@ -1,10 +1,22 @@
 import luigi
 
+from etl.jobs.util.file_manager import is_complete_output
+
+
+class PdcmTarget(luigi.LocalTarget):
+    """
+    Output of a task of the ETL. A folder output only exists once it has the success marker, so a folder left by an
+    interrupted write is not taken as a complete output.
+    """
+
+    def exists(self):
+        return is_complete_output(self.path)
+
 
 class PdcmConfig(luigi.Config):
 
     def get_target(self, path):
-        return (luigi.LocalTarget(path))
+        return (PdcmTarget(path))
 
 
 class TimeTaskMixin(object):
@@ -0,0 +1,213 @@
+import argparse
+import json
+import os
+import statistics
+import time
+
+import luigi
+from luigi.task import flatten
+
+# Number of runs of each task used to estimate its duration
+DURATION_RUNS = 5
+# Duration assumed for tasks without recorded runs, so without telemetry the priority is the length of the longest
+# chain of tasks that depends on each task
+DEFAULT_DURATION = 1.0
+
+# Schedules computed by assign_priorities, by root tasks and durations file, and the priority of every task id in the
+# last one requested. They are computed once per process, as luigi calls requires() many times
+_schedules = {}
+_priorities = {}
+
+
+class TaskDurations(luigi.Config):
+    """ File (json lines) where the processing time of every task of the ETL is recorded """
+    task_durations_file = luigi.Parameter(default="")
+
+
+@luigi.Task.event_handler(luigi.Event.PROCESSING_TIME)
+def record_task_duration(task, processing_time):
+    durations_file = TaskDurations().task_durations_file
+    if not durations_file:
+        return
+    entry = {
+        "task_id": task.task_id,
+        "task_family": task.task_family,
+        "duration": processing_time,
+        "finished_at": time.time()
+    }
+    # Tasks run in different processes: every entry is written with a single append
+    with open(durations_file, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def read_task_durations(durations_file):
+    """
+    Reads the recorded durations and estimates the duration of each task (by task id) and of each task family as the
+    median of their last DURATION_RUNS runs.
+    """
+    runs_by_task_id = {}
+    runs_by_family = {}
+    if durations_file and os.path.exists(durations_file):
+        with open(durations_file) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                runs_by_task_id.setdefault(entry["task_id"], []).append(entry["duration"])
+                runs_by_family.setdefault(entry["task_family"], []).append(entry["duration"])
+
+    def estimate(runs):
+        return {key: statistics.median(values[-DURATION_RUNS:]) for key, values in runs.items()}
+
+    return estimate(runs_by_task_id), estimate(runs_by_family)
+
+
+def build_task_graph(root_tasks):
+    """
+    Walks the dependencies of the root tasks (through requires(), as the luigi scheduler does) and returns the tasks
+    by id and the ids of the dependencies of each task.
+    """
+    tasks = {}
+    dependencies = {}
+    pending = list(root_tasks)
+    while pending:
+        task = pending.pop()
+        if task.task_id in tasks:
+            continue
+        tasks[task.task_id] = task
+        task_dependencies = flatten(task.requires())
+        dependencies[task.task_id] = [dependency.task_id for dependency in task_dependencies]
+        pending.extend(task_dependencies)
+    return tasks, dependencies
+
+
+def get_sorted_task_ids(dependencies):
+    sorted_task_ids = []
+    visited = set()
+
+    def visit(task_id):
+        if task_id in visited:
+            return
+        visited.add(task_id)
+        for dependency in dependencies[task_id]:
+            visit(dependency)
+        sorted_task_ids.append(task_id)
+
+    for task_id in dependencies:
+        visit(task_id)
+    return sorted_task_ids
+
+
+def compute_schedule(dependencies, durations):
+    """
+    Computes the critical path method values of every task, assuming unlimited workers.
+
+    :param dict dependencies: Ids of the dependencies of each task id
+    :param dict durations: Estimated duration of each task id
+    :return: For each task id: duration, earliest_start, earliest_finish, latest_finish, slack (how much the task can
+    be delayed without delaying the whole ETL) and remaining (duration of the longest chain that starts with the task)
+    """
+    sorted_task_ids = get_sorted_task_ids(dependencies)
+    dependents = {task_id: [] for task_id in dependencies}
+    for task_id, task_dependencies in dependencies.items():
+        for dependency in task_dependencies:
+            dependents[dependency].append(task_id)
+
+    schedule = {}
+    for task_id in sorted_task_ids:
+        earliest_start = max([schedule[dependency]["earliest_finish"] for dependency in dependencies[task_id]] or [0])
+        schedule[task_id] = {
+            "duration": durations[task_id],
+            "earliest_start": earliest_start,
+            "earliest_finish": earliest_start + durations[task_id]
+        }
+
+    total_duration = max([values["earliest_finish"] for values in schedule.values()] or [0])
+    for task_id in reversed(sorted_task_ids):
+        values = schedule[task_id]
+        following = [schedule[dependent] for dependent in dependents[task_id]]
+        values["latest_finish"] = min(
+            [dependent["latest_finish"] - dependent["duration"] for dependent in following] or [total_duration])
+        values["remaining"] = values["duration"] + max([dependent["remaining"] for dependent in following] or [0])
+        values["slack"] = values["latest_finish"] - values["earliest_finish"]
+    return schedule
+
+
+def get_critical_path(schedule):
+    critical_task_ids = [task_id for task_id, values in schedule.items() if abs(values["slack"]) < 1e-6]
+    return sorted(critical_task_ids, key=lambda task_id: schedule[task_id]["earliest_start"])
+
+
+def get_task_durations(tasks, durations_file):
+    durations_by_task_id, durations_by_family = read_task_durations(durations_file)
+    return {
+        task_id: durations_by_task_id.get(task_id, durations_by_family.get(task.task_family, DEFAULT_DURATION))
+        for task_id, task in tasks.items()}
+
+
+def assign_priorities(root_tasks, durations_file):
+    """
+    Computes the priority of every task required by the root tasks: the estimated duration (in seconds) of the
+    longest chain of tasks that starts with it, so the workers start first the tasks on the critical path and the long
+    chains (like the molecular data ones) do not wait behind many small tasks. The tasks read their priority with
+    CriticalPathPriority. The schedule is only computed the first time for the same root tasks and durations file.
+
+    :return: The tasks by id and their schedule (see compute_schedule)
+    """
+    key = (tuple(sorted(task.task_id for task in root_tasks)), durations_file)
+    if key not in _schedules:
+        tasks, dependencies = build_task_graph(root_tasks)
+        schedule = compute_schedule(dependencies, get_task_durations(tasks, durations_file))
+        _schedules[key] = tasks, schedule
+    tasks, schedule = _schedules[key]
+    # The priorities served are always the ones of the schedule returned
+    _priorities.clear()
+    _priorities.update({task_id: int(round(values["remaining"])) for task_id, values in schedule.items()})
+    return tasks, schedule
+
+
+def get_task_priority(task_id):
+    return _priorities.get(task_id, 0)
+
+
+class CriticalPathPriority(object):
+    """
+    Mixin for the tasks of the ETL. Their luigi priority is the one computed for them by assign_priorities (0 until
+    it is computed).
+    """
+
+    @property
+    def priority(self):
+        return get_task_priority(self.task_id)
+
+
+def print_report(tasks, schedule):
+    total_duration = max([values["earliest_finish"] for values in schedule.values()] or [0])
+    print("Estimated duration with unlimited workers: {0:.0f}s".format(total_duration))
+    print("\nCritical path:")
+    for task_id in get_critical_path(schedule):
+        values = schedule[task_id]
+        print("  {0:>8.0f}s {1:>8.0f}s  {2}".format(values["earliest_start"], values["duration"], task_id))
+    print("\nTasks by priority:")
+    print("  {0:>9} {1:>9} {2:>9}  {3}".format("priority", "duration", "slack", "task"))
+    for task_id in sorted(schedule, key=lambda key: -schedule[key]["remaining"]):
+        values = schedule[task_id]
+        print("  {0:>9} {1:>8.0f}s {2:>8.0f}s  {3}".format(
+            get_task_priority(task_id), values["duration"], values["slack"], task_id))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Prints the critical path and the slack of the tasks of the ETL, using the recorded durations.")
+    parser.add_argument('--durations-file', help='File with the recorded task durations. Defaults to the '
+                                                 'task_durations_file in the luigi configuration.')
+    args = parser.parse_args()
+
+    from etl.workflow.main import PdcmEtl
+    durations_file = args.durations_file or TaskDurations().task_durations_file
+    tasks, schedule = assign_priorities(flatten(PdcmEtl().requires()), durations_file)
+    print_report(tasks, schedule)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,13 @@ from pyspark.sql import SparkSession
 from etl.jobs.transformation.links_generation.molecular_data_links_builder import add_links_in_molecular_data_table
 from etl.workflow.extractor import ExtractExternalResources, ExtractDownloadedResourcesData
 from etl.workflow.transformer import TransformCnaMolecularData
+from etl.workflow.spark_resources import SparkResources
 
 
 # Useful to debug methods without the need to compute the dataframe from scratch but to
 # use already existing parquets. Mainly to be used in the cluster where changes to code are
 # more cumbersome
-class DebugTask(PySparkTask):
+class DebugTask(SparkResources, PySparkTask):
     data_dir = luigi.Parameter()
     data_dir_out = luigi.Parameter()
 
@@ -0,0 +1,58 @@
+import json
+import os
+
+from pyspark.sql import SparkSession
+
+from etl.constants import Constants
+
+METRICS_FILE_NAME = "_metrics.json"
+
+
+def count_rows_by_provider(spark: SparkSession, path):
+    written_df = spark.read.parquet(path)
+    rows_by_provider = {}
+    for row in written_df.groupBy(Constants.DATA_SOURCE_COLUMN).count().collect():
+        rows_by_provider[row[0]] = row[1]
+    return rows_by_provider
+
+
+def collect_module_metrics(spark: SparkSession, output_path, manifest, reused_providers, rejects_path=None):
+    """
+    Collects the metrics of an extracted module once it has been written: rows per provider and bytes read.
+    The row counts come from the parquet footers of the written output (no column is read) and the bytes read from
+    the sizes of the files in the manifest, so the raw data is not scanned again. If the module has typed columns,
+    the rows with values that could not be cast are counted from rejects_path.
+    """
+    rows_by_provider = count_rows_by_provider(spark, output_path)
+    rejected_rows_by_provider = count_rows_by_provider(spark, rejects_path) if rejects_path else {}
+
+    providers = {}
+    for provider, entries in manifest["providers"].items():
+        reused = provider in reused_providers
+        providers[provider] = {
+            "rows": rows_by_provider.get(provider, 0),
+            "rejected_rows": rejected_rows_by_provider.get(provider, 0),
+            "files": len(entries),
+            "bytes_read": 0 if reused else sum(entry["size"] for entry in entries),
+            "reused": reused
+        }
+
+    return {
+        "rows": sum(rows_by_provider.values()),
+        "rejected_rows": sum(rejected_rows_by_provider.values()),
+        "bytes_read": sum(provider_metrics["bytes_read"] for provider_metrics in providers.values()),
+        "providers": providers
+    }
+
+
+def read_metrics(path):
+    metrics_path = os.path.join(path, METRICS_FILE_NAME)
+    if not os.path.exists(metrics_path):
+        return None
+    with open(metrics_path, "r") as f:
+        return json.load(f)
+
+
+def write_metrics(path, metrics):
+    with open(os.path.join(path, METRICS_FILE_NAME), "w") as f:
+        json.dump(metrics, f, indent=2, sort_keys=True)
@@ -1,3 +1,5 @@
+import json
+
 import luigi
 
 from etl.constants import Constants
@@ -10,13 +12,19 @@ from etl.workflow.readers.ncit_reader import ReadOntologyFromObo
 from etl.workflow.readers.ontolia_reader import ReadOntoliaFile
 from etl.workflow.spark_reader import get_tsv_extraction_task_by_module, get_yaml_extraction_task_by_module
 from etl.workflow.config import PdcmConfig
+from etl.workflow.critical_path import CriticalPathPriority
+from etl.workflow.extraction_metrics import METRICS_FILE_NAME, read_metrics
 
 
-class ExtractModuleFromTsv(luigi.Task):
+class ExtractModuleFromTsv(CriticalPathPriority, luigi.Task):
     data_dir = luigi.Parameter()
     providers = luigi.ListParameter()
     data_dir_out = luigi.Parameter()
     module_name = luigi.Parameter()
+    # Set to "yes" to extract all the tsv modules in a single spark session
+    batch_extraction = luigi.Parameter(default="no")
+    # Output folder of a previous release. Providers whose files did not change are copied from there
+    previous_release_dir = luigi.Parameter(default="")
 
     def output(self):
         return PdcmConfig().get_target(
@@ -24,14 +32,17 @@ class ExtractModuleFromTsv(luigi.Task):
 
     def requires(self):
         return get_tsv_extraction_task_by_module(
-            self.data_dir, self.providers, self.data_dir_out, self.module_name)
+            self.data_dir, self.providers, self.data_dir_out, self.module_name,
+            "yes" == str(self.batch_extraction).lower(), self.previous_release_dir)
 
 
-class ExtractModuleFromYaml(luigi.Task):
+class ExtractModuleFromYaml(CriticalPathPriority, luigi.Task):
     data_dir = luigi.Parameter()
     providers = luigi.ListParameter()
     data_dir_out = luigi.Parameter()
     module_name = luigi.Parameter()
+    # Output folder of a previous release. Providers whose files did not change are copied from there
+    previous_release_dir = luigi.Parameter(default="")
 
     def output(self):
         return PdcmConfig().get_target(
@@ -39,7 +50,7 @@ class ExtractModuleFromYaml(luigi.Task):
 
     def requires(self):
         return get_yaml_extraction_task_by_module(
-            self.data_dir, list(self.providers), self.data_dir_out, self.module_name)
+            self.data_dir, list(self.providers), self.data_dir_out, self.module_name, self.previous_release_dir)
 
 
 class ExtractSource(ExtractModuleFromYaml):
@@ -160,5 +171,34 @@ class ExtractModelIdsResources(ReadModelIdsResources):
     module_name = Constants.MODEL_IDS_RESOURCES_MODULE
 
 
+class WriteExtractionMetrics(CriticalPathPriority, luigi.Task):
+    """
+    Gathers the metrics written by the extraction of each tsv and yaml module into a single raw/_metrics.json file, so
+    later stages and reports can use them without reading the raw data again.
+    """
+    data_dir_out = luigi.Parameter()
+
+    def requires(self):
+        return [
+            ExtractSource(), ExtractPatient(), ExtractSample(), ExtractSharing(), ExtractModel(), ExtractCellModel(),
+            ExtractModelValidation(), ExtractMolecularMetadataSample(), ExtractMolecularMetadataPlatform(),
+            ExtractMolecularMetadataPlatformWeb(), ExtractDrugDosing(), ExtractPatientTreatment(), ExtractCna(),
+            ExtractBiomarker(), ExtractImmunemarker(), ExtractExpression(), ExtractMutation(), ExtractImageStudy(),
+            ExtractModelImage()]
+
+    def output(self):
+        return PdcmConfig().get_target(
+            "{0}/{1}/{2}".format(self.data_dir_out, Constants.RAW_DIRECTORY, METRICS_FILE_NAME))
+
+    def run(self):
+        metrics = {}
+        for extraction_task in self.requires():
+            module_metrics = read_metrics(extraction_task.output().path)
+            if module_metrics:
+                metrics[extraction_task.module_name] = module_metrics
+        with self.output().open('w') as outfile:
+            json.dump(metrics, outfile, indent=2, sort_keys=True)
+
+
 if __name__ == "__main__":
     luigi.run()
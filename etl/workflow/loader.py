@@ -1,3 +1,5 @@
+import json
+
 import luigi
 from luigi.contrib.spark import SparkSubmitTask
 
@@ -5,13 +7,17 @@ from etl.constants import Constants
 from etl.entities_registry import get_all_entities_names_to_store_db
 from etl.entities_task_index import get_transformation_class_by_entity_name
 from etl.jobs.load.database_manager import copy_entity_to_database, create_data_visualization_views, get_database_connection, \
-    create_indexes, create_fks, recreate_tables, create_views, run_updates
+    create_indexes_and_fks, create_views_in_parallel, recreate_tables, run_updates, COPY_PROGRESS_TABLE
+from etl.jobs.load.shadow_schema import create_shadow_schemas, get_load_schemas, swap_schemas, validate_schema
 from etl.jobs.util.file_manager import copy_directory
 from etl.workflow.config import PdcmConfig
+from etl.workflow.critical_path import CriticalPathPriority
+from etl.workflow.spark_resources import SparkResources
+from etl.workflow.staged_output import StagedOutput
 from etl.workflow.reporter import WriteReleaseInfoCsv
 
 
-class ParquetToCsv(SparkSubmitTask):
+class ParquetToCsv(CriticalPathPriority, StagedOutput, SparkResources, SparkSubmitTask):
     data_dir_out = luigi.Parameter()
     name = luigi.Parameter()
 
@@ -24,14 +30,32 @@ class ParquetToCsv(SparkSubmitTask):
         return [
             self.input().path,
             self.name,
-            self.output().path
+            self.get_write_path()
         ]
 
     def output(self):
         return PdcmConfig().get_target("{0}/{1}/{2}".format(self.data_dir_out, Constants.DATABASE_FORMATTED, self.name))
 
 
-class CopyEntityFromCsvToDb(luigi.Task):
+class DatabaseSchemas(luigi.Config):
+    """ Schemas where the release is loaded (see etl/jobs/load/shadow_schema.py) """
+    # Set to "yes" to load the release in shadow schemas that are published once the load is complete and validated
+    shadow_schema_load = luigi.Parameter(default="no")
+
+    def is_shadow_load(self):
+        return "yes" == str(self.shadow_schema_load).lower()
+
+    def get_api_schema(self):
+        return get_load_schemas(self.is_shadow_load())[1]
+
+    def get_search_path(self):
+        # Without shadow schemas the connections keep the search path of the database
+        if self.is_shadow_load():
+            return [get_load_schemas(True)[0]]
+        return None
+
+
+class CopyEntityFromCsvToDb(CriticalPathPriority, luigi.Task):
     data_dir = luigi.Parameter()
     providers = luigi.ListParameter()
     data_dir_out = luigi.Parameter()
@@ -43,9 +67,20 @@ class CopyEntityFromCsvToDb(luigi.Task):
     db_user = luigi.Parameter()
     db_password = luigi.Parameter()
     env = luigi.Parameter()
+    # Set to "yes" to load the transformed parquet files with a binary COPY, without converting them to csv
+    binary_copy = luigi.Parameter(default="no")
+    # Number of files of the entity copied at the same time, each one with its own connection
+    max_copy_connections = luigi.IntParameter(default=1)
+
+    def is_binary_copy(self):
+        return "yes" == str(self.binary_copy).lower()
 
     def requires(self):
-        return {'parquetToCsvDependency': ParquetToCsv(name=self.entity_name),
+        if self.is_binary_copy():
+            data_dependency = get_transformation_class_by_entity_name(self.entity_name)
+        else:
+            data_dependency = ParquetToCsv(name=self.entity_name)
+        return {'dataDependency': data_dependency,
                 'recreateTablesDependency': RecreateTables()}
 
     def output(self):
@@ -54,8 +89,9 @@ class CopyEntityFromCsvToDb(luigi.Task):
 
     def run(self):
         copy_entity_to_database(
-            self.entity_name, self.input()['parquetToCsvDependency'].path, self.db_host, self.db_port, self.db_name,
-            self.db_user, self.db_password)
+            self.entity_name, self.input()['dataDependency'].path, self.db_host, self.db_port, self.db_name,
+            self.db_user, self.db_password, self.is_binary_copy(), self.max_copy_connections,
+            DatabaseSchemas().get_search_path())
 
         with self.output().open('w') as outfile:
             outfile.write("Entity {0} copied".format(self.entity_name))
@@ -68,7 +104,7 @@ def get_all_copying_tasks():
     return tasks
 
 
-class RecreateTables(luigi.Task):
+class RecreateTables(CriticalPathPriority, luigi.Task):
     data_dir_out = luigi.Parameter()
     db_host = luigi.Parameter()
     db_port = luigi.Parameter()
@@ -82,15 +118,19 @@ class RecreateTables(luigi.Task):
             "{0}/{1}_{2}/{3}".format(self.data_dir_out, "database", self.env, "tables_recreated"))
 
     def run(self):
-        connection = get_database_connection(self.db_host, self.db_port, self.db_name, self.db_user, self.db_password)
-        recreate_tables(connection)
+        connection = get_database_connection(
+            self.db_host, self.db_port, self.db_name, self.db_user, self.db_password,
+            DatabaseSchemas().get_search_path())
+        if DatabaseSchemas().is_shadow_load():
+            create_shadow_schemas(connection)
+        recreate_tables(connection, DatabaseSchemas().get_api_schema())
         with self.output().open('w') as outfile:
             outfile.write("Tables recreated")
         connection.commit()
         connection.close()
 
 
-class CreateFksAndIndexes(luigi.Task):
+class CreateFksAndIndexes(CriticalPathPriority, luigi.Task):
     data_dir = luigi.Parameter()
     providers = luigi.ListParameter()
     data_dir_out = luigi.Parameter()
@@ -100,6 +140,8 @@ class CreateFksAndIndexes(luigi.Task):
     db_user = luigi.Parameter()
     db_password = luigi.Parameter()
     env = luigi.Parameter()
+    # Number of tables whose indexes, foreign keys or statistics are created at the same time
+    max_index_connections = luigi.IntParameter(default=1)
 
     def requires(self):
         return CopyAll(self.data_dir, self.providers, self.data_dir_out)
@@ -108,18 +150,22 @@ class CreateFksAndIndexes(luigi.Task):
         return PdcmConfig().get_target(
             "{0}/{1}_{2}/{3}".format(self.data_dir_out, "database", self.env, "fks_indexes_created"))
 
+    def get_timings_path(self):
+        return "{0}/{1}_{2}/{3}".format(self.data_dir_out, "database", self.env, "fks_indexes_timings.jsonl")
+
     def run(self):
-        connection = get_database_connection(self.db_host, self.db_port, self.db_name, self.db_user, self.db_password)
+        timings = create_indexes_and_fks(
+            self.db_host, self.db_port, self.db_name, self.db_user, self.db_password, self.max_index_connections,
+            DatabaseSchemas().get_search_path(), get_all_entities_names_to_store_db())
 
-        create_indexes(connection)
-        create_fks(connection)
+        with PdcmConfig().get_target(self.get_timings_path()).open('w') as timings_file:
+            for timing in timings:
+                timings_file.write(json.dumps(timing) + "\n")
         with self.output().open('w') as outfile:
             outfile.write("Fks and indexes created")
-        connection.commit()
-        connection.close()
 
 
-class CopyAll(luigi.Task):
+class CopyAll(CriticalPathPriority, luigi.Task):
     data_dir = luigi.Parameter()
     providers = luigi.ListParameter()
     data_dir_out = luigi.Parameter()
@@ -139,9 +185,11 @@ class CopyAll(luigi.Task):
             outfile.write("All entities copied")
 
 
-class Cache(luigi.Task):
+class Cache(CriticalPathPriority, luigi.Task):
     cache = luigi.Parameter()
     cache_dir = luigi.Parameter()
+    # copy, hardlink or symlink (see file_manager.materialise_directory)
+    cache_mode = luigi.Parameter(default="copy")
     data_dir_out = luigi.Parameter()
 
     def output(self):
@@ -152,12 +200,12 @@ class Cache(luigi.Task):
         if self.cache:
             use_cache = "yes" == str(self.cache).lower()
         if use_cache:
-            copy_directory(self.cache_dir, self.data_dir_out)
+            copy_directory(self.cache_dir, self.data_dir_out, self.cache_mode)
         with self.output().open('w') as outfile:
             outfile.write("use_cache: {0}. folder: {1}".format(use_cache, self.cache_dir))
             
             
-class RunUpdates(luigi.Task):
+class RunUpdates(CriticalPathPriority, luigi.Task):
     db_host = luigi.Parameter()
     db_port = luigi.Parameter()
     db_name = luigi.Parameter()
@@ -181,9 +229,11 @@ class RunUpdates(luigi.Task):
     def run(self):
         print("\n\n********** Updating tables ***********\n")
 
-        connection = get_database_connection(self.db_host, self.db_port, self.db_name, self.db_user, self.db_password)
+        connection = get_database_connection(
+            self.db_host, self.db_port, self.db_name, self.db_user, self.db_password,
+            DatabaseSchemas().get_search_path())
 
-        run_updates(connection)
+        run_updates(connection, DatabaseSchemas().get_api_schema())
         connection.commit()
         connection.close()
 
@@ -193,7 +243,7 @@ class RunUpdates(luigi.Task):
         print("\n********** End Tables Update ***********\n")
 
 
-class CreateDataVisualizationViews(luigi.Task):
+class CreateDataVisualizationViews(CriticalPathPriority, luigi.Task):
     db_host = luigi.Parameter()
     db_port = luigi.Parameter()
     db_name = luigi.Parameter()
@@ -219,9 +269,11 @@ class CreateDataVisualizationViews(luigi.Task):
     def run(self):
         print("\n\n********** Creating data visualization views ***********\n")
 
-        connection = get_database_connection(self.db_host, self.db_port, self.db_name, self.db_user, self.db_password)
+        connection = get_database_connection(
+            self.db_host, self.db_port, self.db_name, self.db_user, self.db_password,
+            DatabaseSchemas().get_search_path())
 
-        create_data_visualization_views(connection)
+        create_data_visualization_views(connection, DatabaseSchemas().get_api_schema())
         connection.commit()
         connection.close()
 
@@ -231,7 +283,7 @@ class CreateDataVisualizationViews(luigi.Task):
         print("\n********** End data visualization views ***********\n")
 
 
-class CreateViews(luigi.Task):
+class CreateViews(CriticalPathPriority, luigi.Task):
     db_host = luigi.Parameter()
     db_port = luigi.Parameter()
     db_name = luigi.Parameter()
@@ -239,6 +291,8 @@ class CreateViews(luigi.Task):
     db_password = luigi.Parameter()
     data_dir_out = luigi.Parameter()
     env = luigi.Parameter()
+    # Number of views (like the materialized ones) created at the same time
+    max_view_connections = luigi.IntParameter(default=1)
     """
         Creates all the views.
     """
@@ -250,22 +304,26 @@ class CreateViews(luigi.Task):
     def requires(self):
         return [RunUpdates()]
 
+    def get_timings_path(self):
+        return "{0}/{1}_{2}/{3}".format(self.data_dir_out, "database", self.env, "views_timings.jsonl")
+
     def run(self):
         print("\n\n********** Loading views ***********\n")
 
-        connection = get_database_connection(self.db_host, self.db_port, self.db_name, self.db_user, self.db_password)
-
-        create_views(connection)
-        connection.commit()
-        connection.close()
+        timings = create_views_in_parallel(
+            self.db_host, self.db_port, self.db_name, self.db_user, self.db_password,
+            DatabaseSchemas().get_api_schema(), self.max_view_connections, DatabaseSchemas().get_search_path())
 
+        with PdcmConfig().get_target(self.get_timings_path()).open('w') as timings_file:
+            for timing in timings:
+                timings_file.write(json.dumps(timing) + "\n")
         with self.output().open('w') as outfile:
             outfile.write("Views created")
 
         print("\n********** End Loading views ***********\n")
 
 
-class LoadPublicDBObjects(luigi.Task):
+class LoadPublicDBObjects(CriticalPathPriority, luigi.Task):
     """
         Loads all the objects (views and materialized views) that are going to be exposed in the schema created for the api.
     """
@@ -285,13 +343,51 @@ class LoadPublicDBObjects(luigi.Task):
         print("\n\n********** Loading all public DB objects ***********\n")
         # yield [CreateMaterializedViews(), CreateViews()]
         yield [CreateViews()]
+        if DatabaseSchemas().is_shadow_load():
+            yield PublishShadowSchemas()
         with self.output().open('w') as outfile:
             outfile.write("all public DB objects loaded")
 
         print("\n********** End Loading all public DB objects ***********\n")
 
 
-class LoadReleaseInfo(luigi.Task):
+class PublishShadowSchemas(CriticalPathPriority, luigi.Task):
+    db_host = luigi.Parameter()
+    db_port = luigi.Parameter()
+    db_name = luigi.Parameter()
+    db_user = luigi.Parameter()
+    db_password = luigi.Parameter()
+    data_dir_out = luigi.Parameter()
+    env = luigi.Parameter()
+    """
+        Validates the shadow schemas and publishes them as the live schemas.
+    """
+
+    def requires(self):
+        return [CreateFksAndIndexes(), LoadReleaseInfo(), RunUpdates(), CreateViews()]
+
+    def output(self):
+        return PdcmConfig().get_target(
+            "{0}/{1}_{2}/{3}".format(self.data_dir_out, "database", self.env, "shadow_schemas_published"))
+
+    def run(self):
+        data_schema = DatabaseSchemas().get_search_path()[0]
+        connection = get_database_connection(
+            self.db_host, self.db_port, self.db_name, self.db_user, self.db_password,
+            DatabaseSchemas().get_search_path())
+
+        errors = validate_schema(connection, data_schema, COPY_PROGRESS_TABLE)
+        if errors:
+            connection.close()
+            raise Exception("The shadow schemas are not valid: {0}".format("; ".join(errors)))
+        swap_schemas(connection)
+        connection.close()
+
+        with self.output().open('w') as outfile:
+            outfile.write("Shadow schemas published")
+
+
+class LoadReleaseInfo(CriticalPathPriority, luigi.Task):
     db_host = luigi.Parameter()
     db_port = luigi.Parameter()
     db_name = luigi.Parameter()
@@ -314,7 +410,7 @@ class LoadReleaseInfo(luigi.Task):
 
         copy_entity_to_database(
             Constants.RELEASE_INFO_ENTITY, self.input().path, self.db_host, self.db_port, self.db_name,
-            self.db_user, self.db_password)
+            self.db_user, self.db_password, search_path=DatabaseSchemas().get_search_path())
 
         with self.output().open('w') as outfile:
             outfile.write("Entity {0} copied".format(Constants.RELEASE_INFO_ENTITY))
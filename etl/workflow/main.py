@@ -1,5 +1,7 @@
 import luigi
 
+from etl.workflow.critical_path import TaskDurations, assign_priorities
+from etl.workflow.extractor import WriteExtractionMetrics
 from etl.workflow.loader import LoadPublicDBObjects, Cache
 
 
@@ -10,7 +12,10 @@ class PdcmEtl(luigi.Task):
     providers = luigi.ListParameter()
 
     def requires(self):
-        return [LoadPublicDBObjects(), Cache()]
+        dependencies = [LoadPublicDBObjects(), Cache(), WriteExtractionMetrics()]
+        # Tasks on the longest chains (by their recorded durations) are started first. The schedule is computed once
+        assign_priorities(dependencies, TaskDurations().task_durations_file)
+        return dependencies
 
 
 if __name__ == "__main__":
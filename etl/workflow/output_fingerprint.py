@@ -0,0 +1,112 @@
+import ast
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+from etl.entities_registry import get_spark_job_by_entity_name
+from etl.workflow.provider_manifest import MANIFEST_FILE_NAME, get_file_hash
+
+FINGERPRINT_FILE_NAME = "_fingerprint.json"
+
+PACKAGE_NAME = "etl"
+PACKAGE_PARENT_FOLDER = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def hash_value(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def get_manifest_fingerprint(manifest):
+    """
+    Fingerprint of an extracted module: the columns read and the content of the files of each provider. The mtime of
+    the files is left out, as copying the data for a new release changes it.
+    """
+    providers = {
+        provider: [(entry["path"], entry["size"], entry["hash"]) for entry in entries]
+        for provider, entries in manifest["providers"].items()}
+    return hash_value(
+        {"columns": manifest["columns"], "column_types": manifest.get("column_types", {}), "providers": providers})
+
+
+def read_output_fingerprint(output_path):
+    """
+    Returns the fingerprint of an output: the one written with it or, for extracted modules, the one of its manifest.
+    Outputs without any (like the ones written before fingerprints existed) return None.
+    """
+    fingerprint_path = os.path.join(output_path, FINGERPRINT_FILE_NAME)
+    if os.path.exists(fingerprint_path):
+        with open(fingerprint_path, "r") as f:
+            return json.load(f)["fingerprint"]
+    manifest_path = os.path.join(output_path, MANIFEST_FILE_NAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r") as f:
+            return get_manifest_fingerprint(json.load(f))
+    return None
+
+
+def write_output_fingerprint(output_path, fingerprint):
+    # Written to a new file and renamed, as the current file can be a hard link to a cached one
+    fingerprint_path = os.path.join(output_path, FINGERPRINT_FILE_NAME)
+    tmp_path = "{0}.tmp-{1}".format(fingerprint_path, os.getpid())
+    with open(tmp_path, "w") as f:
+        json.dump({"fingerprint": fingerprint}, f)
+    os.replace(tmp_path, fingerprint_path)
+
+
+def get_module_file(module_name):
+    module_path = os.path.join(PACKAGE_PARENT_FOLDER, *module_name.split("."))
+    for module_file in [module_path + ".py", os.path.join(module_path, "__init__.py")]:
+        if os.path.isfile(module_file):
+            return module_file
+    return None
+
+
+def get_imported_etl_modules(module_file):
+    """ Names of the modules of the etl package imported anywhere in the file. Some can be functions or classes """
+    with open(module_file, "r") as f:
+        tree = ast.parse(f.read())
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            names.add(node.module)
+            names.update("{0}.{1}".format(node.module, alias.name) for alias in node.names)
+    return [name for name in names if name == PACKAGE_NAME or name.startswith(PACKAGE_NAME + ".")]
+
+
+@lru_cache(maxsize=None)
+def get_code_hash(module_name):
+    """
+    Hash of the source of a module and of all the modules of the etl package that it imports, directly or through
+    other modules. It only changes when the code that the module can run changes.
+    """
+    source_hashes = {}
+    visited = set()
+    pending = [module_name]
+    while pending:
+        name = pending.pop()
+        if name in visited:
+            continue
+        visited.add(name)
+        module_file = get_module_file(name)
+        if module_file is None:
+            continue
+        source_hashes[name] = get_file_hash(module_file)
+        pending.extend(get_imported_etl_modules(module_file))
+    return hash_value(source_hashes)
+
+
+def get_entity_code_hash(entity_name):
+    return get_code_hash(get_spark_job_by_entity_name(entity_name).__module__)
+
+
+def compute_fingerprint(parameters, input_fingerprints):
+    """
+    Computes the fingerprint of an output from the parameters that produce it (name, code hash and configuration) and
+    the fingerprints of its inputs, in order. If the fingerprint of an input is unknown, so is the one of the output.
+    """
+    if any(fingerprint is None for fingerprint in input_fingerprints):
+        return None
+    return hash_value({"parameters": parameters, "inputs": list(input_fingerprints)})
@@ -0,0 +1,103 @@
+import glob
+import hashlib
+import json
+import os
+
+from etl import logger
+
+MANIFEST_FILE_NAME = "_manifest.json"
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def get_file_hash(file_path):
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def get_relative_path(file_path, root_folder):
+    return file_path[file_path.index(root_folder) + len(root_folder) + 1:]
+
+
+def build_file_entry(file_path, root_folder, previous_entries_by_path):
+    """
+    Creates the manifest entry (path, size, mtime and content hash) for a provider file. The path is relative to the
+    root folder so manifests of different releases can be compared. If the previous manifest has an entry with the same
+    path, size and mtime, its hash is reused instead of reading the file again.
+    """
+    stat = os.stat(file_path)
+    relative_path = get_relative_path(file_path, root_folder)
+    previous_entry = previous_entries_by_path.get(relative_path)
+    if previous_entry and previous_entry["size"] == stat.st_size and previous_entry["mtime"] == stat.st_mtime:
+        file_hash = previous_entry["hash"]
+    else:
+        file_hash = get_file_hash(file_path)
+    return {"path": relative_path, "size": stat.st_size, "mtime": stat.st_mtime, "hash": file_hash}
+
+
+def build_module_manifest(path_patterns_by_provider, columns, root_folder, previous_manifest=None, column_types=None):
+    """
+    Builds the manifest of a module: the columns that were read, their types and, for each provider, the list of files
+    matching its path patterns.
+    :param dict path_patterns_by_provider: Path patterns (globs) to read, grouped by provider
+    :param list columns: Columns read for the module
+    :param str root_folder: Folder containing one directory per provider
+    :param dict previous_manifest: Manifest of the previous extraction, if any
+    :param dict column_types: Types declared for the columns of the module, if any
+    :return: Dictionary with the columns, column types and the files by provider
+    """
+    previous_entries_by_path = {}
+    if previous_manifest:
+        for entries in previous_manifest["providers"].values():
+            for entry in entries:
+                previous_entries_by_path[entry["path"]] = entry
+
+    providers = {}
+    for provider, path_patterns in path_patterns_by_provider.items():
+        file_paths = set()
+        for path_pattern in path_patterns:
+            file_paths.update(glob.glob(path_pattern))
+        providers[provider] = [
+            build_file_entry(file_path, root_folder, previous_entries_by_path) for file_path in sorted(file_paths)]
+    return {"columns": list(columns), "column_types": dict(column_types or {}), "providers": providers}
+
+
+def get_unchanged_providers(manifest, previous_manifest):
+    """
+    Returns the providers whose files have the same paths, sizes and content as in the previous manifest. The mtime is
+    not compared because copying the data for a new release changes it without changing the content. Nothing is reused
+    if the columns or their types changed.
+    """
+    if not previous_manifest or previous_manifest["columns"] != manifest["columns"]:
+        return []
+    if previous_manifest.get("column_types", {}) != manifest.get("column_types", {}):
+        return []
+
+    def comparable(entries):
+        return [(entry["path"], entry["size"], entry["hash"]) for entry in entries]
+
+    unchanged_providers = []
+    for provider, entries in manifest["providers"].items():
+        previous_entries = previous_manifest["providers"].get(provider)
+        if entries and previous_entries is not None and comparable(entries) == comparable(previous_entries):
+            unchanged_providers.append(provider)
+    return unchanged_providers
+
+
+def read_manifest(module_output_path):
+    if not module_output_path:
+        return None
+    manifest_path = os.path.join(module_output_path, MANIFEST_FILE_NAME)
+    if not os.path.exists(manifest_path):
+        logger.info("No manifest found in {0}".format(manifest_path))
+        return None
+    with open(manifest_path, "r") as f:
+        return json.load(f)
+
+
+def write_manifest(module_output_path, manifest):
+    with open(os.path.join(module_output_path, MANIFEST_FILE_NAME), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
@@ -10,30 +10,44 @@ from pyspark.sql.types import StructType, StructField, StringType, IntegerType
 
 from etl.constants import Constants
 from etl.workflow.config import PdcmConfig
+from etl.workflow.critical_path import CriticalPathPriority
+from etl.workflow.reference_data_cache import ReferenceDataCache
+from etl.workflow.spark_resources import SparkResources
+from etl.workflow.staged_output import StagedOutput
+
+
+def get_resources_conf_file_path():
+    return "etl/external_resources.yaml" if Path("etl/external_resources.yaml").is_file() else "external_resources.yaml"
+
+
+def get_model_ids_resources_conf_file_path():
+    return \
+        "etl/model_links_resources.yaml" if Path("etl/model_links_resources.yaml").is_file() else "model_links_resources.yaml"
 
 
 @lru_cache(maxsize=None)
 def read_resources_conf_file():
-    external_resources_path = \
-        "etl/external_resources.yaml" if Path("etl/external_resources.yaml").is_file() else "external_resources.yaml"
+    external_resources_path = get_resources_conf_file_path()
     with open(external_resources_path, "r") as ymlFile:
         conf = yaml.safe_load(ymlFile)
     return conf
 
 @lru_cache(maxsize=None)
 def read_model_ids_resources_conf_file():
-    model_links_resources_path = \
-        "etl/model_links_resources.yaml" if Path("etl/model_links_resources.yaml").is_file() else "model_links_resources.yaml"
+    model_links_resources_path = get_model_ids_resources_conf_file_path()
     with open(model_links_resources_path, "r") as ymlFile:
         conf = yaml.safe_load(ymlFile)
     return conf
 
 
-class ReadResources(PySparkTask):
+class ReadResources(CriticalPathPriority, StagedOutput, ReferenceDataCache, SparkResources, PySparkTask):
     data_dir = luigi.Parameter()
     data_dir_out = luigi.Parameter()
     module_name = luigi.Parameter()
 
+    def get_reference_input_paths(self):
+        return [get_resources_conf_file_path()]
+
     def main(self, sc, *args):
         spark = SparkSession(sc)
 
@@ -56,14 +70,20 @@ class ReadResources(PySparkTask):
             "{0}/{1}/{2}".format(self.data_dir_out, Constants.RAW_DIRECTORY, self.module_name))
 
     def app_options(self):
-        return [self.output().path]
+        return [self.get_write_path()]
 
 
-class ReadDownloadedExternalResourcesFromCsv(PySparkTask):
+class ReadDownloadedExternalResourcesFromCsv(CriticalPathPriority, StagedOutput, ReferenceDataCache, SparkResources, PySparkTask):
     data_dir = luigi.Parameter()
     data_dir_out = luigi.Parameter()
     module_name = luigi.Parameter()
 
+    def get_reference_input_paths(self):
+        input_paths = [get_resources_conf_file_path()]
+        for resource_information in read_resources_conf_file()["resources_download_conf"]:
+            input_paths.append(self.data_dir + "/externalDBs/" + resource_information["processed_file"])
+        return input_paths
+
     def main(self, sc, *args):
         spark = SparkSession(sc)
 
@@ -111,14 +131,17 @@ class ReadDownloadedExternalResourcesFromCsv(PySparkTask):
         return [
             self.data_dir,
             self.input().path,
-            self.output().path]
+            self.get_write_path()]
         
         
-class ReadModelIdsResources(PySparkTask):
+class ReadModelIdsResources(CriticalPathPriority, StagedOutput, ReferenceDataCache, SparkResources, PySparkTask):
     data_dir = luigi.Parameter()
     data_dir_out = luigi.Parameter()
     module_name = luigi.Parameter()
 
+    def get_reference_input_paths(self):
+        return [get_model_ids_resources_conf_file_path()]
+
     def main(self, sc, *args):
         spark = SparkSession(sc)
 
@@ -141,7 +164,7 @@ class ReadModelIdsResources(PySparkTask):
             "{0}/{1}/{2}".format(self.data_dir_out, Constants.RAW_DIRECTORY, self.module_name))
 
     def app_options(self):
-        return [self.output().path]
+        return [self.get_write_path()]
 
 
 if __name__ == "__main__":
@@ -6,13 +6,24 @@ from pyspark.sql.functions import col
 
 from etl.constants import Constants
 from etl.workflow.config import PdcmConfig
+from etl.workflow.critical_path import CriticalPathPriority
+from etl.workflow.reference_data_cache import ReferenceDataCache
+from etl.workflow.spark_resources import SparkResources
+from etl.workflow.staged_output import StagedOutput
 
 
-class ReadDiagnosisMappingsFromJson(PySparkTask):
+class ReadDiagnosisMappingsFromJson(CriticalPathPriority, StagedOutput, ReferenceDataCache, SparkResources, PySparkTask):
     data_dir = luigi.Parameter()
     providers = luigi.ListParameter()
     data_dir_out = luigi.Parameter()
 
+    def get_reference_input_paths(self):
+        return [self.data_dir + "/mapping/diagnosis_mappings.json"]
+
+    def get_reference_cache_extra(self):
+        # The rules are filtered by provider
+        return sorted(provider.lower() for provider in self.providers)
+
     def main(self, sc, *args):
         spark = SparkSession(sc)
 
@@ -35,7 +46,7 @@ class ReadDiagnosisMappingsFromJson(PySparkTask):
     def app_options(self):
         return [
             self.data_dir,
-            self.output().path]
+            self.get_write_path()]
 
 
 def read_diagnosis_mapping_file(session, input_path, columns, lower_case_providers):
@@ -57,11 +68,18 @@ def read_diagnosis_mapping_file(session, input_path, columns, lower_case_provide
     return df
 
 
-class ReadTreatmentMappingsFromJson(PySparkTask):
+class ReadTreatmentMappingsFromJson(CriticalPathPriority, StagedOutput, ReferenceDataCache, SparkResources, PySparkTask):
     data_dir = luigi.Parameter()
     providers = luigi.ListParameter()
     data_dir_out = luigi.Parameter()
 
+    def get_reference_input_paths(self):
+        return [self.data_dir + "/mapping/treatment_mappings.json"]
+
+    def get_reference_cache_extra(self):
+        # The rules are filtered by provider
+        return sorted(provider.lower() for provider in self.providers)
+
     def main(self, sc, *args):
         spark = SparkSession(sc)
 
@@ -84,7 +102,7 @@ class ReadTreatmentMappingsFromJson(PySparkTask):
     def app_options(self):
         return [
             self.data_dir,
-            self.output().path]
+            self.get_write_path()]
 
 
 def read_treatment_mapping_file(session, input_path, columns, lower_case_providers):
@@ -5,6 +5,10 @@ import csv
 
 from etl.constants import Constants
 from etl.workflow.config import PdcmConfig
+from etl.workflow.critical_path import CriticalPathPriority
+from etl.workflow.reference_data_cache import ReferenceDataCache
+from etl.workflow.spark_resources import SparkResources
+from etl.workflow.staged_output import StagedOutput
 
 
 def extract_markers(input_path):
@@ -28,10 +32,13 @@ def create_marker_dataframe(markers) -> DataFrame:
     return df
 
 
-class ReadMarkerFromTsv(PySparkTask):
+class ReadMarkerFromTsv(CriticalPathPriority, StagedOutput, ReferenceDataCache, SparkResources, PySparkTask):
     data_dir = luigi.Parameter()
     data_dir_out = luigi.Parameter()
 
+    def get_reference_input_paths(self):
+        return [self.data_dir + "/markers/markers.tsv"]
+
     def main(self, sc, *args):
         spark = SparkSession(sc)
 
@@ -53,4 +60,4 @@ class ReadMarkerFromTsv(PySparkTask):
     def app_options(self):
         return [
             self.data_dir,
-            self.output().path]
+            self.get_write_path()]
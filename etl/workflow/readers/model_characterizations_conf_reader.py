@@ -9,6 +9,10 @@ from pyspark.sql.types import StructType, StructField, StringType, IntegerType
 
 from etl.constants import Constants
 from etl.workflow.config import PdcmConfig
+from etl.workflow.critical_path import CriticalPathPriority
+from etl.workflow.output_fingerprint import hash_value, write_output_fingerprint
+from etl.workflow.spark_resources import SparkResources
+from etl.workflow.staged_output import StagedOutput
 
 
 @lru_cache(maxsize=None)
@@ -21,7 +25,7 @@ def read_model_characterizations_conf_file():
     return conf
 
 
-class ReadModelCharacterizationsConf(PySparkTask):
+class ReadModelCharacterizationsConf(CriticalPathPriority, StagedOutput, SparkResources, PySparkTask):
     data_dir = luigi.Parameter()
     data_dir_out = luigi.Parameter()
     module_name = luigi.Parameter()
@@ -42,13 +46,14 @@ class ReadModelCharacterizationsConf(PySparkTask):
         resources = read_model_characterizations_conf_file()["model_characterizations"]
         df = spark.createDataFrame(data=resources, schema=schema)
         df.write.mode("overwrite").parquet(output_path)
+        write_output_fingerprint(output_path, hash_value(resources))
 
     def output(self):
         return PdcmConfig().get_target(
             "{0}/{1}/{2}".format(self.data_dir_out, Constants.RAW_DIRECTORY, self.module_name))
 
     def app_options(self):
-        return [self.output().path]
+        return [self.get_write_path()]
 
 
 if __name__ == "__main__":
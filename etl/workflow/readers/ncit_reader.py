@@ -1,61 +1,141 @@
 import luigi
+import pyarrow as pa
 from luigi.contrib.spark import PySparkTask
-from pyspark import SparkConf
 from pyspark.sql import SparkSession
 
 from etl.constants import Constants
+from etl.jobs.util.file_manager import get_output_filesystem, write_rows_to_parquet
 from etl.workflow.config import PdcmConfig
+from etl.workflow.critical_path import CriticalPathPriority
+from etl.workflow.reference_data_cache import ReferenceDataCache
+from etl.workflow.spark_resources import SparkResources
+from etl.workflow.staged_output import StagedOutput
+
+OBO_PURL = "http://purl.obolibrary.org/obo/"
+
+# Number of terms kept in memory before they are written to the parquet file as a record batch
+TERMS_BY_BATCH = 10000
+
+ONTOLOGY_TERM_SCHEMA = pa.schema([
+    ("term_id", pa.string()),
+    ("term_name", pa.string()),
+    ("term_url", pa.string()),
+    ("is_a", pa.string()),
+    ("definition", pa.string()),
+    ("synonyms", pa.list_(pa.string())),
+    ("is_obsolete", pa.bool_())
+])
+
+
+def read_quoted_text(value):
+    """
+    Returns the text between the first pair of (not escaped) quotes of an obo value, like the ones in `def:` and
+    `synonym:` lines.
+    """
+    start = value.find('"')
+    if start == -1:
+        return value.strip()
+    text = []
+    escaped = False
+    for char in value[start + 1:]:
+        if escaped:
+            text.append(char)
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            break
+        else:
+            text.append(char)
+    return "".join(text)
+
+
+def new_term():
+    return {"term_id": "", "term_name": "", "definition": None, "synonyms": [], "is_a": [], "is_obsolete": False}
+
+
+def build_term_row(term):
+    return {
+        "term_id": term["term_id"],
+        "term_name": term["term_name"],
+        "term_url": OBO_PURL + term["term_id"].replace(":", "_"),
+        "is_a": ','.join(term["is_a"]),
+        "definition": term["definition"],
+        "synonyms": term["synonyms"],
+        "is_obsolete": term["is_obsolete"]
+    }
+
+
+def parse_obo_terms(lines):
+    """
+    Generator that yields the [Term] stanzas of an obo file, one dictionary by term, while the lines are being read.
+    Other stanzas (like [Typedef]) are skipped.
+    :param lines: Iterable with the lines of the obo file
+    """
+    term = None
+    for line in lines:
+        line = line.strip()
+        if line.startswith("["):
+            if term and term["term_id"]:
+                yield build_term_row(term)
+            term = new_term() if line == "[Term]" else None
 
+        elif term is None:
+            continue
 
-def read_obo_file(session, file_path, columns):
-    term_id = ""
-    term_name = ""
-    term_url = ""
-    term_is_a = []
+        elif line.startswith("id:"):
+            term["term_id"] = line[3:].strip()
 
-    term_list = []
+        elif line.startswith("name:"):
+            term["term_name"] = line[5:].strip()
 
-    if session.sparkContext.master != "yarn":
-        with open(file_path) as fp:
-            lines = fp.readlines()
-    else:
-        rdd = session.sparkContext.textFile(file_path)
-        lines = rdd.collect()
-    for line in lines:
-        if line.strip() == "[Term]":
-            # check if the term is initialised and if so, add it to ontology_terms
-            if term_id != "":
-                term_list.append((term_id, term_name, term_url, ','.join(term_is_a)))
-                # reset term attributes
-                term_id = ""
-                term_name = ""
-                term_url = ""
-                term_is_a = []
+        elif line.startswith("def:"):
+            term["definition"] = read_quoted_text(line[4:])
 
-        elif line.startswith("id:"):
-            term_id = line[4:].strip()
-            term_url = "http://purl.obolibrary.org/obo/" + term_id.replace(":", "_")
+        elif line.startswith("synonym:"):
+            term["synonyms"].append(read_quoted_text(line[8:]))
 
-        elif line.startswith("name:"):
-            term_name = line[5:].strip()
+        elif line.startswith("is_obsolete:"):
+            term["is_obsolete"] = line[12:].strip() == "true"
 
         elif line.startswith("is_a:"):
             start = "is_a:"
             end = "!"
-            is_a_id = line[line.find(start) + len(start):line.rfind(end)].strip()
-            term_is_a.append(is_a_id)
+            end_index = line.rfind(end) if end in line else len(line)
+            term["is_a"].append(line[len(start):end_index].strip())
+
+    if term and term["term_id"]:
+        yield build_term_row(term)
+
+
+def get_obo_lines(session, file_path):
+    if session.sparkContext.master != "yarn":
+        with open(file_path) as fp:
+            yield from fp
+    else:
+        # Lines are fetched one partition at a time so the whole file is never in the driver
+        yield from session.sparkContext.textFile(file_path).toLocalIterator()
+
+
+def write_terms_to_parquet(terms, filesystem, output_path, batch_size=TERMS_BY_BATCH):
+    write_rows_to_parquet(terms, ONTOLOGY_TERM_SCHEMA, filesystem, output_path, batch_size)
 
-    df = session.createDataFrame(data=term_list, schema=columns)
 
-    return df
+def read_obo_file(session, file_path, output_path):
+    """
+    Parses an obo file and writes its terms to output_path as parquet. The file is streamed and written in record
+    batches, so the memory used by the driver does not depend on the size of the ontology.
+    """
+    terms = parse_obo_terms(get_obo_lines(session, file_path))
+    write_terms_to_parquet(terms, get_output_filesystem(session), output_path)
 
 
-class ReadOntologyFromObo(PySparkTask):
+class ReadOntologyFromObo(CriticalPathPriority, StagedOutput, ReferenceDataCache, SparkResources, PySparkTask):
     data_dir = luigi.Parameter()
     data_dir_out = luigi.Parameter()
 
-    def setup(self, conf: SparkConf):
-        conf.set("spark.kryoserializer.buffer.max", "128m")
+    def get_reference_input_paths(self):
+        return [self.data_dir + "/ontology/ncit.obo"]
 
     def main(self, sc, *args):
         spark = SparkSession(sc)
@@ -63,9 +143,7 @@ class ReadOntologyFromObo(PySparkTask):
         input_path = args[0]
         output_path = args[1]
 
-        columns = ["term_id", "term_name", "term_url", "is_a"]
-        df = read_obo_file(spark, input_path + "/ontology/ncit.obo", columns)
-        df.write.mode("overwrite").parquet(output_path)
+        read_obo_file(spark, input_path + "/ontology/ncit.obo", output_path)
 
     def output(self):
         return PdcmConfig().get_target(
@@ -74,4 +152,4 @@ class ReadOntologyFromObo(PySparkTask):
     def app_options(self):
         return [
             self.data_dir,
-            self.output().path]
+            self.get_write_path()]
@@ -5,9 +5,13 @@ from pyspark.sql.types import *
 
 from etl.constants import Constants
 from etl.workflow.config import PdcmConfig
+from etl.workflow.critical_path import CriticalPathPriority
+from etl.workflow.reference_data_cache import ReferenceDataCache
+from etl.workflow.spark_resources import SparkResources
+from etl.workflow.staged_output import StagedOutput
 
 
-class ReadOntoliaFile(PySparkTask):
+class ReadOntoliaFile(CriticalPathPriority, StagedOutput, ReferenceDataCache, SparkResources, PySparkTask):
     """
         Reads the output file of Ontolia, a service that links regimen to treatments.
 
@@ -18,8 +22,11 @@ class ReadOntoliaFile(PySparkTask):
     data_dir = luigi.Parameter()
     data_dir_out = luigi.Parameter()
 
+    def get_reference_input_paths(self):
+        return [self.data_dir + "/ontology/ontolia_output.txt"]
+
     def app_options(self):
-        return [self.data_dir, self.output().path]
+        return [self.data_dir, self.get_write_path()]
 
     def main(self, sc, *args):
         spark = SparkSession(sc)
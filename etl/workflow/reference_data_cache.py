@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+
+import luigi
+
+from etl import logger
+from etl.jobs.util.file_manager import HARDLINK_MODE, materialise_directory, remove_path
+from etl.workflow.output_fingerprint import write_output_fingerprint
+from etl.workflow.provider_manifest import get_file_hash
+
+CACHE_ENTRY_FILE_NAME = "_reference_cache.json"
+
+
+def compute_cache_key(reader_name, reader_version, input_paths, extra=None):
+    """
+    Computes the key of a reference data artifact: a hash of the reader (name and version), the content of its input
+    files and any extra value that changes the output (like the list of providers).
+    """
+    inputs = [{"file": os.path.basename(path), "hash": get_file_hash(path)} for path in sorted(input_paths)]
+    key_content = {"reader": reader_name, "version": reader_version, "inputs": inputs, "extra": extra}
+    return hashlib.sha256(json.dumps(key_content, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def copy_cache_entry(source, destination):
+    """ Cache entries are never modified, so their files are hard linked instead of copied when possible """
+    remove_path(destination)
+    materialise_directory(source, destination, HARDLINK_MODE)
+
+
+def store_cache_entry(output_path, cache_entry_path, cache_key):
+    """
+    Copies the output of a task into the cache. The copy is done in a temporary folder and then renamed so a
+    partially copied entry is never used.
+    """
+    tmp_path = "{0}.tmp-{1}".format(cache_entry_path, os.getpid())
+    copy_cache_entry(output_path, tmp_path)
+    with open(os.path.join(tmp_path, CACHE_ENTRY_FILE_NAME), "w") as f:
+        json.dump({"key": cache_key}, f)
+    os.makedirs(os.path.dirname(cache_entry_path), exist_ok=True)
+    if os.path.exists(cache_entry_path):
+        remove_path(tmp_path)
+    else:
+        os.rename(tmp_path, cache_entry_path)
+
+
+def run_with_cache(cache_name, cache_key, cache_entry_path, output_path, run):
+    """
+    Copies the cache entry to output_path if it exists. Otherwise calls run, which writes output_path, and stores the
+    output in the cache entry. The key is written in the output as its fingerprint. Without a key nothing is cached.
+    """
+    if cache_entry_path and os.path.exists(cache_entry_path):
+        logger.info("Reusing {0} from cache {1}".format(cache_name, cache_entry_path))
+        copy_cache_entry(cache_entry_path, output_path)
+    else:
+        run()
+    if cache_key is None:
+        return
+    write_output_fingerprint(output_path, cache_key)
+    if cache_entry_path and not os.path.exists(cache_entry_path):
+        logger.info("Storing {0} in cache {1}".format(cache_name, cache_entry_path))
+        store_cache_entry(output_path, cache_entry_path, cache_key)
+
+
+def get_cache_entry_path(cache_dir, cache_name, cache_key):
+    if not cache_dir or cache_key is None:
+        return None
+    return os.path.join(cache_dir, cache_name, cache_key)
+
+
+class CachedOutput(object):
+    """
+    Mixin for the tasks whose output is fully determined by a key (get_cache_key). The key is written next to the
+    output as its fingerprint. If the task has a cache folder (get_cache_dir), the output is stored there by its key
+    and, before running the task, an output with the same key is looked for and copied instead.
+    With a staged output, this mixin goes after StagedOutput, so the cached output is copied to the staging folder.
+    """
+
+    def get_cache_key(self):
+        raise NotImplementedError("subclass should compute the key of the output")
+
+    def get_cache_dir(self):
+        raise NotImplementedError("subclass should define the cache folder")
+
+    def get_cache_name(self):
+        return self.__class__.__name__
+
+    def get_write_path(self):
+        # Tasks with a staged output (StagedOutput) write to their staging folder
+        return self.output().path
+
+    def get_cache_entry_path(self, cache_key):
+        return get_cache_entry_path(self.get_cache_dir(), self.get_cache_name(), cache_key)
+
+    def run(self):
+        cache_key = self.get_cache_key()
+        run_with_cache(
+            self.get_cache_name(), cache_key, self.get_cache_entry_path(cache_key), self.get_write_path(), super().run)
+
+
+class ReferenceDataCache(CachedOutput):
+    """
+    Mixin for the tasks that read reference data (markers, mapping rules, ontologies, external resources). Before
+    running the task, it looks in reference_data_cache_dir for an artifact created by the same reader version from
+    input files with the same content. If there is one, it is copied as the output and the spark job is not
+    submitted. Otherwise the task runs and its output is added to the cache.
+    The cache is only used when reference_data_cache_dir is set and all the input files are local files.
+    """
+    reference_data_cache_dir = luigi.Parameter(default="")
+
+    """ Must be increased when a change in the reader changes its output for the same inputs """
+    reader_version = 1
+
+    def get_reference_input_paths(self):
+        raise NotImplementedError("subclass should define the input files of the reader")
+
+    def get_reference_cache_extra(self):
+        return None
+
+    def get_cache_dir(self):
+        return self.reference_data_cache_dir
+
+    def get_cache_key(self):
+        input_paths = self.get_reference_input_paths()
+        if not all(os.path.isfile(path) for path in input_paths):
+            return None
+        return compute_cache_key(
+            self.__class__.__name__, self.reader_version, input_paths, self.get_reference_cache_extra())
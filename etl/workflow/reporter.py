@@ -7,9 +7,12 @@ from pyspark.sql.types import StructType, StructField, StringType, DateType, Arr
 
 from etl.jobs.util.dataframe_functions import flatten_array_columns
 from etl.workflow.config import PdcmConfig
+from etl.workflow.critical_path import CriticalPathPriority
+from etl.workflow.spark_resources import SparkResources
+from etl.workflow.staged_output import StagedOutput
 
 
-class WriteReleaseInfoCsv(PySparkTask):
+class WriteReleaseInfoCsv(CriticalPathPriority, StagedOutput, SparkResources, PySparkTask):
     """
         Generate data for release_info.
     """
@@ -46,7 +49,7 @@ class WriteReleaseInfoCsv(PySparkTask):
 
         df.coalesce(1).write.option("sep", "\t").option("quote", "\u0000").option(
             "header", "true"
-        ).mode("overwrite").csv(self.output().path)
+        ).mode("overwrite").csv(self.get_write_path())
 
 
 # class ExecuteAnalysis(luigi.Task):
@@ -0,0 +1,67 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import yaml
+
+
+@lru_cache(maxsize=None)
+def read_spark_profiles():
+    spark_profiles_path = "etl/spark_profiles.yaml" if Path("etl/spark_profiles.yaml").is_file() \
+        else "spark_profiles.yaml"
+    with open(spark_profiles_path, "r") as ymlFile:
+        conf = yaml.safe_load(ymlFile)
+    return conf
+
+
+def get_input_size(paths):
+    """ Total size in bytes of the files in the given paths (files or folders). Paths that do not exist are ignored """
+    size = 0
+    for path in paths:
+        if os.path.isfile(path):
+            size += os.path.getsize(path)
+        for root, _, files in os.walk(path):
+            size += sum(os.path.getsize(os.path.join(root, file_name)) for file_name in files)
+    return size
+
+
+def get_size_profile_name(size_profiles, input_size):
+    for size_profile in size_profiles:
+        max_input_mb = size_profile.get("max_input_mb")
+        if max_input_mb is None or input_size <= max_input_mb * 1024 * 1024:
+            return size_profile["profile"]
+    return None
+
+
+def get_entity_profile(spark_profiles, entity_name, input_size):
+    """
+    Returns the spark profile (a dictionary) of an entity: the one set for the entity in spark_profiles.yaml or, if it
+    has none, the one that corresponds to the size of its inputs.
+    """
+    entity_profile = spark_profiles.get("entities", {}).get(entity_name)
+    if entity_profile is None:
+        entity_profile = get_size_profile_name(spark_profiles.get("size_profiles", []), input_size)
+    if entity_profile is None:
+        return {}
+    if isinstance(entity_profile, str):
+        entity_profile = {"profile": entity_profile}
+
+    profile = dict(spark_profiles["profiles"][entity_profile["profile"]]) if "profile" in entity_profile else {}
+    profile.update({key: value for key, value in entity_profile.items() if key != "profile"})
+    return profile
+
+
+def get_profile_spark_conf(profile):
+    """ Spark properties (for --conf) with the shuffle and adaptive query execution settings of a profile """
+    conf = {}
+    if "shuffle_partitions" in profile:
+        conf["spark.sql.shuffle.partitions"] = str(profile["shuffle_partitions"])
+    if "adaptive" in profile:
+        conf["spark.sql.adaptive.enabled"] = str(profile["adaptive"]).lower()
+    if "coalesce_partitions" in profile:
+        conf["spark.sql.adaptive.coalescePartitions.enabled"] = str(profile["coalesce_partitions"]).lower()
+    if "skew_join" in profile:
+        conf["spark.sql.adaptive.skewJoin.enabled"] = str(profile["skew_join"]).lower()
+    if "advisory_partition_size" in profile:
+        conf["spark.sql.adaptive.advisoryPartitionSizeInBytes"] = str(profile["advisory_partition_size"])
+    return conf
@@ -1,33 +1,122 @@
 import glob
 import json
+import os
 import time
 import yaml
+from concurrent.futures import ProcessPoolExecutor
 
 import luigi
 from luigi.contrib.spark import PySparkTask
 from py4j.protocol import Py4JJavaError
 from pyspark import SparkContext
 from pyspark.sql import DataFrame, SparkSession
-from pyspark.sql.utils import IllegalArgumentException
-from pyspark.sql.functions import lit, input_file_name, regexp_extract
-from pyspark.sql.types import StructType, StructField, StringType
+from pyspark.sql.utils import AnalysisException, IllegalArgumentException
+from pyspark.sql.functions import col, concat_ws, lit, trim, when
+from pyspark.sql.types import StructType, StructField, StringType, IntegerType, LongType, DoubleType, BooleanType
 
 from etl import logger
 from etl.constants import Constants
 from etl.jobs.util.cleaner import trim_all_str
-from etl.source_files_conf_reader import read_module
+from etl.source_files_conf_reader import read_module, read_modules_by_type
+from etl.workflow.extraction_metrics import collect_module_metrics, write_metrics
+from etl.workflow.provider_manifest import build_module_manifest, get_unchanged_providers, read_manifest, \
+    write_manifest
 from etl.workflow.config import PdcmConfig
+from etl.workflow.critical_path import CriticalPathPriority
+from etl.workflow.spark_resources import SparkResources
+from etl.workflow.staged_output import StagedOutput, staged_write
 
 ROOT_FOLDER = "data/UPDOG"
 
-
-def build_schema_from_cols(columns):
+# Folder (inside the raw output of a module) with the rows that have values that could not be cast to the type
+# declared for their column. Spark ignores folders starting with "_" when reading the module output
+REJECTS_FOLDER = "_rejects"
+
+REJECTED_COLUMNS_COLUMN = "rejected_columns"
+
+COLUMN_TYPES = {
+    "string": StringType(),
+    "integer": IntegerType(),
+    "long": LongType(),
+    "double": DoubleType(),
+    "boolean": BooleanType()
+}
+
+# Integral values can be written with a zero fraction ("7157.0"). Values like "1.5" are rejected, as the cast to an
+# integer type would truncate them
+INTEGER_PATTERN = r"^[+-]?[0-9]+(\.0*)?$"
+DECIMAL_PATTERN = r"^[+-]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?$"
+# Special values accepted by both the spark double cast and postgres numeric
+SPECIAL_DECIMAL_PATTERN = r"^(?i)(nan|[+-]?inf|[+-]?infinity)$"
+
+VALUE_PATTERNS = {
+    "integer": INTEGER_PATTERN,
+    "long": INTEGER_PATTERN,
+    "double": DECIMAL_PATTERN
+}
+
+
+def get_column_type(column_type_name):
+    if column_type_name not in COLUMN_TYPES:
+        raise ValueError("Unsupported column type '{0}'. Valid types are: {1}".format(
+            column_type_name, ", ".join(COLUMN_TYPES.keys())))
+    return COLUMN_TYPES[column_type_name]
+
+
+def build_schema_from_cols(columns, column_types=None):
+    """
+    Builds the schema of a module. Columns without a type in column_types are strings.
+    """
+    column_types = column_types or {}
     schema = []
     for column in columns:
-        schema.append(StructField(column, StringType(), True))
+        schema.append(StructField(column, get_column_type(column_types.get(column, "string")), True))
     return StructType(schema)
 
 
+def is_valid_value(value, column_type_name):
+    """
+    Condition that is true when a trimmed, non empty value has the type of its column. The value has to match the
+    pattern of the type before being cast, as the cast accepts values like "1.5" for an integer (truncating them).
+    """
+    is_valid = value.cast(get_column_type(column_type_name)).isNotNull()
+    if column_type_name in VALUE_PATTERNS:
+        matches_pattern = value.rlike(VALUE_PATTERNS[column_type_name])
+        if column_type_name == "double":
+            matches_pattern = matches_pattern | value.rlike(SPECIAL_DECIMAL_PATTERN)
+        is_valid = matches_pattern & is_valid
+    return is_valid
+
+
+def cast_columns(df: DataFrame, column_types) -> DataFrame:
+    """
+    Casts the columns of a dataframe read as strings to the types declared for them. Empty values become null. The
+    dataframe should not have rejected rows (see split_rejected_rows).
+    """
+    for column, column_type_name in column_types.items():
+        value = trim(col(column))
+        df = df.withColumn(column, when(value != "", value.cast(get_column_type(column_type_name))))
+    return df
+
+
+def split_rejected_rows(df: DataFrame, column_types):
+    """
+    Splits a dataframe read as strings in the rows whose values have the types declared for their columns and the rows
+    with at least one non empty value that does not. The rejected rows keep their original values and have an extra
+    column with the names of the columns that failed.
+
+    :return: Tuple with the valid rows and the rejected rows
+    """
+    failed_conditions = []
+    for column, column_type_name in column_types.items():
+        value = trim(col(column))
+        failed_conditions.append(when((value != "") & ~is_valid_value(value, column_type_name), lit(column)))
+    df = df.withColumn(REJECTED_COLUMNS_COLUMN, concat_ws(",", *failed_conditions))
+    valid_df = df.where(col(REJECTED_COLUMNS_COLUMN) == "").drop(REJECTED_COLUMNS_COLUMN)
+    rejects_df = df.where(col(REJECTED_COLUMNS_COLUMN) != "")
+    return valid_df, rejects_df
+
+
 def select_rows_with_data(df: DataFrame, columns) -> DataFrame:
     print(f"cols from select_rows_with_data: {columns}")
     if "Field" in df.columns:
@@ -44,34 +133,54 @@ def clean_column_names(df: DataFrame):
     return df
 
 
+def group_path_patterns_by_provider(path_patterns):
+    path_patterns_by_provider = {}
+    for path_pattern in path_patterns:
+        provider = extract_provider_name(path_pattern)
+        path_patterns_by_provider.setdefault(provider, []).append(path_pattern)
+    return path_patterns_by_provider
+
+
 def read_files(session, path_patterns, schema):
     start = time.time()
 
-    df = session.read.option('sep', '\t').option('header', True).option('schema', schema).csv(
-        [p.replace("'", "") for p in path_patterns])
-    df = clean_column_names(df)
-    df = select_rows_with_data(df, schema.fieldNames())
-    datasource_pattern = "{0}\\/([a-zA-Z-]+)(\\/)".format(ROOT_FOLDER.replace("/", "\\/"))
-    df = df.withColumn("_data_source", lit(input_file_name()))
-    df = df.withColumn(Constants.DATA_SOURCE_COLUMN, regexp_extract("_data_source", datasource_pattern, 1))
-    df = df.drop("_data_source")
+    # The provider is the directory each path pattern points to, so the files of each provider are tagged with a
+    # literal instead of parsing the file name of every row. Spark combines the reads in a single union
+    df = None
+    path_patterns_by_provider = group_path_patterns_by_provider([p.replace("'", "") for p in path_patterns])
+    for provider, provider_path_patterns in path_patterns_by_provider.items():
+        provider_df = session.read.option('sep', '\t').option('header', True).option('schema', schema).csv(
+            provider_path_patterns)
+        provider_df = clean_column_names(provider_df)
+        provider_df = select_rows_with_data(provider_df, schema.fieldNames())
+        provider_df = provider_df.withColumn(Constants.DATA_SOURCE_COLUMN, lit(provider))
+        df = provider_df if df is None else df.unionByName(provider_df)
 
     end = time.time()
-    logger.info(
-        "Read from path {0} count: {1} in {2} seconds".format(path_patterns, df.count(), round(end - start, 4)))
+    logger.info("Prepared read from path {0} in {1} seconds".format(path_patterns, round(end - start, 4)))
     return df
 
 
-def read_json(session, json_content):
-    df = session.read.option("multiline", True).json(session.sparkContext.parallelize([json_content]))
-    return df
+def write_partitioned_by_provider(session, df: DataFrame, output_path):
+    """
+    Writes a raw dataframe partitioned by provider, so the partitions of unchanged providers can be reused later.
+    A partitioned write of an empty dataframe does not produce any parquet file, so in that case a non partitioned
+    empty parquet is written to keep the schema.
+    """
+    df.write.mode("overwrite").partitionBy(Constants.DATA_SOURCE_COLUMN).parquet(output_path)
+    try:
+        session.read.parquet(output_path)
+    except AnalysisException:
+        df.limit(0).write.mode("overwrite").parquet(output_path)
 
 
-class ReadByModuleAndPathPatterns(PySparkTask):
+class ReadByModuleAndPathPatterns(CriticalPathPriority, StagedOutput, SparkResources, PySparkTask):
     raw_folder_name = luigi.Parameter()
     path_patterns = luigi.ListParameter()
     columns_to_read = luigi.ListParameter()
     data_dir_out = luigi.Parameter()
+    previous_release_dir = luigi.Parameter(default="")
+    column_types = luigi.DictParameter(default={})
 
     def output(self):
         return PdcmConfig().get_target(
@@ -81,7 +190,9 @@ class ReadByModuleAndPathPatterns(PySparkTask):
         return [
             f"'{','.join([p for p in self.path_patterns])}'",
             ','.join(self.columns_to_read),
-            self.output().path]
+            self.get_write_path(),
+            get_previous_raw_path(self.previous_release_dir, self.raw_folder_name),
+            json.dumps(dict(self.column_types))]
 
     def main(self, sc: SparkContext, *args):
         spark = SparkSession(sc)
@@ -89,23 +200,124 @@ class ReadByModuleAndPathPatterns(PySparkTask):
         path_patterns = args[0].split(',')
         columns_to_read = args[1].split(',')
         output_path = args[2]
+        previous_output_path = args[3]
+        column_types = json.loads(args[4])
+
+        extract_tsv_module(spark, path_patterns, columns_to_read, output_path, previous_output_path, column_types)
+
 
-        schema = build_schema_from_cols(columns_to_read)
+def get_previous_raw_path(previous_release_dir, module_name):
+    if not previous_release_dir:
+        return ""
+    return "{0}/{1}/{2}".format(previous_release_dir, Constants.RAW_DIRECTORY, module_name)
 
-        try:
-            if path_patterns == ["''"]:
-                raise IOError("Empty path")
-            df = read_files(spark, path_patterns, schema)
-        except (Py4JJavaError, IllegalArgumentException, FileNotFoundError, IOError) as error:
-            no_empty_patterns = list(filter(lambda x: x != '', path_patterns))
-            if "java.io.FileNotFoundException" in str(error) or len(no_empty_patterns) == 0 or error.__class__ in [
-                FileNotFoundError, IOError]:
-                empty_df = spark.createDataFrame(sc.emptyRDD(), schema)
-                df = empty_df
-                df = df.withColumn(Constants.DATA_SOURCE_COLUMN, lit(""))
-            else:
-                raise error
-        df.write.mode("overwrite").parquet(output_path)
+
+def read_previous_partitions(spark, previous_output_path, providers):
+    """
+    Reads the partitions of the given providers from the raw output of a previous release.
+    """
+    partition_paths = []
+    for provider in providers:
+        partition_path = "{0}/{1}={2}".format(previous_output_path, Constants.DATA_SOURCE_COLUMN, provider)
+        if os.path.exists(partition_path):
+            partition_paths.append(partition_path)
+    logger.info("Reusing data for providers {0} from {1}".format(providers, previous_output_path))
+    if len(partition_paths) == 0:
+        return None
+    df = spark.read.option("basePath", previous_output_path).parquet(*partition_paths)
+    return df.withColumn(Constants.DATA_SOURCE_COLUMN, col(Constants.DATA_SOURCE_COLUMN).cast(StringType()))
+
+
+def create_empty_raw_df(spark, schema):
+    df = spark.createDataFrame(spark.sparkContext.emptyRDD(), schema)
+    return df.withColumn(Constants.DATA_SOURCE_COLUMN, lit(""))
+
+
+def extract_tsv_module(spark, path_patterns, columns_to_read, output_path, previous_output_path="", column_types=None):
+    """
+    Reads the tsv files matching the path patterns and writes them as a parquet file in the output path. If no file
+    exists for the module, an empty parquet with the expected columns is written instead.
+    Columns with a type in column_types are cast to it. Rows with values that do not have the declared type are left
+    out of the output and written, with their original values, to the rejects folder of the output.
+    A manifest of the files read is written next to the parquet. If the manifest of a previous extraction is available
+    in previous_output_path, the providers whose files did not change are copied from there instead of being read again.
+    """
+    column_types = dict(column_types or {})
+    schema = build_schema_from_cols(columns_to_read, column_types)
+    path_patterns = [p.replace("'", "") for p in path_patterns]
+    path_patterns = list(filter(lambda x: x != '', path_patterns))
+
+    previous_manifest = read_manifest(previous_output_path)
+    manifest = build_module_manifest(
+        group_path_patterns_by_provider(path_patterns), columns_to_read, ROOT_FOLDER, previous_manifest, column_types)
+    reused_providers = get_unchanged_providers(manifest, previous_manifest)
+    path_patterns_to_read = [p for p in path_patterns if extract_provider_name(p) not in reused_providers]
+
+    rejects_df = None
+    try:
+        if len(path_patterns_to_read) == 0:
+            raise IOError("Empty path")
+        df = read_files(spark, path_patterns_to_read, schema)
+        if column_types:
+            df, rejects_df = split_rejected_rows(df, column_types)
+            df = cast_columns(df, column_types)
+    except (Py4JJavaError, IllegalArgumentException, FileNotFoundError, IOError) as error:
+        if "java.io.FileNotFoundException" in str(error) or error.__class__ in [FileNotFoundError, IOError]:
+            df = create_empty_raw_df(spark, schema)
+        else:
+            raise error
+
+    if reused_providers:
+        reused_df = read_previous_partitions(spark, previous_output_path, reused_providers)
+        if reused_df is not None:
+            df = df.unionByName(reused_df)
+        if column_types:
+            reused_rejects_df = read_previous_partitions(
+                spark, os.path.join(previous_output_path, REJECTS_FOLDER), reused_providers)
+            if reused_rejects_df is not None:
+                rejects_df = reused_rejects_df if rejects_df is None else rejects_df.unionByName(reused_rejects_df)
+
+    write_partitioned_by_provider(spark, df, output_path)
+    rejects_path = None
+    if column_types:
+        rejects_path = os.path.join(output_path, REJECTS_FOLDER)
+        if rejects_df is None:
+            rejects_df = create_empty_raw_df(spark, build_schema_from_cols(columns_to_read)) \
+                .withColumn(REJECTED_COLUMNS_COLUMN, lit(""))
+        write_partitioned_by_provider(spark, rejects_df, rejects_path)
+    write_manifest(output_path, manifest)
+    write_metrics(output_path, collect_module_metrics(spark, output_path, manifest, reused_providers, rejects_path))
+
+
+class ReadAllTsvModules(CriticalPathPriority, SparkResources, PySparkTask):
+    """
+    Extracts all the tsv modules defined in sources.yaml for all the providers in a single spark session. It writes
+    the same raw/<module> outputs as ReadByModuleAndPathPatterns, but avoids starting a spark job per module.
+    """
+    data_dir = luigi.Parameter()
+    providers = luigi.ListParameter()
+    data_dir_out = luigi.Parameter()
+    previous_release_dir = luigi.Parameter(default="")
+
+    def output(self):
+        targets = {}
+        for module in read_modules_by_type("tsv"):
+            targets[module["name"]] = PdcmConfig().get_target(
+                "{0}/{1}/{2}".format(self.data_dir_out, Constants.RAW_DIRECTORY, module["name"]))
+        return targets
+
+    def main(self, sc: SparkContext, *args):
+        spark = SparkSession(sc)
+        outputs = self.output()
+
+        for module in read_modules_by_type("tsv"):
+            module_name = module["name"]
+            path_patterns = build_path_patterns(self.data_dir, list(self.providers), module["name_patterns"])
+            logger.info("Extracting module {0} from {1}".format(module_name, path_patterns))
+            with staged_write(outputs[module_name].path) as staging_path:
+                extract_tsv_module(
+                    spark, path_patterns, module["columns"], staging_path,
+                    get_previous_raw_path(self.previous_release_dir, module_name), module.get("column_types"))
 
 
 def build_path_patterns(data_dir, providers, file_patterns):
@@ -127,13 +339,18 @@ def build_path_pattern_by_provider(data_dir, provider, file_pattern):
     return path_pattern
 
 
-def get_tsv_extraction_task_by_module(data_dir, providers, data_dir_out, module_name):
+def get_tsv_extraction_task_by_module(
+        data_dir, providers, data_dir_out, module_name, batch_extraction=False, previous_release_dir=""):
+    if batch_extraction:
+        return ReadAllTsvModules(data_dir, providers, data_dir_out, previous_release_dir)
     module = read_module(module_name)
     file_patterns = module["name_patterns"]
     columns = module["columns"]
+    column_types = module.get("column_types", {})
     path_patterns = build_path_patterns(data_dir, list(providers), file_patterns)
     print(f"from get_tsv_extraction_task_by_module: {path_patterns}")
-    return ReadByModuleAndPathPatterns(module_name, path_patterns, columns, data_dir_out)
+    return ReadByModuleAndPathPatterns(
+        module_name, path_patterns, columns, data_dir_out, previous_release_dir, column_types)
 
 
 def extract_provider_name(path: str):
@@ -142,17 +359,51 @@ def extract_provider_name(path: str):
     return path[init_index:next_slash]
 
 
-def get_json_by_yaml(yaml_content):
-    yaml_as_json = yaml.safe_load(yaml_content)
-    yaml_as_json = json.dumps(yaml_as_json)
-    return yaml_as_json
-
-
-class ReadYamlsByModule(PySparkTask):
+def yaml_value_to_str(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return str(value).lower()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+def read_yaml_rows(yaml_file_path, columns_to_read):
+    """
+    Parses a provider yaml file into rows with the values of the given columns (as strings) and the provider name.
+    The file can contain a single object or a list of them.
+    """
+    provider = extract_provider_name(yaml_file_path)
+    with open(yaml_file_path, 'r') as stream:
+        content = yaml.safe_load(stream)
+    if content is None:
+        return []
+    records = content if isinstance(content, list) else [content]
+    return [
+        tuple(yaml_value_to_str(record.get(column)) for column in columns_to_read) + (provider,)
+        for record in records]
+
+
+def read_yaml_files(yaml_file_paths, columns_to_read):
+    """
+    Parses the yaml files in parallel with a pool of processes and returns all their rows in a single list.
+    """
+    if len(yaml_file_paths) <= 1:
+        return [row for path in yaml_file_paths for row in read_yaml_rows(path, columns_to_read)]
+    max_workers = min(len(yaml_file_paths), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        rows_by_file = executor.map(
+            read_yaml_rows, yaml_file_paths, [columns_to_read] * len(yaml_file_paths))
+        return [row for rows in rows_by_file for row in rows]
+
+
+class ReadYamlsByModule(CriticalPathPriority, StagedOutput, SparkResources, PySparkTask):
     raw_folder_name = luigi.Parameter()
     yaml_paths = luigi.ListParameter()
     columns_to_read = luigi.ListParameter()
     data_dir_out = luigi.Parameter()
+    previous_release_dir = luigi.Parameter(default="")
 
     def output(self):
         return PdcmConfig().get_target(
@@ -162,7 +413,8 @@ class ReadYamlsByModule(PySparkTask):
         return [
             ','.join(self.yaml_paths),
             ','.join(self.columns_to_read),
-            self.output().path]
+            self.get_write_path(),
+            get_previous_raw_path(self.previous_release_dir, self.raw_folder_name)]
 
     def main(self, sc, *args):
         spark = SparkSession(sc)
@@ -170,29 +422,30 @@ class ReadYamlsByModule(PySparkTask):
         yaml_file_paths = args[0].split(',')
         columns_to_read = args[1].split(',')
         output_path = args[2]
+        previous_output_path = args[3]
+
+        previous_manifest = read_manifest(previous_output_path)
+        manifest = build_module_manifest(
+            group_path_patterns_by_provider(yaml_file_paths), columns_to_read, ROOT_FOLDER, previous_manifest)
+        reused_providers = get_unchanged_providers(manifest, previous_manifest)
 
-        all_json_and_providers = []
+        yaml_file_paths_to_read = [p for p in yaml_file_paths if extract_provider_name(p) not in reused_providers]
+        rows = read_yaml_files(yaml_file_paths_to_read, columns_to_read)
 
-        for yaml_file_path in yaml_file_paths:
-            with open(yaml_file_path, 'r') as stream:
-                yaml_as_json = get_json_by_yaml(stream)
-                json_content_and_provider = (yaml_as_json, extract_provider_name(yaml_file_path))
-                all_json_and_providers.append(json_content_and_provider)
+        schema = build_schema_from_cols(columns_to_read).add(Constants.DATA_SOURCE_COLUMN, StringType(), True)
+        source_df = spark.createDataFrame(rows, schema)
 
-        source_df = spark.createDataFrame(spark.sparkContext.emptyRDD(), build_schema_from_cols(columns_to_read))
-        source_df = source_df.withColumn(Constants.DATA_SOURCE_COLUMN, lit(None).astype(StringType()))
-        for json_and_provider in all_json_and_providers:
-            json_content = json_and_provider[0]
-            provider = json_and_provider[1]
-            df = read_json(spark, json_content)
-            df = df.select(columns_to_read)
-            df = df.withColumn(Constants.DATA_SOURCE_COLUMN, lit(provider))
-            source_df = source_df.union(df)
+        if reused_providers:
+            reused_df = read_previous_partitions(spark, previous_output_path, reused_providers)
+            if reused_df is not None:
+                source_df = source_df.unionByName(reused_df)
 
-        source_df.write.mode("overwrite").parquet(output_path)
+        write_partitioned_by_provider(spark, source_df, output_path)
+        write_manifest(output_path, manifest)
+        write_metrics(output_path, collect_module_metrics(spark, output_path, manifest, reused_providers))
 
 
-def get_yaml_extraction_task_by_module(data_dir, providers, data_dir_out, module_name):
+def get_yaml_extraction_task_by_module(data_dir, providers, data_dir_out, module_name, previous_release_dir=""):
     module = read_module(module_name)
     file_patterns = module["name_patterns"]
     columns = module["columns"]
@@ -203,7 +456,7 @@ def get_yaml_extraction_task_by_module(data_dir, providers, data_dir_out, module
     for provider in providers:
         yaml_file_path = build_path_pattern_by_provider(data_dir, provider, file_path)
         yaml_paths.append(yaml_file_path)
-    return ReadYamlsByModule(module_name, yaml_paths, columns, data_dir_out)
+    return ReadYamlsByModule(module_name, yaml_paths, columns, data_dir_out, previous_release_dir)
 
 
 if __name__ == "__main__":
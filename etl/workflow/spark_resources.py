@@ -0,0 +1,68 @@
+import re
+
+import luigi
+
+# Resources of the host shared by the spark drivers launched by the ETL. Their totals are set in the [resources]
+# section of the luigi configuration, which is what the scheduler uses to decide if a task can start
+SPARK_MEMORY_RESOURCE = "spark_memory_mb"
+SPARK_CORES_RESOURCE = "spark_cores"
+
+MEMORY_UNITS_MB = {"k": 1 / 1024, "m": 1, "g": 1024, "t": 1024 * 1024}
+
+
+def parse_memory_mb(memory):
+    """ Converts a spark memory value ("512m", "4g", or a number of MB) to MB """
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([kmgt]?)b?", str(memory).strip().lower())
+    if not match:
+        raise ValueError("Invalid spark memory value: {0}".format(memory))
+    return int(float(match.group(1)) * MEMORY_UNITS_MB[match.group(2) or "m"])
+
+
+def get_driver_host_cores(master, driver_cores):
+    """
+    Cores the spark application uses in this host: all the local cores in local mode (where the executors run inside
+    the driver) or the driver cores otherwise. None means all the cores of the host.
+    """
+    local_match = re.fullmatch(r"local(?:\[(\d+|\*)(?:,\d+)?\])?", str(master or "").strip())
+    if local_match:
+        threads = local_match.group(1)
+        if threads == "*":
+            return None
+        return int(threads or 1)
+    return int(driver_cores or 1)
+
+
+def get_resource_budgets():
+    config = luigi.configuration.get_config()
+    if not config.has_section("resources"):
+        return {}
+    return config.getintdict("resources")
+
+
+def get_spark_resources(driver_memory, driver_cores, master):
+    """
+    Returns the luigi resources of a task that launches a spark application with the given settings. Only the
+    resources with a budget in the [resources] section are declared (luigi assumes a budget of 1 for the rest). A task
+    never asks for more than the budget, so it can always run if it is the only one.
+    """
+    budgets = get_resource_budgets()
+    resources = {}
+    if SPARK_MEMORY_RESOURCE in budgets and driver_memory:
+        resources[SPARK_MEMORY_RESOURCE] = min(parse_memory_mb(driver_memory), budgets[SPARK_MEMORY_RESOURCE])
+    if SPARK_CORES_RESOURCE in budgets:
+        cores = get_driver_host_cores(master, driver_cores)
+        budget = budgets[SPARK_CORES_RESOURCE]
+        resources[SPARK_CORES_RESOURCE] = budget if cores is None else min(cores, budget)
+    return resources
+
+
+class SparkResources(object):
+    """
+    Mixin for the tasks that launch a spark application (SparkSubmitTask and PySparkTask). It declares the memory and
+    cores of the spark driver as luigi resources, so the scheduler only runs at the same time the tasks that fit in
+    the budget of the host.
+    """
+
+    @property
+    def resources(self):
+        return get_spark_resources(self.driver_memory, self.driver_cores, self.master)
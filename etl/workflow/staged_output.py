@@ -0,0 +1,48 @@
+import os
+from contextlib import contextmanager
+
+from etl.jobs.util.file_manager import SUCCESS_MARKER, is_complete_output, remove_path
+
+STAGING_SUFFIX = ".staging"
+
+
+def get_staging_path(output_path):
+    return output_path.rstrip("/") + STAGING_SUFFIX
+
+
+def publish_staged_output(staging_path, output_path):
+    """
+    Renames a finished staging folder to the output path, replacing the previous output. A staging folder without
+    the success marker is the result of an incomplete write and is not published.
+    """
+    if not is_complete_output(staging_path):
+        raise IOError("Output {0} is incomplete: {1} marker not found".format(staging_path, SUCCESS_MARKER))
+    remove_path(output_path)
+    os.rename(staging_path, output_path)
+
+
+@contextmanager
+def staged_write(output_path):
+    """
+    Gives the staging path where the output must be written. If the block finishes without errors, the staging folder
+    is checked and renamed to output_path, so output_path never has a partially written output.
+    """
+    staging_path = get_staging_path(output_path)
+    # Left by a previous run that failed
+    remove_path(staging_path)
+    yield staging_path
+    publish_staged_output(staging_path, output_path)
+
+
+class StagedOutput(object):
+    """
+    Mixin for the tasks with a folder output. The task writes to get_write_path() instead of the output path, and the
+    result is only moved to the output path once the task finished and the success marker is there.
+    """
+
+    def get_write_path(self):
+        return get_staging_path(self.output().path)
+
+    def run(self):
+        with staged_write(self.output().path):
+            super().run()
@@ -0,0 +1,278 @@
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import luigi
+from luigi.contrib.spark import PySparkTask
+from pyspark import SparkContext
+from pyspark.sql import SparkSession
+
+from etl import logger
+from etl.constants import Constants
+from etl.entities_registry import get_all_entities_names_to_store_db
+from etl.jobs.transformation import spark_transformation_job
+from etl.jobs.util.transformation_outputs import keep_in_memory, release
+from etl.workflow.output_fingerprint import compute_fingerprint, read_output_fingerprint
+from etl.workflow.reference_data_cache import get_cache_entry_path, run_with_cache
+from etl.workflow.spark_resources import SparkResources
+from etl.workflow.staged_output import staged_write
+from etl.workflow.transformer import TransformEntity, get_transformation_spark_conf
+from etl.workflow.critical_path import CriticalPathPriority
+
+TRANSFORMATION_POOLS_FILE = "etl/transformation_pools.xml"
+HEAVY_POOL = "heavy"
+LIGHT_POOL = "light"
+
+# Transformations that process the molecular data. They run in the heavy pool and only
+# max_concurrent_heavy_transformations of them run at the same time
+HEAVY_ENTITIES = [
+    Constants.INITIAL_CNA_MOLECULAR_DATA_ENTITY,
+    Constants.INITIAL_BIOMARKER_MOLECULAR_DATA_ENTITY,
+    Constants.INITIAL_EXPRESSION_MOLECULAR_DATA_ENTITY,
+    Constants.INITIAL_MUTATION_MOLECULAR_DATA_ENTITY,
+    Constants.CNA_MOLECULAR_DATA_ENTITY,
+    Constants.BIOMARKER_MOLECULAR_DATA_ENTITY,
+    Constants.EXPRESSION_MOLECULAR_DATA_ENTITY,
+    Constants.MUTATION_MEASUREMENT_DATA_ENTITY,
+    Constants.IMMUNEMARKER_MOLECULAR_DATA_ENTITY,
+    Constants.GENE_HELPER_ENTITY,
+    Constants.AVAILABLE_MOLECULAR_DATA_COLUMNS_ENTITY,
+    Constants.SEARCH_INDEX_MOLECULAR_DATA_ENTITY,
+    Constants.SEARCH_INDEX_ENTITY,
+]
+
+# Helper transformations whose jobs write their output with write_transformation_output and whose consumer reads it
+# with read_transformation_output, so the output can be kept in memory when the transformations are fused
+FUSIBLE_ENTITIES = [
+    Constants.TREATMENT_NAME_HELPER_ENTITY,
+    Constants.TREATMENT_TYPE_HELPER_ENTITY,
+    Constants.INITIAL_CNA_MOLECULAR_DATA_ENTITY,
+    Constants.INITIAL_BIOMARKER_MOLECULAR_DATA_ENTITY,
+    Constants.INITIAL_EXPRESSION_MOLECULAR_DATA_ENTITY,
+    Constants.INITIAL_MUTATION_MOLECULAR_DATA_ENTITY,
+    Constants.REGIMENT_TO_TREATMENT_ENTITY,
+    Constants.SEARCH_INDEX_PATIENT_SAMPLE_ENTITY,
+    Constants.TREATMENT_AGGREGATOR_HELPER_ENTITY,
+    Constants.MODEL_METADATA,
+    Constants.SEARCH_INDEX_MOLECULAR_DATA_ENTITY,
+]
+
+
+def get_transformation_tasks():
+    """
+    Returns all the transformation tasks (the entities and the helpers they depend on) sorted so each task comes
+    after all the transformations it requires.
+    """
+    from etl.entities_task_index import entities
+
+    sorted_tasks = []
+    visited = set()
+
+    def visit(task):
+        if task.task_id in visited:
+            return
+        visited.add(task.task_id)
+        for dependency in task.requiredTasks:
+            if isinstance(dependency, TransformEntity):
+                visit(dependency)
+        sorted_tasks.append(task)
+
+    for entity_task in entities.values():
+        visit(entity_task)
+    return sorted_tasks
+
+
+def get_in_memory_entities(transformation_tasks):
+    """
+    Returns the entities that can be kept in memory when the transformations are fused: the fusible helpers that are
+    not stored in the database and are consumed by a single transformation. The rest are written to parquet.
+    """
+    consumers = {}
+    for task in transformation_tasks:
+        for dependency in task.requiredTasks:
+            if isinstance(dependency, TransformEntity):
+                consumers.setdefault(dependency.entity_name, set()).add(task.entity_name)
+    entities_to_store_db = get_all_entities_names_to_store_db()
+    return [
+        task.entity_name for task in transformation_tasks
+        if task.entity_name in FUSIBLE_ENTITIES
+        and task.entity_name not in entities_to_store_db
+        and len(consumers.get(task.entity_name, [])) == 1]
+
+
+def build_transformation_plan(transformation_tasks, in_memory_entities=None):
+    """
+    Builds a step for each task with the entity name, the entities it depends on, whether its output is kept in memory,
+    the arguments of spark_transformation_job, built in the same way TransformEntity.app_options does (entity
+    name, outputs of the dependencies, output path), and what is needed to compute the fingerprint of its output.
+    """
+    in_memory_entities = in_memory_entities or []
+    plan = []
+    for task in transformation_tasks:
+        input_paths = [dependency.output().path for dependency in task.requiredTasks]
+        dependencies = [
+            dependency.entity_name for dependency in task.requiredTasks if isinstance(dependency, TransformEntity)]
+        plan.append({
+            "entity_name": task.entity_name,
+            "dependencies": dependencies,
+            "in_memory": task.entity_name in in_memory_entities,
+            "arguments": task.get_job_arguments(input_paths, task.output().path),
+            "input_paths": input_paths,
+            "fingerprint_parameters": task.get_fingerprint_parameters()
+        })
+    return plan
+
+
+def get_pool(entity_name):
+    return HEAVY_POOL if entity_name in HEAVY_ENTITIES else LIGHT_POOL
+
+
+def get_step_fingerprint(step, fingerprints):
+    input_fingerprints = [
+        fingerprints[path] if path in fingerprints else read_output_fingerprint(path) for path in step["input_paths"]]
+    return compute_fingerprint(step["fingerprint_parameters"], input_fingerprints)
+
+
+def run_transformation(spark, step, cache_dir="", fingerprints=None):
+    """
+    Runs the job of a step. As TransformEntity does, the output is written to a staging folder and renamed when
+    complete, and it is reused from cache_dir if an output with the same fingerprint is there. The fingerprints of the
+    outputs kept in memory are added to fingerprints (by output path), as they are not written anywhere.
+    """
+    fingerprints = {} if fingerprints is None else fingerprints
+    entity_name = step["entity_name"]
+    # Jobs submitted from this thread go to the scheduler pool of the entity
+    spark.sparkContext.setLocalProperty("spark.scheduler.pool", get_pool(entity_name))
+    logger.info("Transforming {0} in pool {1}".format(entity_name, get_pool(entity_name)))
+    arguments = step["arguments"]
+    fingerprint = get_step_fingerprint(step, fingerprints)
+    if step.get("in_memory"):
+        fingerprints[arguments[-1]] = fingerprint
+        spark_transformation_job.main(["spark_transformation_job.py"] + arguments)
+        return
+    with staged_write(arguments[-1]) as staging_path:
+        run_with_cache(
+            entity_name, fingerprint, get_cache_entry_path(cache_dir, entity_name, fingerprint), staging_path,
+            lambda: spark_transformation_job.main(["spark_transformation_job.py"] + arguments[:-1] + [staging_path]))
+
+
+def run_transformation_plan(
+        spark, plan, is_complete, max_concurrent_jobs=1, max_concurrent_heavy_jobs=1, cache_dir=""):
+    """
+    Calls the spark job of each entity of the plan in the current spark session. An entity starts as soon as all
+    the entities it depends on are transformed, so up to max_concurrent_jobs independent entities run at the same
+    time (each one from its own thread). Entities whose output already exists are skipped, as luigi would do with a
+    complete TransformEntity task. If a job fails, the running ones are finished and the error is raised.
+    The outputs of the in_memory steps are not written: their dataframe is passed to the consumer, so the chain is
+    executed as a single spark plan. They are skipped if their consumer is already complete.
+    """
+    pending = list(plan)
+    fingerprints = {}
+    transformed = set()
+    running = {}
+    output_paths = {step["entity_name"]: step["arguments"][-1] for step in plan}
+    in_memory_entities = [step["entity_name"] for step in plan if step.get("in_memory")]
+    consumers = {}
+    for step in plan:
+        for dependency in step["dependencies"]:
+            consumers.setdefault(dependency, []).append(step["entity_name"])
+    for entity_name in in_memory_entities:
+        keep_in_memory(output_paths[entity_name])
+
+    def is_step_complete(entity_name):
+        if entity_name in in_memory_entities:
+            return all(is_step_complete(consumer) for consumer in consumers.get(entity_name, []))
+        return is_complete(entity_name)
+
+    with ThreadPoolExecutor(max_workers=max_concurrent_jobs) as executor:
+        while pending or running:
+            started = False
+            for step in list(pending):
+                entity_name = step["entity_name"]
+                if len(running) >= max_concurrent_jobs:
+                    break
+                if not all(dependency in transformed for dependency in step["dependencies"]):
+                    continue
+                running_heavy_jobs = sum(1 for running_step in running.values()
+                                         if get_pool(running_step["entity_name"]) == HEAVY_POOL)
+                if get_pool(entity_name) == HEAVY_POOL and running_heavy_jobs >= max_concurrent_heavy_jobs:
+                    continue
+                pending.remove(step)
+                started = True
+                if is_step_complete(entity_name):
+                    logger.info("Skipping transformation of {0}: output already exists".format(entity_name))
+                    transformed.add(entity_name)
+                    continue
+                running[executor.submit(run_transformation, spark, step, cache_dir, fingerprints)] = step
+
+            if not running:
+                if pending and not started:
+                    raise RuntimeError("Transformations with unresolved dependencies: {0}".format(
+                        [step["entity_name"] for step in pending]))
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                step = running.pop(future)
+                future.result()
+                transformed.add(step["entity_name"])
+                for dependency in step["dependencies"]:
+                    if dependency in in_memory_entities:
+                        release(output_paths[dependency])
+
+
+class TransformAllEntities(CriticalPathPriority, SparkResources, PySparkTask):
+    """
+    Runs all the transformations in dependency order in a single spark session, instead of submitting a spark job per
+    entity. It writes the same transformed/<entity> outputs as the TransformEntity tasks, which depend on this task
+    when in_process_transformations is "yes".
+    """
+    data_dir = luigi.Parameter()
+    providers = luigi.ListParameter()
+    data_dir_out = luigi.Parameter()
+    # Number of transformations that can run at the same time. With more than one, the FAIR scheduler is used
+    max_concurrent_transformations = luigi.IntParameter(default=1)
+    max_concurrent_heavy_transformations = luigi.IntParameter(default=1)
+    # Set to "yes" to keep in memory the outputs of the helpers that are only consumed by the next transformation
+    fuse_transformations = luigi.Parameter(default="no")
+    transformation_cache_dir = luigi.Parameter(default="")
+
+    def requires(self):
+        extraction_tasks = []
+        for task in get_transformation_tasks():
+            for dependency in task.requiredTasks:
+                if not isinstance(dependency, TransformEntity) and dependency not in extraction_tasks:
+                    extraction_tasks.append(dependency)
+        return extraction_tasks
+
+    def get_in_memory_entities(self):
+        if "yes" == str(self.fuse_transformations).lower():
+            return get_in_memory_entities(get_transformation_tasks())
+        return []
+
+    def output(self):
+        # The helpers kept in memory have no output. No other task requires them
+        in_memory_entities = self.get_in_memory_entities()
+        return {task.entity_name: task.output() for task in get_transformation_tasks()
+                if task.entity_name not in in_memory_entities}
+
+    @property
+    def conf(self):
+        conf = get_transformation_spark_conf(super().conf, self.providers)
+        if self.max_concurrent_transformations > 1:
+            conf["spark.scheduler.mode"] = "FAIR"
+            conf["spark.scheduler.allocation.file"] = os.path.abspath(TRANSFORMATION_POOLS_FILE)
+        return conf
+
+    def app_options(self):
+        return [json.dumps(build_transformation_plan(get_transformation_tasks(), self.get_in_memory_entities()))]
+
+    def main(self, sc: SparkContext, *args):
+        spark = SparkSession(sc)
+        outputs = self.output()
+        plan = json.loads(args[0])
+        run_transformation_plan(
+            spark, plan, lambda entity_name: entity_name in outputs and outputs[entity_name].exists(),
+            self.max_concurrent_transformations,
+            self.max_concurrent_heavy_transformations,
+            self.transformation_cache_dir)
@@ -3,6 +3,12 @@ from luigi.contrib.spark import SparkSubmitTask
 
 from etl.constants import Constants
 from etl.workflow.config import PdcmConfig
+from etl.workflow.critical_path import CriticalPathPriority
+from etl.workflow.output_fingerprint import compute_fingerprint, get_entity_code_hash, read_output_fingerprint
+from etl.workflow.reference_data_cache import CachedOutput
+from etl.workflow.spark_profiles import get_entity_profile, get_input_size, get_profile_spark_conf, read_spark_profiles
+from etl.workflow.spark_resources import SparkResources
+from etl.workflow.staged_output import StagedOutput
 from etl.workflow.extractor import (
     ExtractImmunemarker,
     ExtractModelIdsResources,
@@ -34,7 +40,16 @@ from etl.workflow.extractor import (
 )
 
 
-class TransformEntity(luigi.contrib.spark.SparkSubmitTask):
+def get_transformation_spark_conf(conf, providers):
+    conf = conf or {}
+    # Raw data is partitioned by provider: the jobs read only the partitions of these providers (read_raw_parquet).
+    # Provider names have to be read as strings even if they look like numbers
+    conf[Constants.PROVIDERS_SPARK_CONF] = ",".join(providers)
+    conf["spark.sql.sources.partitionColumnTypeInference.enabled"] = "false"
+    return conf
+
+
+class TransformEntity(CriticalPathPriority, StagedOutput, CachedOutput, SparkResources, luigi.contrib.spark.SparkSubmitTask):
     """
     Creates a dataframe ready with all the information needed for a specific entity.
     """
@@ -42,6 +57,10 @@ class TransformEntity(luigi.contrib.spark.SparkSubmitTask):
     data_dir = luigi.Parameter()
     providers = luigi.ListParameter()
     data_dir_out = luigi.Parameter()
+    # Set to "yes" to run all the transformations in a single spark session (TransformAllEntities)
+    in_process_transformations = luigi.Parameter(default="no")
+    # Folder where the transformed outputs are kept by fingerprint, to reuse them in later releases
+    transformation_cache_dir = luigi.Parameter(default="")
 
     """ Luigi tasks that are required for this task to be executed """
     requiredTasks = []
@@ -51,15 +70,30 @@ class TransformEntity(luigi.contrib.spark.SparkSubmitTask):
 
     app = "etl/jobs/transformation/spark_transformation_job.py"
 
+    def is_in_process(self):
+        return "yes" == str(self.in_process_transformations).lower()
+
     def requires(self):
+        if self.is_in_process():
+            # Imported here because the runner needs all the transformation classes defined in this module
+            from etl.workflow.transformation_runner import TransformAllEntities
+            return TransformAllEntities()
         return self.requiredTasks
 
-    def app_options(self):
-        spark_input_parameters = [self.entity_name]
+    def run(self):
+        if self.is_in_process():
+            raise RuntimeError(
+                "{0} was not created by TransformAllEntities".format(self.output().path))
+        super().run()
 
+    def app_options(self):
         """ The inputs (outputs of the dependencies) will be input parameters for the spark job """
-        for dependency_output in self.input():
-            spark_input_parameters.append(dependency_output.path)
+        return self.get_job_arguments(
+            [dependency_output.path for dependency_output in self.input()], self.get_write_path())
+
+    def get_job_arguments(self, input_paths, output_path):
+        spark_input_parameters = [self.entity_name]
+        spark_input_parameters += input_paths
 
         # Exceptional case: this particular task needs an additional parameter. If set in the transformation
         # class itself the value cannot be read here. Maybe ther is a better way to do this but for now it works
@@ -67,10 +101,69 @@ class TransformEntity(luigi.contrib.spark.SparkSubmitTask):
             spark_input_parameters.append(self.molecular_data_restrictions)
 
         """ The last parameter of the spark job is the output directory """
-        spark_input_parameters.append(self.output().path)
+        spark_input_parameters.append(output_path)
 
         return spark_input_parameters
 
+    def get_fingerprint_parameters(self):
+        """
+        Everything besides the inputs that determines the output: the code of the job (with the modules it uses) and
+        the configuration passed to it
+        """
+        config = {"providers": sorted(self.providers)}
+        if self.entity_name == Constants.MOLECULAR_DATA_RESTRICTION_ENTITY:
+            config["molecular_data_restrictions"] = self.molecular_data_restrictions
+        return {"entity": self.entity_name, "code": get_entity_code_hash(self.entity_name), "config": config}
+
+    def get_cache_key(self):
+        input_fingerprints = [read_output_fingerprint(dependency_output.path) for dependency_output in self.input()]
+        return compute_fingerprint(self.get_fingerprint_parameters(), input_fingerprints)
+
+    def get_cache_dir(self):
+        return self.transformation_cache_dir
+
+    def get_cache_name(self):
+        return self.entity_name
+
+    def get_spark_profile(self):
+        """
+        Spark resources for the entity, from spark_profiles.yaml. The profile by input size is only final once the
+        dependencies are done (the scheduler asks for the resources of the task before that)
+        """
+        if getattr(self, "_spark_profile", None) is not None:
+            return self._spark_profile
+        inputs = self.input()
+        input_size = get_input_size([dependency_output.path for dependency_output in inputs])
+        profile = get_entity_profile(read_spark_profiles(), self.entity_name, input_size)
+        if all(dependency_output.exists() for dependency_output in inputs):
+            self._spark_profile = profile
+        return profile
+
+    @property
+    def resources(self):
+        # In process transformations do not launch a spark application
+        if self.is_in_process():
+            return {}
+        return super().resources
+
+    @property
+    def driver_memory(self):
+        return self.get_spark_profile().get("driver_memory", super().driver_memory)
+
+    @property
+    def executor_memory(self):
+        return self.get_spark_profile().get("executor_memory", super().executor_memory)
+
+    @property
+    def executor_cores(self):
+        return self.get_spark_profile().get("executor_cores", super().executor_cores)
+
+    @property
+    def conf(self):
+        conf = get_transformation_spark_conf(super().conf, self.providers)
+        conf.update(get_profile_spark_conf(self.get_spark_profile()))
+        return conf
+
     def output(self):
         return PdcmConfig().get_target(
             "{0}/{1}/{2}".format(
@@ -405,18 +498,24 @@ class TransformMutationMeasurementData(TransformEntity):
     entity_name = Constants.MUTATION_MEASUREMENT_DATA_ENTITY
 
 
-class TransformOntologyTermDiagnosis(TransformEntity):
+# Helper transformation that builds the ontology graph once and stores its nodes, edges and closure
+class TransformOntologyClosureHelper(TransformEntity):
     requiredTasks = [ExtractOntology()]
+    entity_name = Constants.ONTOLOGY_CLOSURE_HELPER_ENTITY
+
+
+class TransformOntologyTermDiagnosis(TransformEntity):
+    requiredTasks = [TransformOntologyClosureHelper()]
     entity_name = Constants.ONTOLOGY_TERM_DIAGNOSIS_ENTITY
 
 
 class TransformOntologyTermTreatment(TransformEntity):
-    requiredTasks = [ExtractOntology()]
+    requiredTasks = [TransformOntologyClosureHelper()]
     entity_name = Constants.ONTOLOGY_TERM_TREATMENT_ENTITY
 
 
 class TransformOntologyTermRegimen(TransformEntity):
-    requiredTasks = [ExtractOntology()]
+    requiredTasks = [TransformOntologyClosureHelper()]
     entity_name = Constants.ONTOLOGY_TERM_REGIMEN_ENTITY
 
 
@@ -447,8 +546,7 @@ class TransformTreatmentNameHarmonisation(TransformEntity):
     requiredTasks = [
         TransformTreatmentNameHelper(),
         ExtractMappingTreatment(),
-        TransformOntologyTermTreatment(),
-        TransformOntologyTermRegimen()
+        TransformOntologyClosureHelper()
     ]
     entity_name = Constants.TREATMENT_NAME_HARMONISATION_HELPER_ENTITY
 
@@ -561,7 +561,7 @@ CREATE UNLOGGED TABLE cna_molecular_data (
     seq_start_position NUMERIC,
     seq_end_position NUMERIC,
     copy_number_status TEXT,
-    gistic_value TEXT,
+    gistic_value NUMERIC,
     picnic_value TEXT,
     ensembl_gene_id TEXT,
     ncbi_gene_id TEXT,
@@ -665,9 +665,9 @@ CREATE UNLOGGED TABLE mutation_measurement_data (
     chromosome TEXT,
     strand TEXT,
     consequence TEXT,
-    read_depth TEXT,
-    allele_frequency TEXT,
-    seq_start_position TEXT,
+    read_depth INTEGER,
+    allele_frequency NUMERIC,
+    seq_start_position BIGINT,
     ref_allele TEXT,
     alt_allele TEXT,
     biotype TEXT,
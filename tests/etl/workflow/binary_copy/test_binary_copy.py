@@ -0,0 +1,182 @@
+import datetime
+import os
+import struct
+from decimal import Decimal
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from etl.jobs.load.binary_copy import COPY_HEADER, COPY_TRAILER, CopyDataStream, encode_batch, encode_numeric, \
+    generate_copy_data, get_encoder, read_parquet_batches
+
+
+def decode_row(data):
+    """ Splits an encoded row in its fields (None for nulls) """
+    field_count = struct.unpack("!h", data[:2])[0]
+    position = 2
+    fields = []
+    for _ in range(field_count):
+        length = struct.unpack("!i", data[position:position + 4])[0]
+        position += 4
+        if length == -1:
+            fields.append(None)
+        else:
+            fields.append(data[position:position + length])
+            position += length
+    return fields, data[position:]
+
+
+def test_numeric_is_encoded_in_base_10000_digits():
+    ndigits, weight, sign, dscale = struct.unpack("!hhHh", encode_numeric(Decimal("123.45"))[:8])
+    digits = struct.unpack("!2H", encode_numeric(Decimal("123.45"))[8:])
+
+    assert (ndigits, weight, sign, dscale) == (2, 0, 0, 2)
+    assert digits == (123, 4500)
+
+
+def test_negative_numeric_with_leading_zeros():
+    encoded = encode_numeric("-0.0012")
+
+    assert struct.unpack("!hhHh", encoded[:8]) == (1, -1, 0x4000, 4)
+    assert struct.unpack("!H", encoded[8:]) == (12,)
+
+
+def test_numeric_values_are_not_rounded():
+    value = "-123456789012345678901234567890.12"
+    encoded = encode_numeric(Decimal(value))
+
+    assert struct.unpack("!hhHh", encoded[:8]) == (9, 7, 0x4000, 2)
+    assert struct.unpack("!9H", encoded[8:]) == (12, 3456, 7890, 1234, 5678, 9012, 3456, 7890, 1200)
+    assert encode_batch(pa.record_batch({"value": pa.array([value])}), ["numeric"]) == \
+        struct.pack("!hi", 1, len(encoded)) + encoded
+
+
+def test_infinite_numeric_values_are_encoded_as_special_values():
+    assert encode_numeric(Decimal("Infinity")) == struct.pack("!hhHh", 0, 0, 0xD000, 0)
+    assert encode_numeric("-Infinity") == struct.pack("!hhHh", 0, 0, 0xF000, 0)
+
+
+def test_non_integral_values_are_not_truncated():
+    assert get_encoder("int4")("2.0") == struct.pack("!i", 2)
+    with pytest.raises(ValueError):
+        get_encoder("int4")("1.5")
+    with pytest.raises(ValueError):
+        get_encoder("int8")(float("nan"))
+
+
+def test_timestamps_with_time_zone_are_converted_to_utc():
+    utc_timestamp = get_encoder("timestamptz")(datetime.datetime(2000, 1, 1, 1, 0))
+
+    assert get_encoder("timestamptz")("2000-01-01T03:00:00+02:00") == utc_timestamp
+    assert utc_timestamp == struct.pack("!q", 3600 * 1000000)
+
+
+def test_nulls_are_loaded_as_the_text_copy_did():
+    batch = pa.record_batch({
+        "text": pa.array([""]), "bool": pa.array([None], pa.bool_()), "array": pa.array([[]], pa.list_(pa.string())),
+        "id": pa.array([None], pa.int64())})
+
+    fields, rest = decode_row(encode_batch(batch, ["text", "bool", "_text", "int8"]))
+
+    assert fields == [None, b"\x00", None, None]
+    assert rest == b""
+
+
+def test_buffer_encoding_matches_the_encoding_of_every_value():
+    batch = pa.record_batch({
+        "id": pa.array([1, None, 3], pa.int64()),
+        "name": pa.array(["a", "", None]),
+        "score": pa.array([0.5, None, -1.0]),
+        "flag": pa.array([True, None, False]),
+        "count": pa.array([1, 2, None], pa.int32()),
+        "value": pa.array(["1.5", None, "2"])})
+    column_types = ["int8", "text", "float8", "bool", "int4", "numeric"]
+
+    encoded = encode_batch(batch.slice(1), column_types)
+
+    expected = []
+    for row_index in range(2):
+        fields = [struct.pack("!h", len(column_types))]
+        for column, column_type in zip(batch.columns, column_types):
+            value = column.slice(1)[row_index].as_py()
+            encoded_value = get_encoder(column_type)(value) if value is not None else \
+                (b"\x00" if column_type == "bool" else None)
+            fields.append(struct.pack("!i", -1) if encoded_value is None else
+                          struct.pack("!i", len(encoded_value)) + encoded_value)
+        expected.append(b"".join(fields))
+    assert encoded == b"".join(expected)
+
+
+def test_numeric_text_is_encoded_as_each_value():
+    values = ["0", "-0", "0.0", "1.50", ".5", "5.", "-0.0012", "123456789.123456789", "1e3", "NaN", " 7 ", "", None,
+              "-99990000.00010000"]
+
+    encoded = encode_batch(pa.record_batch({"value": pa.array(values)}), ["numeric"])
+
+    expected = []
+    for value in values:
+        encoded_value = None if value is None else encode_numeric(value)
+        expected.append(struct.pack("!h", 1) + (struct.pack("!i", -1) if encoded_value is None else
+                                                struct.pack("!i", len(encoded_value)) + encoded_value))
+    assert encoded == b"".join(expected)
+
+
+def test_typed_columns_are_encoded_from_their_text_as_each_value():
+    batch = pa.record_batch({
+        "value": pa.array([0.0001, -2.25, None, float("nan"), float("inf"), 1e+20]),
+        "position": pa.array([123456789012, None, -1, 0, 7, 10000], pa.int64()),
+        "gene_id": pa.array([7157, None, 0, -1, 7, 10000], pa.int32())})
+    column_types = ["numeric", "numeric", "text"]
+
+    encoded = encode_batch(batch, column_types)
+
+    expected = []
+    for row_index in range(batch.num_rows):
+        fields = [struct.pack("!h", len(column_types))]
+        for column, column_type in zip(batch.columns, column_types):
+            value = column[row_index].as_py()
+            encoded_value = None if value is None else get_encoder(column_type)(value)
+            fields.append(struct.pack("!i", -1) if encoded_value is None else
+                          struct.pack("!i", len(encoded_value)) + encoded_value)
+        expected.append(b"".join(fields))
+    assert encoded == b"".join(expected)
+
+
+def test_integers_out_of_range_fail():
+    with pytest.raises(ValueError):
+        encode_batch(pa.record_batch({"id": pa.array([2 ** 40], pa.int64())}), ["int4"])
+
+
+def test_text_arrays_are_encoded_as_arrays():
+    encoded = get_encoder("_text")('{"a","b"}')
+
+    assert encoded == get_encoder("_text")(["a", "b"])
+    assert struct.unpack("!iiiii", encoded[:20]) == (1, 0, 25, 2, 1)
+    assert encoded[20:] == struct.pack("!i", 1) + b"a" + struct.pack("!i", 1) + b"b"
+
+
+def test_unsupported_type_fails():
+    with pytest.raises(ValueError):
+        get_encoder("geometry")
+
+
+def test_parquet_folder_is_streamed_as_copy_data(tmp_path):
+    parquet_path = str(tmp_path / "patient")
+    os.makedirs(parquet_path)
+    pq.write_table(
+        pa.table({"id": [1, 2], "name": ["a", None], "data_source": ["x", "y"]}),
+        os.path.join(parquet_path, "part-0.parquet"))
+    open(os.path.join(parquet_path, "_SUCCESS"), "w").close()
+
+    copy_data = generate_copy_data(read_parquet_batches(parquet_path, ["id", "name"]), ["int8", "text"])
+    data = CopyDataStream(copy_data).read()
+
+    assert data.startswith(COPY_HEADER)
+    assert data.endswith(COPY_TRAILER)
+    rows = data[len(COPY_HEADER):-len(COPY_TRAILER)]
+    first_row, rows = decode_row(rows)
+    second_row, rows = decode_row(rows)
+    assert first_row == [struct.pack("!q", 1), b"a"]
+    assert second_row == [struct.pack("!q", 2), None]
+    assert rows == b""
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from etl.jobs.util.file_manager import copy_directory
+from etl.workflow.staged_output import staged_write
+
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def read_file(path):
+    with open(path) as f:
+        return f.read()
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    write_file(os.path.join(cache_dir, "transformed", "patient", "part-0"), "cached")
+    write_file(os.path.join(cache_dir, "transformed", "patient", "_SUCCESS"), "")
+    write_file(os.path.join(cache_dir, "database_local", "copied", "patient"), "copied")
+    return cache_dir
+
+
+def rewrite_patient(data_dir_out):
+    with staged_write(os.path.join(data_dir_out, "transformed", "patient")) as staging_path:
+        write_file(os.path.join(staging_path, "part-0"), "new")
+        write_file(os.path.join(staging_path, "_SUCCESS"), "")
+
+
+@pytest.mark.parametrize("mode", ["copy", "hardlink", "symlink"])
+def test_cache_is_not_modified_when_outputs_are_written_again(cache_dir, tmp_path, mode):
+    data_dir_out = str(tmp_path / "release")
+
+    copy_directory(cache_dir, data_dir_out, mode)
+
+    patient_path = os.path.join(data_dir_out, "transformed", "patient")
+    assert read_file(os.path.join(patient_path, "part-0")) == "cached"
+    assert read_file(os.path.join(data_dir_out, "database_local", "copied", "patient")) == "copied"
+    rewrite_patient(data_dir_out)
+    assert read_file(os.path.join(patient_path, "part-0")) == "new"
+    assert read_file(os.path.join(cache_dir, "transformed", "patient", "part-0")) == "cached"
+
+
+def test_links_share_the_cached_data(cache_dir, tmp_path):
+    hardlink_out = str(tmp_path / "hardlink")
+    symlink_out = str(tmp_path / "symlink")
+
+    copy_directory(cache_dir, hardlink_out, "hardlink")
+    copy_directory(cache_dir, symlink_out, "symlink")
+
+    cached_file = os.path.join(cache_dir, "transformed", "patient", "part-0")
+    assert os.path.samefile(os.path.join(hardlink_out, "transformed", "patient", "part-0"), cached_file)
+    assert os.path.islink(os.path.join(symlink_out, "transformed", "patient"))
+    # Folders that are not complete outputs are created, so the markers written in them stay out of the cache
+    assert not os.path.islink(os.path.join(symlink_out, "database_local", "copied"))
+
+
+def test_invalid_mode(cache_dir, tmp_path):
+    with pytest.raises(ValueError):
+        copy_directory(cache_dir, str(tmp_path / "release"), "move")
@@ -0,0 +1,104 @@
+import json
+
+import luigi
+
+from etl.workflow.critical_path import CriticalPathPriority, assign_priorities, compute_schedule, get_critical_path, \
+    read_task_durations
+
+
+class FakeTask(CriticalPathPriority, luigi.Task):
+    name = luigi.Parameter()
+    dependency_names = luigi.ListParameter(default=[])
+
+    def requires(self):
+        return [FakeTask(name=name, dependency_names=DEPENDENCIES.get(name, [])) for name in self.dependency_names]
+
+
+# lookup_1 and lookup_2 are small tasks. mutation -> mutation_data is the long chain
+DEPENDENCIES = {
+    "etl": ["lookup_1", "lookup_2", "mutation_data"],
+    "mutation_data": ["mutation"],
+}
+
+
+def get_task(name):
+    return FakeTask(name=name, dependency_names=DEPENDENCIES.get(name, []))
+
+
+def write_durations(path, durations):
+    with open(path, "w") as f:
+        for task_name, duration in durations:
+            task = get_task(task_name)
+            f.write(json.dumps({"task_id": task.task_id, "task_family": task.task_family, "duration": duration}) + "\n")
+
+
+def test_schedule_has_slack_and_remaining_duration():
+    dependencies = {"a": [], "b": ["a"], "c": [], "d": ["b", "c"]}
+    durations = {"a": 10, "b": 20, "c": 5, "d": 1}
+
+    schedule = compute_schedule(dependencies, durations)
+
+    assert schedule["d"]["earliest_start"] == 30
+    assert schedule["c"]["slack"] == 25
+    assert schedule["a"]["slack"] == 0
+    assert schedule["a"]["remaining"] == 31
+    assert schedule["c"]["remaining"] == 6
+    assert get_critical_path(schedule) == ["a", "b", "d"]
+
+
+def test_durations_are_the_median_of_the_last_runs(tmp_path):
+    durations_file = str(tmp_path / "durations.jsonl")
+    write_durations(durations_file, [("mutation", 1000), ("mutation", 10), ("mutation", 20), ("mutation", 30),
+                                     ("mutation", 40), ("mutation", 50)])
+
+    durations_by_task_id, durations_by_family = read_task_durations(durations_file)
+
+    assert durations_by_task_id[get_task("mutation").task_id] == 30
+    assert durations_by_family["FakeTask"] == 30
+
+
+def test_long_chains_get_higher_priority(tmp_path):
+    durations_file = str(tmp_path / "durations.jsonl")
+    write_durations(durations_file, [("lookup_1", 2), ("lookup_2", 3), ("mutation", 100), ("mutation_data", 200),
+                                     ("etl", 1)])
+
+    tasks, schedule = assign_priorities([get_task("etl")], durations_file)
+
+    assert get_task("mutation").priority == 301
+    assert get_task("mutation_data").priority == 201
+    assert get_task("lookup_2").priority == 4
+    assert get_task("lookup_1").priority == 3
+    assert schedule[get_task("lookup_1").task_id]["slack"] == 298
+
+
+def test_without_recorded_durations_priority_is_the_chain_length(tmp_path):
+    assign_priorities([get_task("etl")], str(tmp_path / "missing.jsonl"))
+
+    assert get_task("mutation").priority == 3
+    assert get_task("lookup_1").priority == 2
+
+
+def test_schedule_is_computed_once(tmp_path):
+    durations_file = tmp_path / "once.jsonl"
+    write_durations(str(durations_file), [("mutation", 100), ("mutation_data", 200)])
+    first_tasks, first_schedule = assign_priorities([get_task("etl")], str(durations_file))
+    priority = get_task("mutation").priority
+    durations_file.unlink()
+
+    tasks, schedule = assign_priorities([get_task("etl")], str(durations_file))
+
+    assert schedule is first_schedule
+    assert get_task("mutation").priority == priority > 3
+
+
+def test_priorities_are_the_ones_of_the_schedule_returned(tmp_path):
+    durations_file = str(tmp_path / "durations.jsonl")
+    write_durations(durations_file, [("mutation", 100), ("mutation_data", 200)])
+    assign_priorities([get_task("etl")], durations_file)
+    etl_priority = get_task("mutation").priority
+    assign_priorities([get_task("mutation_data")], durations_file)
+
+    tasks, schedule = assign_priorities([get_task("etl")], durations_file)
+
+    assert get_task("mutation").priority == etl_priority
+    assert get_task("mutation").priority == int(round(schedule[get_task("mutation").task_id]["remaining"]))
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from tests.util import template_luigi_config
+
+
+@pytest.fixture(scope="module")
+def data_dir_out(tmp_path_factory):
+    # The transformation tasks are created when their module is imported, so the configuration is needed before that
+    with template_luigi_config(tmp_path_factory) as config:
+        yield config.get("DEFAULT", "data_dir_out")
+
+
+def write_output(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "w").close()
+
+
+def test_downstream_closure_follows_the_required_tasks(data_dir_out):
+    import d_output_helper
+    from etl.workflow.main import PdcmEtl
+
+    tasks = d_output_helper.get_downstream_tasks(PdcmEtl(), ["ethnicity"])
+    task_ids = [task.task_id for task in tasks]
+    paths = d_output_helper.get_output_paths(tasks)
+
+    assert any(task_id.startswith("TransformPatient_") for task_id in task_ids)
+    assert any(task_id.startswith("TransformPatientSample_") for task_id in task_ids)
+    assert not any(task_id.startswith("TransformTissue_") for task_id in task_ids)
+    assert os.path.join(data_dir_out, "transformed", "ethnicity") in paths
+    assert os.path.join(data_dir_out, "database_formatted", "patient") in paths
+    assert os.path.join(data_dir_out, "database_local", "copied", "patient") in paths
+    assert os.path.join(data_dir_out, "database_local", "all_entities_copied") in paths
+    assert os.path.join(data_dir_out, "transformed", "tissue") not in paths
+    assert os.path.join(data_dir_out, "database_local", "copied", "tissue") not in paths
+    assert os.path.join(data_dir_out, "database_local", "tables_recreated") not in paths
+
+
+def test_invalidate_deletes_only_the_downstream_outputs(data_dir_out):
+    import d_output_helper
+
+    patient_path = os.path.join(data_dir_out, "transformed", "patient", "_SUCCESS")
+    tissue_path = os.path.join(data_dir_out, "transformed", "tissue", "_SUCCESS")
+    copied_path = os.path.join(data_dir_out, "database_local", "copied", "patient")
+    for path in [patient_path, tissue_path, copied_path]:
+        write_output(path)
+
+    d_output_helper.invalidate_entities(["patient"], dry_run=True)
+    assert os.path.exists(patient_path) and os.path.exists(copied_path)
+
+    d_output_helper.invalidate_entities(["patient"], dry_run=False)
+    assert not os.path.exists(patient_path)
+    assert not os.path.exists(copied_path)
+    assert os.path.exists(tissue_path)
+
+    with pytest.raises(Exception):
+        d_output_helper.invalidate_entities(["unknown_entity"], dry_run=True)
@@ -0,0 +1,19 @@
+from etl.jobs.util.graph_builder import ONTOLOGIES
+
+
+def top_level_terms():
+    terms = []
+    for ontology in ONTOLOGIES:
+        for term_id in ontology["top_level_terms"]:
+            terms.append({"term_id": term_id, "term_name": "Top " + term_id, "term_url": "url_" + term_id, "is_a": ""})
+    return terms
+
+
+raw_ontology_terms = top_level_terms() + [
+    {"term_id": "NCIT:D1", "term_name": "Malignant Lung Neoplasm", "term_url": "url_D1", "is_a": "NCIT:C3262"},
+    {"term_id": "NCIT:D2", "term_name": "Lung Neoplasm", "term_url": "url_D2", "is_a": "NCIT:C3262"},
+    {"term_id": "NCIT:D3", "term_name": "Small Cell Lung Carcinoma ", "term_url": "url_D3", "is_a": "NCIT:D1,NCIT:D2"},
+    {"term_id": "NCIT:R1", "term_name": "Regimen 1", "term_url": "url_R1", "is_a": "NCIT:C12218"},
+    {"term_id": "NCIT:T1", "term_name": "Treatment 1", "term_url": "url_T1", "is_a": "NCIT:C1932"},
+    {"term_id": "NCIT:T2", "term_name": "Treatment 2", "term_url": "url_T2", "is_a": "NCIT:T1"},
+]
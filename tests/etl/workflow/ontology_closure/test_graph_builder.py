@@ -0,0 +1,58 @@
+import random
+
+import networkx as nx
+
+from etl.jobs.util.graph_builder import (
+    ONTOLOGIES,
+    add_node_to_graph,
+    build_compact_graph,
+    compute_branch_ancestors,
+    extract_graph_by_ontology_id,
+    get_branch_nodes,
+    get_term_ancestors,
+    get_term_ids_from_graph
+)
+from tests.etl.workflow.ontology_closure.input_data import top_level_terms
+
+
+def random_ontology_rows(terms_count, seed):
+    generator = random.Random(seed)
+    rows = top_level_terms()
+    for i in range(terms_count):
+        candidates = [row["term_id"] for row in rows]
+        parents = generator.sample(candidates, generator.randint(1, min(3, len(candidates))))
+        rows.append({"term_id": "NCIT:X{0}".format(i), "term_name": "Term {0}".format(i), "is_a": ",".join(parents)})
+    return rows
+
+
+def test_branch_ancestors_match_networkx():
+    rows = random_ontology_rows(300, seed=7)
+    nx_graph = nx.DiGraph()
+    for row in rows:
+        add_node_to_graph(nx_graph, row)
+    graph = build_compact_graph(rows)
+
+    for ontology in ONTOLOGIES:
+        branch_graph = extract_graph_by_ontology_id(nx_graph, ontology["id"])
+        branch_nodes = get_branch_nodes(graph, ontology["id"])
+        ancestors = compute_branch_ancestors(graph, branch_nodes)
+
+        assert sorted(graph.term_ids[node] for node in branch_nodes) == sorted(get_term_ids_from_graph(branch_graph))
+        for node in branch_nodes:
+            term_id = graph.term_ids[node]
+            assert {graph.term_ids[a] for a in ancestors[node]} == get_term_ancestors(branch_graph, term_id)
+
+
+def test_branch_ancestors_with_cycle():
+    rows = top_level_terms() + [
+        {"term_id": "NCIT:A", "term_name": "A", "is_a": "NCIT:C12218,NCIT:B"},
+        {"term_id": "NCIT:B", "term_name": "B", "is_a": "NCIT:A"},
+        {"term_id": "NCIT:C", "term_name": "C", "is_a": "NCIT:B"},
+    ]
+    graph = build_compact_graph(rows)
+    branch_nodes = get_branch_nodes(graph, "ncit_regimen")
+
+    ancestors = compute_branch_ancestors(graph, branch_nodes)
+
+    ancestor_ids = {graph.term_ids[node]: {graph.term_ids[a] for a in ancestors[node]} for node in branch_nodes}
+    assert ancestor_ids == {"NCIT:A": {"NCIT:B"}, "NCIT:B": {"NCIT:A"}, "NCIT:C": {"NCIT:A", "NCIT:B"}}
@@ -0,0 +1,49 @@
+import os
+
+import pyarrow.parquet as pq
+
+from etl.jobs.transformation import ontology_closure_helper_transformer_job
+from etl.jobs.transformation.ontology_closure_helper_transformer_job import write_ontology_closure
+from etl.jobs.transformation.ontology_term_diagnosis_transformer_job import transform_ontology_term_diagnosis
+from etl.jobs.transformation.ontology_term_regimen_transformer_job import transform_ontology_term_regimen
+from etl.jobs.transformation.ontology_term_treatment_transformer_job import transform_ontology_term_treatment
+from etl.jobs.util.ontology_closure import TERMS_TABLE, get_table_path
+from tests.etl.workflow.ontology_closure.input_data import raw_ontology_terms
+from tests.util import convert_to_dataframe
+
+
+def write_test_ontology_closure(spark_session, output_path):
+    raw_ontology_term_df = convert_to_dataframe(spark_session, raw_ontology_terms)
+    write_ontology_closure(spark_session, raw_ontology_term_df, output_path)
+
+
+def get_ancestors_by_term(df):
+    return {row["term_id"]: sorted(row["ancestors"].split("|")) if row["ancestors"] else [] for row in df.collect()}
+
+
+def test_ontology_term_jobs_filter_the_closure(spark_session, tmp_path):
+    ontology_closure_path = str(tmp_path / "ontology_closure_helper")
+    write_test_ontology_closure(spark_session, ontology_closure_path)
+
+    diagnosis_df = transform_ontology_term_diagnosis(spark_session, ontology_closure_path)
+    treatment_df = transform_ontology_term_treatment(ontology_closure_path, spark_session)
+    regimen_df = transform_ontology_term_regimen(ontology_closure_path, spark_session)
+
+    assert get_ancestors_by_term(diagnosis_df) == {
+        "NCIT:D1": [], "NCIT:D2": [], "NCIT:D3": ["Lung Cancer", "Lung Cancer"]}
+    assert {row["term_id"]: row["term_name"] for row in diagnosis_df.collect()}["NCIT:D3"] == \
+        "Small Cell Lung Carcinoma"
+    assert get_ancestors_by_term(treatment_df) == {"NCIT:T1": [], "NCIT:T2": ["Treatment 1"]}
+    assert get_ancestors_by_term(regimen_df) == {"NCIT:R1": []}
+    assert set(diagnosis_df.columns) >= {"id", "term_id", "term_name", "term_url", "is_a", "ancestors"}
+
+
+def test_terms_are_written_in_record_batches(spark_session, tmp_path, monkeypatch):
+    monkeypatch.setattr(ontology_closure_helper_transformer_job, "TERMS_BY_BATCH", 2)
+    ontology_closure_path = str(tmp_path / "ontology_closure_helper")
+    write_test_ontology_closure(spark_session, ontology_closure_path)
+
+    terms_file = pq.ParquetFile(os.path.join(get_table_path(ontology_closure_path, TERMS_TABLE), "part-00000.parquet"))
+
+    assert terms_file.metadata.num_rows == 6
+    assert terms_file.metadata.num_row_groups == 3
@@ -0,0 +1,62 @@
+import os
+
+from etl.constants import Constants
+from etl.workflow.output_fingerprint import (
+    compute_fingerprint,
+    get_code_hash,
+    get_entity_code_hash,
+    get_manifest_fingerprint,
+    read_output_fingerprint,
+    write_output_fingerprint,
+)
+from etl.workflow.provider_manifest import write_manifest
+
+
+def test_code_hash_only_depends_on_the_modules_used_by_the_job(monkeypatch):
+    from etl.workflow import output_fingerprint
+
+    mutation_hash = get_entity_code_hash(Constants.MUTATION_MEASUREMENT_DATA_ENTITY)
+    search_index_hash = get_entity_code_hash(Constants.SEARCH_INDEX_ENTITY)
+    get_code_hash.cache_clear()
+
+    original_get_file_hash = output_fingerprint.get_file_hash
+
+    def get_file_hash_with_scoring_change(path):
+        if path.endswith("scoring/model_characterizations_calculator.py"):
+            return "changed"
+        return original_get_file_hash(path)
+
+    monkeypatch.setattr(output_fingerprint, "get_file_hash", get_file_hash_with_scoring_change)
+    try:
+        assert get_entity_code_hash(Constants.MUTATION_MEASUREMENT_DATA_ENTITY) == mutation_hash
+        assert get_entity_code_hash(Constants.SEARCH_INDEX_ENTITY) != search_index_hash
+    finally:
+        get_code_hash.cache_clear()
+
+
+def test_fingerprint_is_unknown_if_an_input_is_unknown():
+    fingerprint = compute_fingerprint({"entity": "patient"}, ["a", "b"])
+
+    assert fingerprint == compute_fingerprint({"entity": "patient"}, ["a", "b"])
+    assert fingerprint != compute_fingerprint({"entity": "patient"}, ["b", "a"])
+    assert fingerprint != compute_fingerprint({"entity": "patient", "config": {"providers": ["TRACE"]}}, ["a", "b"])
+    assert compute_fingerprint({"entity": "patient"}, ["a", None]) is None
+
+
+def test_extracted_modules_are_fingerprinted_by_their_manifest(tmp_path):
+    manifest = {"columns": ["id"], "column_types": {},
+                "providers": {"TRACE": [{"path": "TRACE/a.tsv", "size": 1, "mtime": 1.0, "hash": "h"}]}}
+    module_path = str(tmp_path / "patient")
+    os.makedirs(module_path)
+    write_manifest(module_path, manifest)
+    fingerprint = read_output_fingerprint(module_path)
+
+    # Copying the files for a new release changes their mtime but not the fingerprint
+    manifest["providers"]["TRACE"][0]["mtime"] = 2.0
+    assert get_manifest_fingerprint(manifest) == fingerprint
+    manifest["providers"]["TRACE"][0]["hash"] = "h2"
+    assert get_manifest_fingerprint(manifest) != fingerprint
+
+    write_output_fingerprint(module_path, "written")
+    assert read_output_fingerprint(module_path) == "written"
+    assert read_output_fingerprint(str(tmp_path / "unknown")) is None
@@ -0,0 +1,72 @@
+import os
+import threading
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from etl.jobs.load.parallel_copy import copy_chunks, get_chunks_to_copy, get_copy_chunks
+
+
+def write_file(path, content):
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def test_csv_chunks_are_the_part_files(tmp_path):
+    write_file(str(tmp_path / "part-00001.csv"), "id\n2\n")
+    write_file(str(tmp_path / "part-00000.csv"), "id\n1\n10\n")
+    write_file(str(tmp_path / "_SUCCESS"), "")
+
+    assert get_copy_chunks(str(tmp_path)) == {"part-00000.csv": 8, "part-00001.csv": 5}
+
+
+def test_binary_chunks_are_the_parquet_files(tmp_path):
+    os.makedirs(str(tmp_path / "data_source=a"))
+    pq.write_table(pa.table({"id": [1]}), str(tmp_path / "data_source=a" / "part-0.parquet"))
+    write_file(str(tmp_path / "_SUCCESS"), "")
+    write_file(str(tmp_path / "_fingerprint.json"), "{}")
+
+    assert list(get_copy_chunks(str(tmp_path), binary_copy=True)) == [os.path.join("data_source=a", "part-0.parquet")]
+
+
+def test_load_without_copied_chunks_starts_from_scratch():
+    assert get_chunks_to_copy({"b": 1, "a": 2}, {}) == (["a", "b"], True)
+
+
+def test_interrupted_load_resumes_with_the_chunks_not_copied():
+    assert get_chunks_to_copy({"a": 1, "b": 2, "c": 3}, {"a": 1, "c": 3}) == (["b"], False)
+
+
+def test_chunks_copied_from_other_data_restart_the_load():
+    assert get_chunks_to_copy({"a": 1, "b": 2}, {"a": 5}) == (["a", "b"], True)
+    assert get_chunks_to_copy({"a": 1, "b": 2}, {"old": 1}) == (["a", "b"], True)
+
+
+def test_chunks_are_copied_concurrently():
+    lock = threading.Lock()
+    running = []
+    max_running = []
+
+    def copy_chunk(chunk):
+        with lock:
+            running.append(chunk)
+            max_running.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.remove(chunk)
+        return 10
+
+    assert copy_chunks(["a", "b", "c", "d"], copy_chunk, max_connections=2) == 40
+    assert max(max_running) == 2
+
+
+def test_failed_chunk_error_is_raised():
+    def copy_chunk(chunk):
+        if chunk == "b":
+            raise ValueError("copy failed")
+        return 1
+
+    with pytest.raises(ValueError):
+        copy_chunks(["a", "b", "c"], copy_chunk, max_connections=2)
@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+
+from etl.jobs.load.parallel_statements import build_indexes_and_fks_plan, build_views_plan, get_statement_table, \
+    run_steps, split_statements
+
+INDEXES_SCRIPT = """ALTER TABLE patient DROP CONSTRAINT IF EXISTS pk_patient CASCADE;
+ALTER TABLE patient ADD CONSTRAINT pk_patient PRIMARY KEY (id);
+
+-- Comment; with a semicolon
+CREATE INDEX patient_sample_patient_idx
+  ON patient_sample (patient_id);
+"""
+
+FKS_SCRIPT = """ALTER TABLE patient_sample
+    ADD CONSTRAINT fk_patient_sample_patient
+    FOREIGN KEY (patient_id)
+    REFERENCES patient (id);
+
+-- ALTER TABLE cna_molecular_data
+--     ADD CONSTRAINT fk_cna_molecular_data_mol_char
+--     REFERENCES molecular_characterization (id);
+"""
+
+
+def test_script_is_split_in_statements_without_comments():
+    statements = split_statements(INDEXES_SCRIPT)
+
+    assert statements == [
+        "ALTER TABLE patient DROP CONSTRAINT IF EXISTS pk_patient CASCADE",
+        "ALTER TABLE patient ADD CONSTRAINT pk_patient PRIMARY KEY (id)",
+        "CREATE INDEX patient_sample_patient_idx\n  ON patient_sample (patient_id)"]
+
+
+VIEWS_SCRIPT = """CREATE OR REPLACE VIEW molecular_characterization_vw AS SELECT * FROM molecular_characterization;
+
+DROP MATERIALIZED VIEW IF EXISTS pdcm_api.model_molecular_metadata CASCADE;
+
+CREATE MATERIALIZED VIEW pdcm_api.model_molecular_metadata AS
+SELECT mcv.id FROM molecular_characterization_vw mcv; -- a comment; with a semicolon
+
+COMMENT ON MATERIALIZED VIEW pdcm_api.model_molecular_metadata IS 'Metadata; of the molecular data';
+
+DROP VIEW IF EXISTS pdcm_api.mutation_data_extended CASCADE;
+
+CREATE VIEW pdcm_api.mutation_data_extended AS
+SELECT mmm.id FROM mutation_measurement_data mmd, pdcm_api.model_molecular_metadata mmm;
+
+COMMENT ON COLUMN pdcm_api.mutation_data_extended.id IS 'It''s the id';
+
+/* Counts */
+CREATE MATERIALIZED VIEW pdcm_api.models_by_cancer AS SELECT count(*) FROM search_index;
+"""
+
+
+def test_strings_and_dollar_quoted_bodies_do_not_end_statements():
+    statements = split_statements("COMMENT ON VIEW a IS 'x;''y'; CREATE FUNCTION f() AS $$ SELECT 1; $$; /* ; */")
+
+    assert statements == ["COMMENT ON VIEW a IS 'x;''y'", "CREATE FUNCTION f() AS $$ SELECT 1; $$"]
+
+
+def test_table_of_statement():
+    assert get_statement_table("CREATE UNIQUE INDEX idx ON Patient(id)") == "patient"
+    assert get_statement_table("ALTER TABLE edge ADD CONSTRAINT pk_edge PRIMARY KEY (id)") == "edge"
+    with pytest.raises(ValueError):
+        get_statement_table("DROP VIEW patient_view")
+
+
+def test_fks_wait_for_the_indexes_of_their_tables():
+    plan = build_indexes_and_fks_plan(INDEXES_SCRIPT, FKS_SCRIPT, ["model_information"])
+    steps = {step["name"]: step for step in plan}
+
+    assert list(steps) == ["indexes:patient", "indexes:patient_sample", "indexes:model_information",
+                           "fks:patient_sample"]
+    assert steps["indexes:patient"]["statements"][-1] == "ANALYZE patient"
+    assert steps["indexes:model_information"]["statements"] == ["ANALYZE model_information"]
+    assert steps["fks:patient_sample"]["dependencies"] == ["indexes:patient_sample", "indexes:patient"]
+
+
+def test_views_depend_on_the_views_they_read_from():
+    plan = build_views_plan(VIEWS_SCRIPT)
+    steps = {step["view"]: step for step in plan}
+
+    assert list(steps) == ["molecular_characterization_vw", "pdcm_api.model_molecular_metadata",
+                           "pdcm_api.mutation_data_extended", "pdcm_api.models_by_cancer"]
+    assert len(steps["pdcm_api.model_molecular_metadata"]["statements"]) == 3
+    assert len(steps["pdcm_api.mutation_data_extended"]["statements"]) == 3
+    assert steps["pdcm_api.model_molecular_metadata"]["materialized"]
+    assert not steps["pdcm_api.mutation_data_extended"]["materialized"]
+    assert steps["pdcm_api.model_molecular_metadata"]["dependencies"] == ["view:molecular_characterization_vw"]
+    assert steps["pdcm_api.mutation_data_extended"]["dependencies"] == ["view:pdcm_api.model_molecular_metadata"]
+    assert steps["pdcm_api.models_by_cancer"]["dependencies"] == []
+
+
+def test_steps_run_after_their_dependencies():
+    steps = [{"name": "fks", "dependencies": ["a", "b"]}, {"name": "a", "dependencies": []},
+             {"name": "b", "dependencies": []}]
+    lock = threading.Lock()
+    events = []
+
+    def run_step(step):
+        with lock:
+            events.append(("start", step["name"]))
+        time.sleep(0.05)
+        with lock:
+            events.append(("end", step["name"]))
+        return step["name"]
+
+    results = run_steps(steps, run_step, max_concurrent_steps=2)
+
+    assert results == {"a": "a", "b": "b", "fks": "fks"}
+    assert events[:2] == [("start", "a"), ("start", "b")]
+    assert events.index(("start", "fks")) > events.index(("end", "a"))
+    assert events.index(("start", "fks")) > events.index(("end", "b"))
+
+
+def test_failed_step_stops_its_dependents():
+    steps = [{"name": "a", "dependencies": []}, {"name": "b", "dependencies": ["a"]}]
+    started = []
+
+    def run_step(step):
+        started.append(step["name"])
+        raise ValueError("failed")
+
+    with pytest.raises(ValueError):
+        run_steps(steps, run_step, max_concurrent_steps=2)
+    assert started == ["a"]
+
+
+def test_unknown_dependencies_fail():
+    with pytest.raises(ValueError):
+        run_steps([{"name": "a", "dependencies": ["b"]}], lambda step: None)
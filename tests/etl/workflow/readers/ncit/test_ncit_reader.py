@@ -0,0 +1,31 @@
+from pyarrow import fs
+
+from etl.workflow.readers.ncit_reader import parse_obo_terms, read_obo_file, write_terms_to_parquet
+
+OBO_FILE = "tests/etl/workflow/readers/ncit/test_ncit.obo"
+
+
+def test_read_obo_file(spark_session, tmp_path):
+    output_path = str(tmp_path / "ontology")
+
+    read_obo_file(spark_session, OBO_FILE, output_path)
+
+    rows = spark_session.read.parquet(output_path).orderBy("term_id").collect()
+    assert [row.asDict() for row in rows] == [
+        {"term_id": "NCIT:C1", "term_name": "Root term", "term_url": "http://purl.obolibrary.org/obo/NCIT_C1",
+         "is_a": "", "definition": 'A "root" term.', "synonyms": [], "is_obsolete": False},
+        {"term_id": "NCIT:C2", "term_name": "Child term", "term_url": "http://purl.obolibrary.org/obo/NCIT_C2",
+         "is_a": "NCIT:C1", "definition": None, "synonyms": ["Child", "Kid"], "is_obsolete": False},
+        {"term_id": "NCIT:C3", "term_name": "Obsolete term", "term_url": "http://purl.obolibrary.org/obo/NCIT_C3",
+         "is_a": "NCIT:C1,NCIT:C2", "definition": None, "synonyms": [], "is_obsolete": True}
+    ]
+
+
+def test_write_terms_in_batches_replaces_output(spark_session, tmp_path):
+    output_path = str(tmp_path / "ontology")
+    read_obo_file(spark_session, OBO_FILE, output_path)
+
+    with open(OBO_FILE) as obo_file:
+        write_terms_to_parquet(parse_obo_terms(obo_file), fs.LocalFileSystem(), output_path, batch_size=1)
+
+    assert spark_session.read.parquet(output_path).count() == 3
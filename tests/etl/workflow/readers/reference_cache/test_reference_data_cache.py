@@ -0,0 +1,77 @@
+import os
+
+import luigi
+
+from etl.workflow.reference_data_cache import ReferenceDataCache, compute_cache_key
+
+
+class FakeReader(luigi.Task):
+    input_path = luigi.Parameter()
+    output_path = luigi.Parameter()
+    runs = []
+
+    def output(self):
+        return luigi.LocalTarget(self.output_path)
+
+    def run(self):
+        FakeReader.runs.append(self.output_path)
+        os.makedirs(self.output_path)
+        with open(self.input_path) as input_file, open(os.path.join(self.output_path, "part-0"), "w") as f:
+            f.write(input_file.read().upper())
+
+
+class CachedFakeReader(ReferenceDataCache, FakeReader):
+    def get_reference_input_paths(self):
+        return [self.input_path]
+
+
+def write_file(path, content):
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def read_output(path):
+    with open(os.path.join(path, "part-0")) as f:
+        return f.read()
+
+
+def test_cache_key_depends_on_content_and_version(tmp_path):
+    input_path = str(tmp_path / "markers.tsv")
+    write_file(input_path, "a")
+    key = compute_cache_key("Reader", 1, [input_path])
+
+    assert compute_cache_key("Reader", 1, [input_path]) == key
+    assert compute_cache_key("Reader", 2, [input_path]) != key
+    assert compute_cache_key("Reader", 1, [input_path], ["prov"]) != key
+    write_file(input_path, "b")
+    assert compute_cache_key("Reader", 1, [input_path]) != key
+
+
+def test_reader_output_reused_when_input_did_not_change(tmp_path):
+    FakeReader.runs = []
+    cache_dir = str(tmp_path / "cache")
+    input_path = str(tmp_path / "markers.tsv")
+    write_file(input_path, "markers")
+
+    CachedFakeReader(
+        input_path=input_path, output_path=str(tmp_path / "release1"), reference_data_cache_dir=cache_dir).run()
+    CachedFakeReader(
+        input_path=input_path, output_path=str(tmp_path / "release2"), reference_data_cache_dir=cache_dir).run()
+    write_file(input_path, "new markers")
+    CachedFakeReader(
+        input_path=input_path, output_path=str(tmp_path / "release3"), reference_data_cache_dir=cache_dir).run()
+
+    assert FakeReader.runs == [str(tmp_path / "release1"), str(tmp_path / "release3")]
+    assert read_output(str(tmp_path / "release2")) == "MARKERS"
+    assert read_output(str(tmp_path / "release3")) == "NEW MARKERS"
+
+
+def test_cache_disabled_without_cache_dir(tmp_path):
+    FakeReader.runs = []
+    input_path = str(tmp_path / "markers.tsv")
+    write_file(input_path, "markers")
+
+    CachedFakeReader(input_path=input_path, output_path=str(tmp_path / "release1")).run()
+    CachedFakeReader(input_path=input_path, output_path=str(tmp_path / "release2")).run()
+
+    assert len(FakeReader.runs) == 2
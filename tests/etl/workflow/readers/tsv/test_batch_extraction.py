@@ -0,0 +1,75 @@
+import os
+
+from etl.constants import Constants
+from etl.jobs.util.dataframe_functions import read_raw_parquet
+from etl.source_files_conf_reader import read_modules_by_type
+from etl.workflow.extraction_metrics import read_metrics
+from etl.workflow.spark_reader import ReadAllTsvModules, ROOT_FOLDER
+from tests.etl.workflow.readers.tsv.tsv_tests_utils import patient_lines, write_provider_file
+
+
+def test_read_all_tsv_modules(spark_session, tmp_path):
+    data_dir = str(tmp_path / "input")
+    data_dir_out = str(tmp_path / "output")
+    write_provider_file(data_dir, "PROV-A", "PROV-A_metadata-patient.tsv", patient_lines(["p1", "p2"]))
+    write_provider_file(data_dir, "PROV-B", "PROV-B_metadata-patient.tsv", patient_lines(["p3"]))
+
+    task = ReadAllTsvModules(data_dir=data_dir, providers=["PROV-A", "PROV-B"], data_dir_out=data_dir_out)
+    task.main(spark_session.sparkContext)
+
+    for module in read_modules_by_type("tsv"):
+        assert os.path.exists(os.path.join(data_dir_out, Constants.RAW_DIRECTORY, module["name"], "_SUCCESS"))
+
+    patient_df = spark_session.read.parquet(task.output()[Constants.PATIENT_MODULE].path)
+    rows = patient_df.select("patient_id", Constants.DATA_SOURCE_COLUMN).collect()
+    assert sorted([(r[0], r[1]) for r in rows]) == [("p1", "PROV-A"), ("p2", "PROV-A"), ("p3", "PROV-B")]
+
+    mutation_df = spark_session.read.parquet(task.output()[Constants.MUTATION_MODULE].path)
+    assert mutation_df.count() == 0
+
+
+def test_extraction_metrics(spark_session, tmp_path):
+    data_dir = str(tmp_path / "input")
+    data_dir_out = str(tmp_path / "output")
+    write_provider_file(data_dir, "PROV-A", "PROV-A_metadata-patient.tsv", patient_lines(["p1", "p2"]))
+    write_provider_file(data_dir, "PROV-B", "PROV-B_metadata-patient.tsv", patient_lines(["p3"]))
+
+    task = ReadAllTsvModules(data_dir=data_dir, providers=["PROV-A", "PROV-B"], data_dir_out=data_dir_out)
+    task.main(spark_session.sparkContext)
+
+    patient_metrics = read_metrics(task.output()[Constants.PATIENT_MODULE].path)
+    assert patient_metrics["rows"] == 3
+    assert patient_metrics["providers"]["PROV-A"]["rows"] == 2
+    assert patient_metrics["providers"]["PROV-B"]["rows"] == 1
+    assert patient_metrics["bytes_read"] == os.path.getsize(
+        os.path.join(data_dir, ROOT_FOLDER, "PROV-A", "PROV-A_metadata-patient.tsv")) + os.path.getsize(
+        os.path.join(data_dir, ROOT_FOLDER, "PROV-B", "PROV-B_metadata-patient.tsv"))
+
+    mutation_metrics = read_metrics(task.output()[Constants.MUTATION_MODULE].path)
+    assert mutation_metrics == {"rows": 0, "rejected_rows": 0, "bytes_read": 0, "providers": {}}
+
+
+def test_raw_output_partitioned_by_provider(spark_session, tmp_path):
+    data_dir = str(tmp_path / "input")
+    data_dir_out = str(tmp_path / "output")
+    write_provider_file(data_dir, "PROV-A", "PROV-A_metadata-patient.tsv", patient_lines(["p1", "p2"]))
+    write_provider_file(data_dir, "PROV-B", "PROV-B_metadata-patient.tsv", patient_lines(["p3"]))
+
+    task = ReadAllTsvModules(data_dir=data_dir, providers=["PROV-A", "PROV-B"], data_dir_out=data_dir_out)
+    task.main(spark_session.sparkContext)
+
+    patient_path = task.output()[Constants.PATIENT_MODULE].path
+    assert os.path.isdir(os.path.join(patient_path, "{0}=PROV-A".format(Constants.DATA_SOURCE_COLUMN)))
+    assert os.path.isdir(os.path.join(patient_path, "{0}=PROV-B".format(Constants.DATA_SOURCE_COLUMN)))
+
+    spark_session.conf.set(Constants.PROVIDERS_SPARK_CONF, "PROV-B")
+    try:
+        patient_df = read_raw_parquet(spark_session, patient_path)
+        assert [r[0] for r in patient_df.select("patient_id").collect()] == ["p3"]
+        assert "PartitionFilters: [isnotnull({0}".format(Constants.DATA_SOURCE_COLUMN) in \
+            patient_df._jdf.queryExecution().executedPlan().toString()
+    finally:
+        spark_session.conf.unset(Constants.PROVIDERS_SPARK_CONF)
+
+    patient_df = read_raw_parquet(spark_session, patient_path, providers=["PROV-A"])
+    assert sorted([r[0] for r in patient_df.select("patient_id").collect()]) == ["p1", "p2"]
@@ -0,0 +1,57 @@
+import os
+
+from etl.constants import Constants
+from etl.workflow.provider_manifest import build_module_manifest, get_unchanged_providers, read_manifest
+from etl.workflow.spark_reader import ReadAllTsvModules, ROOT_FOLDER
+from tests.etl.workflow.readers.tsv.tsv_tests_utils import patient_lines, write_provider_file
+
+
+def test_unchanged_providers_ignore_mtime(tmp_path):
+    data_dir = str(tmp_path)
+    write_provider_file(data_dir, "PROV-A", "a.tsv", ["a"])
+    write_provider_file(data_dir, "PROV-B", "b.tsv", ["b"])
+    patterns = {
+        "PROV-A": ["{0}/{1}/PROV-A/a.tsv".format(data_dir, ROOT_FOLDER)],
+        "PROV-B": ["{0}/{1}/PROV-B/b.tsv".format(data_dir, ROOT_FOLDER)]}
+    previous_manifest = build_module_manifest(patterns, ["col"], ROOT_FOLDER)
+
+    os.utime(patterns["PROV-A"][0], (0, 0))
+    write_provider_file(data_dir, "PROV-B", "b.tsv", ["changed"])
+    manifest = build_module_manifest(patterns, ["col"], ROOT_FOLDER, previous_manifest)
+
+    assert manifest["providers"]["PROV-A"][0]["path"] == "PROV-A/a.tsv"
+    assert get_unchanged_providers(manifest, previous_manifest) == ["PROV-A"]
+    assert get_unchanged_providers(build_module_manifest(patterns, ["other"], ROOT_FOLDER), manifest) == []
+
+
+def test_unchanged_provider_partitions_are_reused(spark_session, tmp_path):
+    data_dir = str(tmp_path / "input")
+    previous_data_dir_out = str(tmp_path / "previous")
+    data_dir_out = str(tmp_path / "output")
+    providers = ["PROV-A", "PROV-B"]
+    write_provider_file(data_dir, "PROV-A", "PROV-A_metadata-patient.tsv", patient_lines(["p1"]))
+    write_provider_file(data_dir, "PROV-B", "PROV-B_metadata-patient.tsv", patient_lines(["p2"]))
+    ReadAllTsvModules(data_dir=data_dir, providers=providers, data_dir_out=previous_data_dir_out).main(
+        spark_session.sparkContext)
+
+    # Replace the previous data of PROV-A so it is possible to check it is reused and not read again
+    previous_patient_path = "{0}/{1}/{2}".format(previous_data_dir_out, Constants.RAW_DIRECTORY,
+                                                 Constants.PATIENT_MODULE)
+    previous_patient_df = spark_session.read.parquet(previous_patient_path).where(
+        "{0} = 'PROV-A'".format(Constants.DATA_SOURCE_COLUMN))
+    previous_patient_df = previous_patient_df.replace("p1", "p1-previous", subset=["patient_id"])
+    previous_patient_df = previous_patient_df.drop(Constants.DATA_SOURCE_COLUMN)
+    previous_patient_df = spark_session.createDataFrame(previous_patient_df.collect(), previous_patient_df.schema)
+    previous_patient_df.write.mode("overwrite").parquet(
+        "{0}/{1}=PROV-A".format(previous_patient_path, Constants.DATA_SOURCE_COLUMN))
+    write_provider_file(data_dir, "PROV-B", "PROV-B_metadata-patient.tsv", patient_lines(["p2", "p3"]))
+
+    task = ReadAllTsvModules(
+        data_dir=data_dir, providers=providers, data_dir_out=data_dir_out,
+        previous_release_dir=previous_data_dir_out)
+    task.main(spark_session.sparkContext)
+
+    patient_path = task.output()[Constants.PATIENT_MODULE].path
+    rows = spark_session.read.parquet(patient_path).select("patient_id", Constants.DATA_SOURCE_COLUMN).collect()
+    assert sorted([(r[0], r[1]) for r in rows]) == [("p1-previous", "PROV-A"), ("p2", "PROV-B"), ("p3", "PROV-B")]
+    assert read_manifest(patient_path)["providers"]["PROV-B"][0]["path"] == "PROV-B/PROV-B_metadata-patient.tsv"
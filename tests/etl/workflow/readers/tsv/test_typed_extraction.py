@@ -0,0 +1,55 @@
+import os
+
+from pyspark.sql.types import DoubleType, IntegerType, LongType
+
+from etl.constants import Constants
+from etl.workflow.extraction_metrics import read_metrics
+from etl.workflow.spark_reader import ReadAllTsvModules, REJECTS_FOLDER, REJECTED_COLUMNS_COLUMN, cast_columns, \
+    split_rejected_rows
+from tests.etl.workflow.readers.tsv.tsv_tests_utils import module_lines, write_provider_file
+
+
+def test_typed_columns_and_rejects(spark_session, tmp_path):
+    data_dir = str(tmp_path / "input")
+    data_dir_out = str(tmp_path / "output")
+    write_provider_file(data_dir, "PROV-A", "cna/PROV-A_cna.tsv", module_lines(Constants.CNA_MODULE, [
+        {"sample_id": "s1", "log10r_cna": "0.0001", "seq_start_position": "123456789012", "ncbi_gene_id": "7157.0",
+         "gistic_value": "1"},
+        {"sample_id": "s2", "log10r_cna": " -1.5e3 ", "seq_start_position": "", "ncbi_gene_id": "", "gistic_value": ""},
+        {"sample_id": "s3", "log10r_cna": "high", "seq_start_position": "1,000", "ncbi_gene_id": "7157",
+         "gistic_value": "NA"}
+    ]))
+
+    task = ReadAllTsvModules(data_dir=data_dir, providers=["PROV-A"], data_dir_out=data_dir_out)
+    task.main(spark_session.sparkContext)
+    cna_path = task.output()[Constants.CNA_MODULE].path
+
+    cna_df = spark_session.read.parquet(cna_path)
+    assert cna_df.schema["log10r_cna"].dataType == DoubleType()
+    assert cna_df.schema["seq_start_position"].dataType == LongType()
+    assert cna_df.schema["ncbi_gene_id"].dataType == IntegerType()
+    rows = cna_df.select("sample_id", "log10r_cna", "seq_start_position", "ncbi_gene_id", "gistic_value").collect()
+    assert sorted([tuple(r) for r in rows]) == \
+        [("s1", 0.0001, 123456789012, 7157, 1.0), ("s2", -1500.0, None, None, None)]
+
+    rejects_df = spark_session.read.parquet(os.path.join(cna_path, REJECTS_FOLDER))
+    rejects = rejects_df.select("sample_id", "log10r_cna", "seq_start_position", REJECTED_COLUMNS_COLUMN).collect()
+    assert [tuple(r) for r in rejects] == [("s3", "high", "1,000", "seq_start_position,log10r_cna,gistic_value")]
+
+    metrics = read_metrics(cna_path)
+    assert metrics["rows"] == 2
+    assert metrics["rejected_rows"] == 1
+
+
+def test_values_are_validated_strictly(spark_session):
+    df = spark_session.createDataFrame(
+        [("1", "1", "NaN"), ("1.5", "2", "1.0"), ("99999999999", "3", "."), ("4", "1e3", "inf"),
+         ("7157.0", "5.", "2")],
+        ["integer_value", "long_value", "double_value"])
+    column_types = {"integer_value": "integer", "long_value": "long", "double_value": "double"}
+
+    valid_df, rejects_df = split_rejected_rows(df, column_types)
+
+    assert sorted(tuple(r)[:2] for r in cast_columns(valid_df, column_types).collect()) == [(1, 1), (7157, 5)]
+    assert sorted(r[REJECTED_COLUMNS_COLUMN] for r in rejects_df.collect()) == \
+        ["integer_value", "integer_value,double_value", "long_value"]
@@ -0,0 +1,28 @@
+import os
+
+from etl.constants import Constants
+from etl.source_files_conf_reader import read_module
+from etl.workflow.spark_reader import ROOT_FOLDER
+
+
+def write_provider_file(data_dir, provider, file_name, lines):
+    file_path = os.path.join(data_dir, ROOT_FOLDER, provider, file_name)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def patient_lines(patient_ids):
+    columns = read_module(Constants.PATIENT_MODULE)["columns"]
+    lines = ["\t".join(columns)]
+    for patient_id in patient_ids:
+        lines.append("\t".join([patient_id] + [""] * (len(columns) - 1)))
+    return lines
+
+
+def module_lines(module_name, rows):
+    columns = read_module(module_name)["columns"]
+    lines = ["\t".join(columns)]
+    for row in rows:
+        lines.append("\t".join([row.get(column, "") for column in columns]))
+    return lines
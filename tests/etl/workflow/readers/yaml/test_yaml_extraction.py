@@ -0,0 +1,35 @@
+from etl.constants import Constants
+from etl.workflow.spark_reader import get_yaml_extraction_task_by_module, read_yaml_files
+from etl.workflow.staged_output import publish_staged_output
+from tests.etl.workflow.readers.tsv.tsv_tests_utils import write_provider_file
+
+
+def write_source_yaml(data_dir, provider, lines):
+    write_provider_file(data_dir, provider, "web/{0}_source.yaml".format(provider), lines)
+
+
+def test_read_yaml_files_in_parallel(tmp_path):
+    data_dir = str(tmp_path / "input")
+    write_source_yaml(data_dir, "PROV-A", ["provider_name: Provider A", "project: 2021", "extra: ignored"])
+    write_source_yaml(data_dir, "PROV-B", ["- provider_name: Provider B", "- provider_name: Provider B2"])
+    task = get_yaml_extraction_task_by_module(data_dir, ["PROV-A", "PROV-B"], str(tmp_path / "output"), "source")
+
+    rows = read_yaml_files(list(task.yaml_paths), ["provider_name", "project"])
+
+    assert sorted(rows) == [
+        ("Provider A", "2021", "PROV-A"), ("Provider B", None, "PROV-B"), ("Provider B2", None, "PROV-B")]
+
+
+def test_yaml_module_written_as_single_dataframe(spark_session, tmp_path):
+    data_dir = str(tmp_path / "input")
+    write_source_yaml(data_dir, "PROV-A", ["provider_name: Provider A", "provider_abbreviation: PA"])
+    write_source_yaml(data_dir, "PROV-B", ["provider_name: Provider B", "provider_abbreviation: PB"])
+    task = get_yaml_extraction_task_by_module(data_dir, ["PROV-A", "PROV-B"], str(tmp_path / "output"), "source")
+
+    task.main(spark_session.sparkContext, *task.app_options())
+    publish_staged_output(task.get_write_path(), task.output().path)
+
+    assert task.output().exists()
+    source_df = spark_session.read.parquet(task.output().path)
+    rows = source_df.select("provider_abbreviation", Constants.DATA_SOURCE_COLUMN).collect()
+    assert sorted([(r[0], r[1]) for r in rows]) == [("PA", "PROV-A"), ("PB", "PROV-B")]
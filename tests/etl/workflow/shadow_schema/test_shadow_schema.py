@@ -0,0 +1,105 @@
+from etl.jobs.load.shadow_schema import adapt_script, build_default_privileges_statements, build_grant_statements, \
+    get_load_schemas, rename_schema_in_script, swap_schemas
+
+SCRIPT = """CREATE SCHEMA IF NOT EXISTS pdcm_api;
+DROP TABLE IF EXISTS patient CASCADE;
+CREATE TABLE patient (
+    id BIGINT NOT NULL
+);
+CREATE UNLOGGED TABLE mutation_measurement_data (
+    id BIGINT NOT NULL
+);
+CREATE TABLE sample_to_ontology(
+    id BIGINT NOT NULL
+);
+CREATE VIEW pdcm_api.search_index AS SELECT * FROM patient;
+"""
+
+
+def test_script_is_unchanged_without_shadow_schemas():
+    assert adapt_script(SCRIPT) == SCRIPT
+    assert get_load_schemas() == ("public", "pdcm_api")
+
+
+def test_script_creates_the_api_objects_in_the_shadow_schema():
+    api_schema = get_load_schemas(True)[1]
+
+    script = adapt_script(SCRIPT, api_schema)
+
+    assert "CREATE SCHEMA IF NOT EXISTS pdcm_api_shadow;" in script
+    assert "CREATE VIEW pdcm_api_shadow.search_index AS SELECT * FROM patient;" in script
+    assert "pdcm_api." not in script
+
+
+def test_published_names_are_restored_in_functions():
+    definition = "SELECT pdcm_api_shadow.get_parents_tree(r1.parent_id) FROM pdcm_api.model"
+
+    assert rename_schema_in_script(definition, "pdcm_api_shadow", "pdcm_api") == \
+        "SELECT pdcm_api.get_parents_tree(r1.parent_id) FROM pdcm_api.model"
+
+
+def test_grants_give_the_same_privileges():
+    privileges = [("web_anon", "USAGE", False), (None, "USAGE", False), ('we"ird', "CREATE", True)]
+
+    assert build_grant_statements("SCHEMA", "pdcm_api_shadow", privileges) == [
+        'GRANT USAGE ON SCHEMA pdcm_api_shadow TO "web_anon"',
+        "GRANT USAGE ON SCHEMA pdcm_api_shadow TO PUBLIC",
+        'GRANT CREATE ON SCHEMA pdcm_api_shadow TO "we""ird" WITH GRANT OPTION']
+
+
+def test_default_privileges_are_given_by_object_type():
+    default_privileges = [("pdcm_admin", "r", "web_anon", "SELECT", False), ("pdcm_admin", "n", None, "USAGE", False)]
+
+    assert build_default_privileges_statements("pdcm_api_shadow", default_privileges) == [
+        'ALTER DEFAULT PRIVILEGES FOR ROLE "pdcm_admin" IN SCHEMA pdcm_api_shadow GRANT SELECT ON TABLES TO "web_anon"']
+
+
+class FakeCursor:
+    def __init__(self, statements, results):
+        self.statements = statements
+        self.results = results
+        self.result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, statement, parameters=None):
+        self.statements.append(statement)
+        self.result = next((rows for key, rows in self.results.items() if key in statement), [])
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+
+class FakeConnection:
+    def __init__(self, results):
+        self.statements = []
+        self.results = results
+
+    def cursor(self):
+        return FakeCursor(self.statements, self.results)
+
+    def commit(self):
+        pass
+
+
+def test_swap_gives_the_privileges_of_the_live_schemas_before_renaming_them():
+    connection = FakeConnection({
+        "FROM pg_namespace WHERE": [(1,)],
+        "aclexplode(n.nspacl)": [("web_anon", "USAGE", False)],
+        "aclexplode(c.relacl)": [("search_index", "m", "web_anon", "SELECT", False)]
+    })
+
+    swap_schemas(connection)
+
+    statements = connection.statements
+    grant = 'GRANT SELECT ON TABLE pdcm_api_shadow.search_index TO "web_anon"'
+    assert 'GRANT USAGE ON SCHEMA pdcm_api_shadow TO "web_anon"' in statements
+    assert grant in statements
+    assert statements.index(grant) < statements.index("ALTER SCHEMA pdcm_api_shadow RENAME TO pdcm_api")
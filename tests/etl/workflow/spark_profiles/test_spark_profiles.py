@@ -0,0 +1,53 @@
+import os
+
+from etl.workflow.spark_profiles import get_entity_profile, get_input_size, get_profile_spark_conf, read_spark_profiles
+
+SPARK_PROFILES = {
+    "profiles": {
+        "small": {"executor_memory": "1g", "shuffle_partitions": 4, "adaptive": True},
+        "large": {"executor_memory": "8g", "shuffle_partitions": 400, "skew_join": True},
+    },
+    "size_profiles": [{"max_input_mb": 1, "profile": "small"}, {"profile": "large"}],
+    "entities": {
+        "license": "small",
+        "expression_molecular_data": {"profile": "large", "executor_memory": "12g"},
+    },
+}
+
+
+def test_entity_profile_overrides_the_named_profile():
+    profile = get_entity_profile(SPARK_PROFILES, "expression_molecular_data", 0)
+
+    assert profile == {"executor_memory": "12g", "shuffle_partitions": 400, "skew_join": True}
+
+
+def test_entity_without_profile_gets_a_profile_by_input_size():
+    assert get_entity_profile(SPARK_PROFILES, "tissue", 1024)["executor_memory"] == "1g"
+    assert get_entity_profile(SPARK_PROFILES, "tissue", 2 * 1024 * 1024)["executor_memory"] == "8g"
+    # An explicit profile is used whatever the size of the inputs
+    assert get_entity_profile(SPARK_PROFILES, "license", 2 * 1024 * 1024)["executor_memory"] == "1g"
+
+
+def test_profile_spark_conf():
+    conf = get_profile_spark_conf(SPARK_PROFILES["profiles"]["small"])
+
+    assert conf == {"spark.sql.shuffle.partitions": "4", "spark.sql.adaptive.enabled": "true"}
+
+
+def test_input_size_of_folders(tmp_path):
+    folder = tmp_path / "patient" / "data_source_tmp=TRACE"
+    os.makedirs(folder)
+    (folder / "part-0.parquet").write_bytes(b"0" * 100)
+    (tmp_path / "part-1.parquet").write_bytes(b"0" * 10)
+
+    size = get_input_size([str(tmp_path / "patient"), str(tmp_path / "part-1.parquet"), str(tmp_path / "missing")])
+
+    assert size == 110
+
+
+def test_profiles_file_references_existing_profiles():
+    spark_profiles = read_spark_profiles()
+    for entity_name in spark_profiles["entities"]:
+        assert get_entity_profile(spark_profiles, entity_name, 0)
+    for size_profile in spark_profiles["size_profiles"]:
+        assert size_profile["profile"] in spark_profiles["profiles"]
@@ -0,0 +1,40 @@
+import luigi
+import pytest
+
+from etl.workflow.spark_resources import get_driver_host_cores, get_spark_resources, parse_memory_mb
+
+
+@pytest.fixture
+def resources_budget():
+    config = luigi.configuration.get_config()
+    config.add_section("resources")
+    config.set("resources", "spark_memory_mb", "8192")
+    config.set("resources", "spark_cores", "6")
+    yield
+    config.remove_section("resources")
+
+
+def test_parse_memory():
+    assert parse_memory_mb("512m") == 512
+    assert parse_memory_mb("4g") == 4096
+    assert parse_memory_mb("1.5G") == 1536
+    assert parse_memory_mb("2048") == 2048
+    with pytest.raises(ValueError):
+        parse_memory_mb("SPARK_DRIVER_MEMORY")
+
+
+def test_cores_in_local_and_cluster_mode():
+    assert get_driver_host_cores("local", None) == 1
+    assert get_driver_host_cores("local[4]", "1") == 4
+    assert get_driver_host_cores("local[*]", "1") is None
+    assert get_driver_host_cores("spark://host:7077", "2") == 2
+    assert get_driver_host_cores("yarn", None) == 1
+
+
+def test_no_resources_without_budget():
+    assert get_spark_resources("4g", "2", "local[2]") == {}
+
+
+def test_resources_are_limited_by_the_budget(resources_budget):
+    assert get_spark_resources("4g", "2", "yarn") == {"spark_memory_mb": 4096, "spark_cores": 2}
+    assert get_spark_resources("16g", "2", "local[*]") == {"spark_memory_mb": 8192, "spark_cores": 6}
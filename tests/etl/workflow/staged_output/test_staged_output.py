@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from etl.workflow.config import PdcmConfig
+from etl.workflow.staged_output import get_staging_path, staged_write
+
+
+def write_output(path, content):
+    os.makedirs(path)
+    with open(os.path.join(path, "part-0"), "w") as f:
+        f.write(content)
+    open(os.path.join(path, "_SUCCESS"), "w").close()
+
+
+def read_output(path):
+    with open(os.path.join(path, "part-0")) as f:
+        return f.read()
+
+
+def test_folder_output_needs_success_marker(tmp_path):
+    output_path = str(tmp_path / "patient")
+    target = PdcmConfig().get_target(output_path)
+    os.makedirs(output_path)
+
+    assert not target.exists()
+    open(os.path.join(output_path, "_SUCCESS"), "w").close()
+    assert target.exists()
+
+
+def test_staged_write_replaces_the_output(tmp_path):
+    output_path = str(tmp_path / "patient")
+    write_output(output_path, "old")
+    # Left by a failed run
+    os.makedirs(get_staging_path(output_path))
+
+    with staged_write(output_path) as staging_path:
+        assert read_output(output_path) == "old"
+        write_output(staging_path, "new")
+
+    assert read_output(output_path) == "new"
+    assert not os.path.exists(get_staging_path(output_path))
+
+
+def test_failed_write_keeps_the_previous_output(tmp_path):
+    output_path = str(tmp_path / "patient")
+    write_output(output_path, "old")
+
+    with pytest.raises(ValueError):
+        with staged_write(output_path) as staging_path:
+            os.makedirs(staging_path)
+            raise ValueError("job failed")
+    with pytest.raises(IOError):
+        with staged_write(output_path) as staging_path:
+            os.makedirs(staging_path)
+
+    assert read_output(output_path) == "old"
@@ -0,0 +1,257 @@
+import os
+import threading
+import time
+
+import pytest
+
+from tests.util import template_luigi_config
+
+
+@pytest.fixture(scope="module")
+def transformation_runner(tmp_path_factory):
+    # The transformation tasks are created when their module is imported, so the configuration is needed before that
+    with template_luigi_config(tmp_path_factory):
+        from etl.workflow import transformation_runner
+        yield transformation_runner
+
+
+class FakeSparkContext:
+    def setLocalProperty(self, key, value):
+        pass
+
+
+class FakeSpark:
+    sparkContext = FakeSparkContext()
+
+
+def build_step(entity_name, dependencies, output_dir="transformed"):
+    inputs = [os.path.join(output_dir, dependency) for dependency in dependencies]
+    return {"entity_name": entity_name, "dependencies": dependencies,
+            "arguments": [entity_name] + inputs + [os.path.join(output_dir, entity_name)],
+            "input_paths": inputs, "fingerprint_parameters": {"entity": entity_name}}
+
+
+def write_output(output_path):
+    os.makedirs(output_path)
+    open(os.path.join(output_path, "_SUCCESS"), "w").close()
+
+
+def test_transformations_are_sorted_by_dependencies(transformation_runner):
+    from etl.workflow.transformer import TransformEntity
+
+    tasks = transformation_runner.get_transformation_tasks()
+    positions = {task.task_id: position for position, task in enumerate(tasks)}
+
+    assert len(positions) == len(tasks)
+    for task in tasks:
+        for dependency in task.requiredTasks:
+            if isinstance(dependency, TransformEntity):
+                assert positions[dependency.task_id] < positions[task.task_id]
+
+
+def test_plan_has_the_same_arguments_as_the_spark_submit(transformation_runner):
+    from etl.workflow.transformer import TransformPatient
+
+    task = TransformPatient()
+    plan = transformation_runner.build_transformation_plan([task])
+    input_paths = [dependency.output().path for dependency in task.requiredTasks]
+
+    assert plan == [{
+        "entity_name": "patient",
+        "dependencies": ["ethnicity", "provider_group"],
+        "in_memory": False,
+        "arguments": ["patient"] + input_paths + [task.output().path],
+        "input_paths": input_paths,
+        "fingerprint_parameters": task.get_fingerprint_parameters()}]
+
+
+def test_run_plan_calls_jobs_in_order_and_skips_complete_entities(transformation_runner, monkeypatch, tmp_path):
+    calls = []
+
+    def fake_job(entity_name):
+        def run(argv):
+            calls.append((entity_name, argv))
+            write_output(argv[-1])
+        return run
+
+    monkeypatch.setattr(transformation_runner.spark_transformation_job, "get_spark_job_by_entity_name", fake_job)
+    output_dir = str(tmp_path)
+    plan = [build_step("ethnicity", [], output_dir), build_step("provider_type", [], output_dir),
+            build_step("patient", ["ethnicity", "provider_type"], output_dir)]
+
+    transformation_runner.run_transformation_plan(FakeSpark(), plan, lambda entity_name: entity_name == "provider_type")
+
+    assert calls == [
+        ("ethnicity", ["spark_transformation_job.py", output_dir + "/ethnicity.staging"]),
+        ("patient", ["spark_transformation_job.py", output_dir + "/ethnicity", output_dir + "/provider_type",
+                     output_dir + "/patient.staging"])]
+    # The outputs are renamed from the staging folders once the job finishes
+    assert os.path.exists(os.path.join(output_dir, "patient", "_SUCCESS"))
+    assert not os.path.exists(os.path.join(output_dir, "patient.staging"))
+
+
+def test_output_without_success_marker_is_not_published(transformation_runner, monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        transformation_runner.spark_transformation_job,
+        "get_spark_job_by_entity_name",
+        lambda entity_name: lambda argv: os.makedirs(argv[-1]))
+
+    with pytest.raises(IOError):
+        transformation_runner.run_transformation_plan(FakeSpark(), [build_step("tissue", [], str(tmp_path))],
+                                                      lambda entity_name: False)
+    assert not os.path.exists(os.path.join(str(tmp_path), "tissue"))
+
+
+def test_concurrent_run_respects_dependencies_and_heavy_limit(transformation_runner, monkeypatch, tmp_path):
+    lock = threading.Lock()
+    running = set()
+    finished = []
+    max_running = []
+
+    def fake_job(entity_name):
+        def run(argv):
+            with lock:
+                running.add(entity_name)
+                heavy = [name for name in running if name in transformation_runner.HEAVY_ENTITIES]
+                max_running.append((len(running), len(heavy)))
+            time.sleep(0.05)
+            write_output(argv[-1])
+            with lock:
+                running.remove(entity_name)
+                finished.append(entity_name)
+        return run
+
+    monkeypatch.setattr(transformation_runner.spark_transformation_job, "get_spark_job_by_entity_name", fake_job)
+    output_dir = str(tmp_path)
+    plan = [build_step("tissue", [], output_dir), build_step("tumour_type", [], output_dir),
+            build_step("engraftment_site", [], output_dir), build_step("initial_cna_molecular_data", [], output_dir),
+            build_step("initial_mutation_molecular_data", [], output_dir),
+            build_step("cna_molecular_data", ["initial_cna_molecular_data", "tissue"], output_dir)]
+
+    transformation_runner.run_transformation_plan(FakeSpark(), plan, lambda entity_name: False, 3, 1)
+
+    assert sorted(finished) == sorted(step["entity_name"] for step in plan)
+    assert finished.index("cna_molecular_data") > finished.index("initial_cna_molecular_data")
+    assert finished.index("cna_molecular_data") > finished.index("tissue")
+    assert max(total for total, _ in max_running) == 3
+    assert max(heavy for _, heavy in max_running) == 1
+
+
+def test_run_plan_raises_job_errors(transformation_runner, monkeypatch):
+    def failing_job(argv):
+        raise ValueError("wrong data")
+
+    monkeypatch.setattr(
+        transformation_runner.spark_transformation_job, "get_spark_job_by_entity_name", lambda entity_name: failing_job)
+
+    with pytest.raises(ValueError):
+        transformation_runner.run_transformation_plan(
+            FakeSpark(), [build_step("tissue", []), build_step("tumour_type", [])], lambda entity_name: False, 2, 1)
+
+
+def test_in_memory_entities_are_helpers_with_a_single_consumer(transformation_runner):
+    in_memory_entities = transformation_runner.get_in_memory_entities(transformation_runner.get_transformation_tasks())
+
+    assert "initial_mutation_molecular_data" in in_memory_entities
+    assert "model_metadata" in in_memory_entities
+    assert "treatment_type_helper" in in_memory_entities
+    # Consumed by treatment_type_helper and treatment_component
+    assert "treatment_name_harmonisation_helper" not in in_memory_entities
+    # Stored in the database
+    assert "mutation_measurement_data" not in in_memory_entities
+
+
+def test_fused_steps_pass_the_dataframe_to_the_consumer(transformation_runner, monkeypatch, tmp_path):
+    from etl.jobs.util.transformation_outputs import read_transformation_output, write_transformation_output
+
+    written = {}
+
+    class FakeDataFrame:
+        def __init__(self, name):
+            self.name = name
+
+        @property
+        def write(self):
+            df = self
+
+            class Writer:
+                def mode(self, mode):
+                    return self
+
+                def parquet(self, path):
+                    written[path] = df.name
+                    write_output(path)
+            return Writer()
+
+    def fake_job(entity_name):
+        def run(argv):
+            inputs = [read_transformation_output(None, path).name for path in argv[1:-1]]
+            write_transformation_output(FakeDataFrame("+".join([entity_name] + inputs)), argv[-1])
+        return run
+
+    monkeypatch.setattr(transformation_runner.spark_transformation_job, "get_spark_job_by_entity_name", fake_job)
+    output_dir = str(tmp_path)
+    plan = [build_step("initial_mutation_molecular_data", [], output_dir),
+            build_step("mutation_measurement_data", ["initial_mutation_molecular_data"], output_dir)]
+    plan[0]["in_memory"] = True
+
+    transformation_runner.run_transformation_plan(FakeSpark(), plan, lambda entity_name: False)
+
+    assert written == {
+        output_dir + "/mutation_measurement_data.staging": "mutation_measurement_data+initial_mutation_molecular_data"}
+
+
+def test_fused_step_is_skipped_if_its_consumer_is_complete(transformation_runner, monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        transformation_runner.spark_transformation_job,
+        "get_spark_job_by_entity_name",
+        lambda entity_name: lambda argv: calls.append(entity_name))
+    plan = [build_step("model_metadata", []), build_step("search_index_molecular_data", ["model_metadata"]),
+            build_step("search_index", ["search_index_molecular_data"])]
+    plan[0]["in_memory"] = True
+    plan[1]["in_memory"] = True
+
+    transformation_runner.run_transformation_plan(
+        FakeSpark(), plan, lambda entity_name: entity_name == "search_index")
+
+    assert calls == []
+
+
+def test_outputs_with_the_same_fingerprint_are_reused_from_the_cache(transformation_runner, monkeypatch, tmp_path):
+    calls = []
+
+    def fake_job(entity_name):
+        def run(argv):
+            calls.append(entity_name)
+            write_output(argv[-1])
+        return run
+
+    monkeypatch.setattr(transformation_runner.spark_transformation_job, "get_spark_job_by_entity_name", fake_job)
+    cache_dir = str(tmp_path / "cache")
+    raw_path = str(tmp_path / "raw" / "patient")
+    write_output(raw_path)
+
+    def run_release(release, code):
+        output_dir = str(tmp_path / release)
+        plan = [build_step("ethnicity", [], output_dir), build_step("patient", ["ethnicity"], output_dir)]
+        plan[0]["input_paths"] = [raw_path]
+        plan[0]["fingerprint_parameters"]["code"] = code
+        transformation_runner.run_transformation_plan(FakeSpark(), plan, lambda entity_name: False, cache_dir=cache_dir)
+        assert os.path.exists(os.path.join(output_dir, "patient", "_SUCCESS"))
+
+    with open(os.path.join(raw_path, "_fingerprint.json"), "w") as f:
+        f.write('{"fingerprint": "raw-1"}')
+    run_release("release1", "code-1")
+    run_release("release2", "code-1")
+    assert calls == ["ethnicity", "patient"]
+
+    # A change in the code of ethnicity changes the fingerprint of patient too
+    run_release("release3", "code-2")
+    assert calls == ["ethnicity", "patient", "ethnicity", "patient"]
+
+    calls.clear()
+    with open(os.path.join(raw_path, "_fingerprint.json"), "w") as f:
+        f.write('{"fingerprint": "raw-2"}')
+    run_release("release4", "code-2")
+    assert calls == ["ethnicity", "patient"]
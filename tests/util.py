@@ -1,4 +1,8 @@
+from contextlib import contextmanager
 from typing import List, Dict
+
+import luigi
+import pytest
 from pyspark.sql import DataFrame, SparkSession
 from pyspark.sql.types import StructType, StructField, StringType, ArrayType
 from chispa.dataframe_comparer import *
@@ -63,3 +67,28 @@ def assert_df_are_equal(df_a: DataFrame, df_b: DataFrame):
         ignore_row_order=True,
         ignore_column_order=True,
     )
+
+
+@contextmanager
+def template_luigi_config(tmp_path_factory):
+    """
+    Loads luigi_template.cfg (with temporary data folders) in a new luigi configuration, and restores the previous
+    configuration on exit so other tests do not see its sections and values. The data folders are the same for the
+    whole session, as the transformation tasks keep the ones of the configuration used when they were imported.
+    """
+    data_dir = tmp_path_factory.getbasetemp() / "data"
+    data_dir_out = tmp_path_factory.getbasetemp() / "data_out"
+    data_dir.mkdir(exist_ok=True)
+    data_dir_out.mkdir(exist_ok=True)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        parser_class = type(luigi.configuration.get_config())
+        monkeypatch.setattr(parser_class, "_instance", None)
+        config = luigi.configuration.get_config()
+        config.read("luigi_template.cfg")
+        config.defaults().update({
+            "data_dir": str(data_dir),
+            "data_dir_out": str(data_dir_out),
+            "providers": '["TRACE"]',
+            "molecular_data_restrictions": "{}",
+            "env": "local"})
+        yield config